@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Latency percentiles of get_game against a stand-in server whose responses
+have a slow tail, without retries and with hedged requests.
+"""
+# Imports ######################################################################
+from __future__ import print_function
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+import giantbomb  # noqa
+from giantbomb.retry import RetryPolicy  # noqa
+from giantbomb.standin import Server  # noqa
+
+
+def percentiles(latencies):
+    '''The p50, p95 and p99 of latencies, in milliseconds'''
+
+    latencies = sorted(latencies)
+    return [latencies[int(len(latencies) * q)] * 1000
+            for q in (0.5, 0.95, 0.99)]
+
+
+def main(count=400):
+    '''Print the percentile table'''
+
+    print('%-10s %8s %8s %8s %8s' % ('', 'p50 ms', 'p95 ms', 'p99 ms',
+                                     'hedges'))
+    for label, policy in (('plain', None),
+                          ('hedged', RetryPolicy(hedge=True))):
+        server = Server(latency=0.005, tail_rate=0.03,
+                        tail_latency=0.2).start()
+        gb = giantbomb.Api('key', retry=policy, identity_map=False)
+        gb.base_url = server.url
+        latencies = []
+        for gbid in range(count):
+            start = time.time()
+            gb.get_game(gbid)
+            latencies.append(time.time() - start)
+        print('%-10s %8.1f %8.1f %8.1f %8s' % tuple(
+            [label] + percentiles(latencies) +
+            [policy.hedges if policy else '-']))
+        gb.close()
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
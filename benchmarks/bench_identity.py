@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Memory held by the nested references of a crawl, with every response
+building its own copies and with the identity map sharing them.
+"""
+# Imports ######################################################################
+from __future__ import print_function
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+import giantbomb  # noqa
+from giantbomb.identity import IdentityMap  # noqa
+from bench_models import size_of  # noqa
+from payloads import make_game  # noqa
+
+
+def nested_size(objects):
+    '''Size of the distinct nested objects reachable from objects'''
+
+    seen = {}
+    for obj in objects:
+        for ref in obj.platforms:
+            seen[id(ref)] = size_of(ref)
+    return len(seen), sum(seen.values())
+
+
+def main(count=10000):
+    '''Print the comparison table'''
+
+    # every page is decoded separately, as it would be from the wire
+    body = json.dumps([make_game(x) for x in range(100)])
+    print('%-14s %10s %12s' % ('', 'objects', 'bytes'))
+    for label, cls in (('copies', giantbomb.Games),
+                       ('identity map', IdentityMap().bind(giantbomb.Games))):
+        games = [cls(x) for _ in range(count / 100) for x in json.loads(body)]
+        objects, size = nested_size(games)
+        print('%-14s %10d %12d' % (label, objects, size))
+
+
+if __name__ == '__main__':
+    main()
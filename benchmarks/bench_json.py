@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+"""
+Decode cost of each installed json decoder on giantbomb shaped payloads of
+each size class.  The fastest decoder is what Api uses by default.
+"""
+# Imports ######################################################################
+from __future__ import print_function
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+from giantbomb import decoders  # noqa
+from payloads import bodies  # noqa
+
+
+def main():
+    '''Print the decode time table'''
+
+    names = decoders.available()
+    payloads = bodies()
+    print('%-12s' % 'decoder' +
+          ''.join('%16s' % ('%s (%dK)' % (name, len(body) / 1024))
+                  for name, body in payloads) + '   usec/decode')
+    for name in names:
+        loads = decoders.get_decoder(name)
+        row = []
+        for _, body in payloads:
+            timer = timeit.Timer(lambda: loads(body))
+            number = max(1, 200000 / len(body))
+            row.append(min(timer.repeat(5, number)) / number)
+        print('%-12s' % name + ''.join('%16.1f' % (x * 1e6) for x in row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Compare the per-object memory and construction time of the slotted resource
+models with the old dict-backed SimpleObject classes.
+"""
+# Imports ######################################################################
+from __future__ import print_function
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+import giantbomb  # noqa
+from payloads import make_game  # noqa
+
+
+# Globals ######################################################################
+DictGame = type('DictGame', (giantbomb.SimpleObject, ), {})
+
+
+def size_of(obj):
+    '''Shallow size of an object and of its attribute storage'''
+
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    extra = getattr(obj, '_extra', None)
+    if extra:
+        size += sys.getsizeof(extra)
+    return size
+
+
+def main():
+    '''Print the comparison table'''
+
+    page = [make_game(x) for x in range(100)]
+    print('%-12s %12s %16s' % ('class', 'bytes/object', 'usec/100 objects'))
+    for cls in (DictGame, giantbomb.Games):
+        objects = [cls(x) for x in page]
+        size = sum(size_of(x) for x in objects) / len(objects)
+        timer = timeit.Timer(lambda: [cls(x) for x in page])
+        best = min(timer.repeat(5, 200)) / 200
+        print('%-12s %12d %16.1f' % (cls.__name__, size, best * 1e6))
+
+
+if __name__ == '__main__':
+    main()
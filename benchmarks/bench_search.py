@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Typeahead latency of the local search index on a catalog of generated game
+names, from single letter prefixes to complete titles.
+"""
+# Imports ######################################################################
+from __future__ import print_function
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+from giantbomb.searchindex import SearchIndex  # noqa
+
+
+# Globals ######################################################################
+WORDS = ('portal', 'half', 'life', 'dark', 'souls', 'super', 'mario', 'kart',
+         'legend', 'zelda', 'final', 'fantasy', 'street', 'fighter', 'metal',
+         'gear', 'solid', 'grand', 'theft', 'auto', 'mass', 'effect', 'dragon',
+         'age', 'quest', 'star', 'wars', 'battle', 'front', 'racing', 'world',
+         'war', 'craft', 'tactics', 'legends', 'chronicles', 'origins')
+QUERIES = ('p', 'por', 'portal', 'portal 2', 'gra th au', 'zzz')
+
+
+SYLLABLES = ('ka', 'ro', 'mi', 'zel', 'dra', 'gon', 'tor', 'ix', 'an', 'vel',
+             'sha', 'dow', 'lu', 'na', 'rex', 'bor', 'qui', 'mo', 'sta', 'pe')
+
+
+def make_vocabulary(rnd, size=20000):
+    '''Real title words mixed with made up ones, in a random order'''
+
+    words = list(WORDS)
+    while len(words) < size:
+        words.append(''.join(rnd.choice(SYLLABLES)
+                             for _ in range(rnd.randint(2, 4))))
+    rnd.shuffle(words)
+    return words
+
+
+def make_names(count, seed=42):
+    '''
+    Generated titles of one to four words, drawn with a long tailed
+    distribution like real titles, some with a sequel number
+    '''
+
+    rnd = random.Random(seed)
+    words = make_vocabulary(rnd)
+    for gbid in range(1, count + 1):
+        # log-uniform ranks: word frequencies follow Zipf's law
+        title = [words[int(len(words) ** rnd.random()) - 1]
+                 for _ in range(rnd.randint(1, 4))]
+        if rnd.random() < 0.3:
+            title.append(str(rnd.randint(2, 5)))
+        yield {'id': gbid, 'name': ' '.join(title).title()}
+
+
+def main(count=50000):
+    '''Print the latency of each query'''
+
+    index = SearchIndex()
+    timer = timeit.Timer(lambda: index.add_many('games', make_names(count)))
+    print('indexed %d names in %.2fs' % (count, timer.timeit(1)))
+    print('%-12s %10s %12s %12s' % ('query', 'matches', 'usec cold',
+                                     'usec cached'))
+    for query in QUERIES:
+        matches = len(index.search(query, limit=count))
+        row = []
+        for cache_size in (0, 256):
+            index.cache_size = cache_size
+            timer = timeit.Timer(lambda: index.search(query, limit=10))
+            row.append(min(timer.repeat(3, 20)) / 20)
+        print('%-12s %10d %12.1f %12.1f' % (query, matches, row[0] * 1e6,
+                                            row[1] * 1e6))
+
+if __name__ == '__main__':
+    main()
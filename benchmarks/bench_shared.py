@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Requests sent and hit rate of pre-forked workers looking up the same games,
+each with its own MemoryCache and all sharing one SharedCache.
+"""
+# Imports ######################################################################
+from __future__ import print_function
+import os
+import sys
+import shutil
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+import giantbomb  # noqa
+from giantbomb.cache import MemoryCache  # noqa
+from giantbomb.sharedcache import SharedCache  # noqa
+from giantbomb.standin import Server  # noqa
+
+
+def work(url, path, games, hits):
+    '''Look every game up twice, adding the cache hits to hits'''
+
+    cache = SharedCache(path) if path else MemoryCache()
+    gb = giantbomb.Api('key', cache=cache, identity_map=False)
+    gb.base_url = url
+    for _ in range(2):
+        for gbid in games:
+            gb.get_game(gbid)
+    with hits.get_lock():
+        hits.value += cache.stats.hits
+    gb.close()
+
+
+def main(workers=16, count=100):
+    '''Print the table'''
+
+    tmpdir = tempfile.mkdtemp()
+    print('%-8s %10s %10s' % ('', 'requests', 'hit rate'))
+    try:
+        for label, path in (('memory', None),
+                            ('shared', os.path.join(tmpdir, 'cache.shm'))):
+            server = Server(latency=0.002).start()
+            hits = multiprocessing.Value('i', 0)
+            procs = [multiprocessing.Process(
+                target=work, args=(server.url, path,
+                                   range(1, count + 1), hits))
+                for _ in range(workers)]
+            for proc in procs:
+                proc.start()
+            for proc in procs:
+                proc.join()
+            print('%-8s %10d %9.1f%%' % (
+                label, len(server.paths),
+                100.0 * hits.value / (2 * workers * count)))
+            server.stop()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Latency percentiles of get_game on a small set of games whose cache entries
+keep expiring, with plain expiry and with stale-while-revalidate.
+"""
+# Imports ######################################################################
+from __future__ import print_function
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+import giantbomb  # noqa
+from giantbomb.cache import MemoryCache  # noqa
+from giantbomb.refresh import Refresher  # noqa
+from giantbomb.standin import Server  # noqa
+from bench_hedging import percentiles  # noqa
+
+
+def main(count=2000, games=20, ttl=0.05):
+    '''Print the percentile table'''
+
+    print('%-10s %8s %8s %8s %8s' % ('', 'p50 ms', 'p95 ms', 'p99 ms',
+                                     'stale'))
+    for label, refresher in (('expiry', None), ('swr', Refresher())):
+        server = Server(latency=0.02).start()
+        gb = giantbomb.Api('key', cache=MemoryCache(default_ttl=ttl),
+                           identity_map=False,
+                           stale_while_revalidate=refresher)
+        gb.base_url = server.url
+        latencies = []
+        for n in range(count):
+            start = time.time()
+            gb.get_game(n % games + 1)
+            latencies.append(time.time() - start)
+            time.sleep(0.001)
+        print('%-10s %8.1f %8.1f %8.1f %8s' % tuple(
+            [label] + percentiles(latencies) +
+            [refresher.served if refresher else '-']))
+        gb.close()
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
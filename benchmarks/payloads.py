@@ -0,0 +1,79 @@
+"""
+Payloads shaped like giantbomb responses, in the size classes the client
+sees: a single detail object, a small page and a full 100 object page.
+"""
+# Imports ######################################################################
+import json
+
+
+def make_game(gbid):
+    '''A games list entry shaped like the real thing'''
+
+    return {'id': gbid,
+            'name': 'Game %s' % gbid,
+            'aliases': None,
+            'api_detail_url': 'http://www.giantbomb.com/api/game/3030-%s/'
+                              % gbid,
+            'site_detail_url': 'http://www.giantbomb.com/game/3030-%s/'
+                               % gbid,
+            'date_added': '2008-04-01 12:00:00',
+            'date_last_updated': '2014-09-01 12:00:00',
+            'deck': 'A short summary of game %s.' % gbid,
+            'description': '<p>%s</p>' % ('Lorem ipsum ' * 40),
+            'expected_release_day': None,
+            'expected_release_month': None,
+            'expected_release_quarter': None,
+            'expected_release_year': None,
+            'guid': '3030-%s' % gbid,
+            'image': {'icon_url': 'http://static.giantbomb.com/i.png',
+                      'small_url': 'http://static.giantbomb.com/s.png'},
+            'number_of_user_reviews': 0,
+            'original_game_rating': None,
+            'original_release_date': '2010-11-09 00:00:00',
+            'platforms': [make_platform(94, 'PC', 'PC'),
+                          make_platform(35, 'PlayStation 3', 'PS3')]}
+
+
+def make_platform(gbid, name, abbreviation):
+    '''A platform as nested in other objects'''
+
+    return {'id': gbid, 'name': name, 'abbreviation': abbreviation,
+            'api_detail_url': 'http://www.giantbomb.com/api/platform/3045-%s/'
+                              % gbid,
+            'site_detail_url': 'http://www.giantbomb.com/%s/3045-%s/'
+                               % (abbreviation.lower(), gbid)}
+
+
+def make_detail(gbid):
+    '''A game detail object, with the relations a list entry lacks'''
+
+    game = make_game(gbid)
+    game['description'] = '<p>%s</p>' % ('Lorem ipsum ' * 400)
+    for relation in ('developers', 'publishers', 'genres', 'themes',
+                     'franchises', 'similar_games'):
+        game[relation] = [{'id': x, 'name': '%s %s' % (relation, x),
+                           'api_detail_url': 'http://www.giantbomb.com/api/'
+                                             'x/%s/' % x}
+                          for x in range(5)]
+    return game
+
+
+def envelope(results, total=None):
+    '''Wrap results in the response envelope'''
+
+    if total is None:
+        total = len(results) if isinstance(results, list) else 1
+    return {'error': 'OK', 'limit': 100, 'offset': 0,
+            'number_of_page_results': total,
+            'number_of_total_results': total,
+            'status_code': 1, 'results': results, 'version': '1.0'}
+
+
+def bodies():
+    '''Serialized responses by size class'''
+
+    return [('detail', json.dumps(envelope(make_detail(1)))),
+            ('page-10', json.dumps(envelope([make_game(x)
+                                             for x in range(10)]))),
+            ('page-100', json.dumps(envelope([make_game(x)
+                                              for x in range(100)])))]
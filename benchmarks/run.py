@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+Run the benchmark suite (suite.py) and export the timings as json, or
+compare two exports.
+
+    python benchmarks/run.py                    # results/<commit>.json
+    python benchmarks/run.py -k get_items --quick
+    python benchmarks/run.py --compare results/old.json results/new.json
+
+Every case runs at each of its parameter combinations: the number of calls
+per repeat is calibrated so that a repeat lasts about ``--target`` seconds,
+and the best, median and mean time per operation over ``--repeat`` repeats
+are kept.  The export records the commit and interpreter it was measured
+with; ``--compare`` prints the ratio of the best times of two exports and
+exits with status 1 when a case got slower than ``--threshold``.
+"""
+# Imports ######################################################################
+from __future__ import print_function
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import multiprocessing
+
+import suite
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'results')
+
+
+def case_name(case, params):
+    '''The name of a case at one parameter combination'''
+
+    if not params:
+        return case.__name__
+    return '%s[%s]' % (case.__name__, ','.join(
+        '%s=%s' % item for item in sorted(params.items())))
+
+
+def git_commit():
+    '''The commit the tree is at, with a '+' when it has local changes'''
+
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                         cwd=cwd).decode().strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain',
+                                         '--untracked-files=no'], cwd=cwd)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+' if dirty.strip() else '')
+
+
+def environment():
+    '''What the timings were measured on'''
+
+    return {'commit': git_commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpus': multiprocessing.cpu_count()}
+
+
+def measure(func, ops, repeat, target):
+    '''Time func, returning the per operation statistics'''
+
+    func()
+    number = 1
+    while True:
+        start = time.time()
+        for _ in range(number):
+            func()
+        elapsed = time.time() - start
+        if elapsed >= target / 10.0 or number >= 10 ** 6:
+            break
+        number *= 10
+    number = max(1, int(number * target / max(elapsed, 1e-9)))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.time()
+        for _ in range(number):
+            func()
+        timings.append((time.time() - start) / number / ops)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    return {'number': number, 'repeat': repeat, 'ops': ops,
+            'min': timings[0], 'median': timings[len(timings) // 2],
+            'mean': mean,
+            'stdev': (sum((x - mean) ** 2 for x in timings) /
+                      len(timings)) ** 0.5}
+
+
+def run(pattern=None, repeat=5, target=0.2):
+    '''Run the matching cases, printing each timing as it is measured'''
+
+    results = []
+    for case, combinations in suite.PARAMS:
+        for params in combinations:
+            name = case_name(case, params)
+            if pattern and pattern not in name:
+                continue
+            func, ops, teardown = case(params)
+            try:
+                stats = measure(func, ops, repeat, target)
+            finally:
+                if teardown is not None:
+                    teardown()
+            stats.update({'name': name, 'case': case.__name__,
+                          'params': params})
+            results.append(stats)
+            print('%-48s %12.2f usec/op  (median %.2f, %d x %d)' %
+                  (name, stats['min'] * 1e6, stats['median'] * 1e6,
+                   stats['repeat'], stats['number']))
+    return results
+
+
+def compare(base_path, new_path, threshold):
+    '''Print how the cases of two exports compare, return the regressions'''
+
+    with open(base_path) as fobj:
+        base = json.load(fobj)
+    with open(new_path) as fobj:
+        new = json.load(fobj)
+    before = dict((x['name'], x) for x in base['results'])
+    print('%-48s %12s %12s %8s' % ('%s -> %s' % (
+        (base['environment']['commit'] or '?')[:8],
+        (new['environment']['commit'] or '?')[:8]),
+        'before', 'after', 'ratio'))
+    regressions = []
+    for result in new['results']:
+        old = before.get(result['name'])
+        if old is None:
+            continue
+        ratio = result['min'] / old['min']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  slower'
+            regressions.append(result['name'])
+        elif ratio < 1 / (1 + threshold):
+            flag = '  faster'
+        print('%-48s %12.2f %12.2f %8.2f%s' % (
+            result['name'], old['min'] * 1e6, result['min'] * 1e6, ratio,
+            flag))
+    return regressions
+
+
+def main(argv=None):
+    '''Command line entry point'''
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-k', dest='pattern',
+                        help='only run the cases whose name contains this')
+    parser.add_argument('-o', '--output',
+                        help='export path, results/<commit>.json by default')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target', type=float, default=0.2,
+                        help='seconds each repeat should last')
+    parser.add_argument('--quick', action='store_true',
+                        help='3 short repeats, for a rough idea')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'),
+                        help='compare two exports instead of running')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1],
+                            args.threshold) else 0
+
+    if args.quick:
+        args.repeat, args.target = 3, 0.05
+    env = environment()
+    results = run(args.pattern, args.repeat, args.target)
+    output = args.output
+    if output is None:
+        if not os.path.isdir(RESULTS_DIR):
+            os.makedirs(RESULTS_DIR)
+        output = os.path.join(RESULTS_DIR, '%s.json' % (
+            env['commit'] or time.strftime('%Y%m%d%H%M%S')))
+    with open(output, 'w') as fobj:
+        json.dump({'environment': env, 'results': results}, fobj, indent=1,
+                  sort_keys=True)
+    print('results written to %s' % output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+The benchmark cases run by run.py, one per client hot path.
+
+A case is a function taking one combination of its parameters and returning
+``(func, ops, teardown)``: ``func()`` is what gets timed, it performs
+``ops`` operations, and ``teardown()`` (or None) releases what the case
+set up.  ``PARAMS`` lists the parameter combinations of every case.
+"""
+# Imports ######################################################################
+import os
+import sys
+import json
+from multiprocessing.pool import ThreadPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+import giantbomb  # noqa
+from giantbomb.cache import MemoryCache  # noqa
+from giantbomb.metrics import Collector  # noqa
+from giantbomb.replay import Cassette, CassetteTransport  # noqa
+from giantbomb.standin import Server  # noqa
+from giantbomb.transport import PooledTransport  # noqa
+from payloads import bodies, make_detail, make_game  # noqa
+
+
+def build_url(params):
+    '''Api._build_url with a number of query parameters'''
+
+    gb = giantbomb.Api('key')
+    query = dict(('param%s' % x, x) for x in range(params['params']))
+    if params['params']:
+        query['filter'] = {'platforms': 94, 'name': 'uscf'}
+    return (lambda: gb._build_url('games', query)), 1, gb.close
+
+
+def getattr_dispatch(params):
+    '''Looking up an api method, get_<resource> and iter_<resources>'''
+
+    gb = giantbomb.Api('key')
+    name = params['name']
+
+    def func():
+        for _ in range(100):
+            getattr(gb, name)
+    return func, 100, gb.close
+
+
+def cached_lookup(params):
+    '''
+    Tight loop of get_game calls all served by the cache, where the method
+    dispatch is a visible share of each call
+    '''
+
+    gb = giantbomb.Api('key', cache=MemoryCache(), coalesce=False,
+                       identity_map=False)
+    url = gb._build_url('game/1')
+    cassette = Cassette()
+    cassette.record(url, 200, [], json.dumps({
+        'status_code': 1, 'error': 'OK', 'results': {'id': 1,
+                                                     'name': 'Game 1'}}))
+    gb.transport = CassetteTransport(cassette)
+    gb.get_game(1)
+
+    def func():
+        for _ in range(100):
+            gb.get_game(1)
+    return func, 100, gb.close
+
+
+def json_decode(params):
+    '''Decoding a response body with the default decoder'''
+
+    body = dict(bodies())[params['payload']]
+    loads = giantbomb.Api('key').loads
+    return (lambda: loads(body)), 1, None
+
+
+def construct(params):
+    '''Building the models of a decoded response'''
+
+    if params['payload'] == 'detail':
+        data, cls = [make_detail(1)], giantbomb.Game
+    else:
+        count = int(params['payload'].split('-')[1])
+        data, cls = [make_game(x) for x in range(count)], giantbomb.Games
+
+    # decoded from the wire, nothing shared between two runs
+    body = json.dumps(data)
+    objects = [json.loads(body) for _ in range(8)]
+    state = {'next': 0}
+
+    def func():
+        idx = state['next'] = (state['next'] + 1) % len(objects)
+        return [cls(x) for x in objects[idx]]
+    return func, 1, None
+
+
+def get_items(params):
+    '''
+    Api.get_games end-to-end against the local stand-in server, with
+    ``concurrency`` threads each fetching a page of ``limit`` objects
+    '''
+
+    concurrency = params['concurrency']
+    server = Server(total=params['limit'] * concurrency).start()
+    gb = giantbomb.Api('key', transport=PooledTransport(maxsize=concurrency),
+                       coalesce=False)
+    gb.base_url = server.url
+    pool = ThreadPool(concurrency)
+    offsets = [x * params['limit'] for x in range(concurrency)]
+
+    def fetch(offset):
+        return len(gb.get_games(limit=params['limit'], offset=offset))
+
+    def teardown():
+        pool.close()
+        pool.join()
+        gb.close()
+        server.stop()
+    return (lambda: pool.map(fetch, offsets)), concurrency, teardown
+
+
+def instrumentation(params):
+    '''
+    Api.get_game replayed from memory, with and without a Collector: the
+    cost of instrumentation, and of having it disabled
+    '''
+
+    gb = giantbomb.Api('key', coalesce=False, identity_map=False,
+                       instrumentation=Collector() if params['enabled']
+                       else None)
+    url = gb._build_url('game/1')
+    cassette = Cassette()
+    cassette.record(url, 200, [], dict(bodies())['detail'])
+    gb.transport = CassetteTransport(cassette)
+    return (lambda: gb.get_game(1)), 1, gb.close
+
+
+PAYLOADS = ('detail', 'page-10', 'page-100')
+
+PARAMS = [(build_url, [{'params': x} for x in (0, 3, 10)]),
+          (getattr_dispatch, [{'name': x} for x in ('get_game', 'get_games',
+                                                    'iter_games')]),
+          (cached_lookup, [{}]),
+          (json_decode, [{'payload': x} for x in PAYLOADS]),
+          (construct, [{'payload': x} for x in PAYLOADS]),
+          (get_items, [{'limit': x, 'concurrency': y}
+                       for x in (10, 100) for y in (1, 4, 16)]),
+          (instrumentation, [{'enabled': x} for x in (False, True)])]
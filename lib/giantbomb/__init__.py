@@ -5,9 +5,14 @@ GiantBomb is an interface to the API on giantbomb.com.
 __author__ = "Leandro Voltolino <xupisco@gmail.com>"
 __version__ = "0.7"
 
-import urllib2
+import os
+import time
 import urllib
+import urllib2
 import functools
+import itertools
+import collections
+from cStringIO import StringIO
 try:
     import simplejson
 except ImportError:
@@ -20,12 +25,38 @@ except ImportError:
             raise Exception("GiantBomb wrapper requires the simplejson "
                             "library (or Python 2.6) to work. "
                             "http://www.undefined.org/python/")
+from giantbomb.transport import PooledTransport
+from giantbomb.cache import normalize_url, split_key
+from giantbomb.ratelimit import THROTTLE_STATUS_CODES, THROTTLE_HTTP_CODES
+from giantbomb.pool import WorkerPool
+from giantbomb.coalesce import SingleFlight
+from giantbomb.models import make_model, model_fields
+from giantbomb.projection import FieldProfiler
+from giantbomb.identity import IdentityMap, resource_of
+from giantbomb.streamjson import ResultStream, TeeReader
+from giantbomb.decoders import get_decoder
+from giantbomb.metrics import Fanout
+from giantbomb.methods import make_item_method, make_list_method
+from giantbomb.retry import RetryPolicy, retry_after
+from giantbomb.refresh import Refresher
+
+
+# The largest page the list resources will return
+PAGE_SIZE = 100
+
+# Api status code of lookups for ids that do not exist
+OBJECT_NOT_FOUND = 101
+
+# HTTP status of a conditional request whose cached response is still valid
+NOT_MODIFIED = 304
 
 
 class GiantBombError(Exception):
     '''Generic exception class'''
 
-    pass
+    def __init__(self, message, status_code=None):
+        super(GiantBombError, self).__init__(message)
+        self.status_code = status_code
 
 
 def check_response(resp):
@@ -38,7 +69,19 @@ def check_response(resp):
         return resp['results']
     else:
         raise GiantBombError('Error code %s: %s' % (resp['status_code'],
-                                                    resp['error']))
+                                                    resp['error']),
+                             resp['status_code'])
+
+
+def conditional_headers(entry):
+    '''The headers revalidating a cache entry, empty without validators'''
+
+    headers = {}
+    if entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
 
 
 class Api(object):
@@ -46,11 +89,82 @@ class Api(object):
     The primary interface for the GiantBomb module.  Instantiate this with
     your api key and then call the appropriate methods to access the data
     from the giantbomb servers.
+
+    All requests go through ``transport`` which defaults to a
+    :class:`giantbomb.transport.PooledTransport` keeping connections to the
+    servers alive between calls.  Pass a ``cache`` from
+    :mod:`giantbomb.cache` to keep successful responses around, and a
+    :class:`giantbomb.ratelimit.RateLimiter` as ``rate_limiter`` to pace the
+    requests sent to the servers.  Unless ``coalesce`` is False, concurrent
+    identical requests share a single download (see ``single_flight`` for
+    the counters).  Expired cache entries are revalidated with conditional
+    requests (``If-None-Match``/``If-Modified-Since``), or failing HTTP
+    validators with a ``field_list=id,date_last_updated`` probe, and reused
+    when unchanged.  With ``auto_field_list`` (True or a
+    :class:`giantbomb.projection.FieldProfiler`) requests only ask for the
+    fields callers have been seen reading.  ``json_decoder`` picks the
+    decoder used for the responses (see :mod:`giantbomb.decoders`), the
+    fastest one installed by default.  Objects are interned in
+    ``identity_map`` (a :class:`giantbomb.identity.IdentityMap`, True for a
+    default one, or False): every response mentioning the same platform,
+    genre or game resolves to one shared object, updated as more fields
+    arrive.  Unless ``lazy_references`` is False, reading a field a nested
+    reference lacks fetches the full object; use ``prefetch`` to load the
+    references of many objects in a few batched requests instead.
+    ``instrumentation`` (a :class:`giantbomb.metrics.Instrumentation`, or a
+    list of them) is told how long each phase of each request took, see
+    :mod:`giantbomb.metrics`.  ``retry`` (a
+    :class:`giantbomb.retry.RetryPolicy`, or True for the default one)
+    retries the requests failing for a transient reason, and may hedge the
+    slow ones.  With ``stale_while_revalidate`` (a
+    :class:`giantbomb.refresh.Refresher`, or True for the default one),
+    recently expired cache entries are served at once and revalidated in
+    the background.
     '''
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, transport=None, cache=None,
+                 rate_limiter=None, coalesce=True, auto_field_list=False,
+                 json_decoder=None, identity_map=True, lazy_references=True,
+                 instrumentation=None, retry=None,
+                 stale_while_revalidate=None):
         self.api_key = api_key
         self.base_url = 'http://www.giantbomb.com/api/'
+        if transport is None:
+            transport = PooledTransport()
+        self.transport = transport
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.single_flight = None
+        if coalesce:
+            self.single_flight = SingleFlight()
+        self.loads = get_decoder(json_decoder)
+        self.profiler = None
+        if auto_field_list is True:
+            self.profiler = FieldProfiler()
+        elif auto_field_list:
+            self.profiler = auto_field_list
+        self._completers = {}
+        if identity_map is True:
+            identity_map = IdentityMap()
+        elif identity_map is False:
+            identity_map = None
+        if identity_map is not None and not identity_map.models:
+            identity_map.models = dict(
+                (name, globals()[value[1]])
+                for name, value in self.ITEMS.iteritems())
+        if identity_map is not None and lazy_references and \
+                identity_map.loader is None:
+            identity_map.loader = self._load_reference
+        self.identity = identity_map
+        if isinstance(instrumentation, (list, tuple)):
+            instrumentation = Fanout(*instrumentation)
+        self.instrumentation = instrumentation
+        if retry is True:
+            retry = RetryPolicy()
+        self.retry = retry
+        if stale_while_revalidate is True:
+            stale_while_revalidate = Refresher()
+        self.refresher = stale_while_revalidate
 
     @staticmethod
     def default_repr(obj):
@@ -74,53 +188,661 @@ class Api(object):
                     url += "&%s=%s" % (key, str(value))
         return url
 
-    def get_item(self, uri, cls, gbid):
+    def _open(self, url, resource=None, headers=None):
+        '''
+        Open url through the transport, waiting for the rate limiter first
+        '''
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(resource)
+        if self.instrumentation is not None:
+            start = time.time()
+        try:
+            resp = self.transport.open(url, headers)
+        except urllib2.HTTPError as exc:
+            if self.rate_limiter is not None and \
+                    exc.code in THROTTLE_HTTP_CODES:
+                self.rate_limiter.throttled(resource, retry_after(exc))
+            raise
+        if self.instrumentation is not None:
+            self._record_open(resource, resp, time.time() - start)
+        return resp
+
+    def _record_open(self, resource, resp, elapsed):
+        '''
+        Report the connect and time to first byte phases of a response.
+        Transports that do not time them have them counted as ttfb.
+        '''
+
+        connect_time = getattr(resp, 'connect_time', None)
+        ttfb = getattr(resp, 'ttfb', None)
+        if ttfb is None:
+            ttfb = elapsed - (connect_time or 0)
+        if connect_time is not None:
+            self.instrumentation.timing(resource, 'connect', connect_time)
+        self.instrumentation.timing(resource, 'ttfb', ttfb)
+
+    def _download(self, url, resource=None):
+        '''Fetch the body of url'''
+
+        resp = self._open(url, resource)
+        try:
+            return resp.read()
+        finally:
+            resp.close()
+
+    def _account(self, resource, status_code):
+        '''Tell the rate limiter how a request for resource went'''
+
+        if self.rate_limiter is not None:
+            if status_code in THROTTLE_STATUS_CODES:
+                self.rate_limiter.throttled(resource)
+            else:
+                self.rate_limiter.succeeded(resource)
+
+    def _load(self, url):
+        '''
+        Decode the json response for url, served from the cache when
+        possible.  Concurrent requests for the same url share one download.
+        '''
+
+        key = normalize_url(url)
+        resource = split_key(key)[0]
+        stale = None
+        if self.cache is not None:
+            stale = self.cache.get_entry(key, stale=True)
+            if stale is not None:
+                now = time.time()
+                if stale.is_fresh(now):
+                    return self.loads(stale.body)
+                if self.refresher is not None and \
+                        self.refresher.usable(stale, now):
+                    self.refresher.serve(key, self._load_uncached, url,
+                                         key, resource, stale)
+                    return self.loads(stale.body)
+        return self._load_uncached(url, key, resource, stale)
+
+    def _load_uncached(self, url, key, resource, stale=None):
+        '''
+        The part of _load going to the servers, stale being the expired
+        cache entry of url if any
+        '''
+
+        if self.single_flight is not None:
+            return self.single_flight.do(key, self._fetch, url, key,
+                                         resource, stale)
+        return self._fetch(url, key, resource, stale)
+
+    def _fetch(self, url, key, resource, stale=None):
+        '''_load_remote, through the retry policy if there is one'''
+
+        if self.retry is None:
+            return self._load_remote(url, key, resource, stale)
+        return self.retry.call(self._load_checked, url, key, resource, stale)
+
+    def _load_checked(self, url, key, resource, stale=None):
+        '''_load_remote, raising the throttling status codes to retry them'''
+
+        data = self._load_remote(url, key, resource, stale)
+        if data.get('status_code') in THROTTLE_STATUS_CODES:
+            check_response(data)
+        return data
+
+    def _load_remote(self, url, key, resource, stale=None):
         '''
-        Generic method to get an item from giantbomb.  Intended to be
-        used by the __getattr__ method
+        Download and decode the response for url.  stale is the expired
+        cache entry for url, revalidated instead of downloaded again when
+        possible.  Only successful responses are cached.
+        '''
+
+        headers = None
+        if stale is not None:
+            headers = conditional_headers(stale)
+            if not headers and self._unchanged(stale):
+                self.cache.refresh(key, stale)
+                return self.loads(stale.body)
+        try:
+            resp = self._open(url, resource, headers)
+        except urllib2.HTTPError as exc:
+            if stale is None or exc.code != NOT_MODIFIED:
+                raise
+            self._account(resource, 1)
+            self.cache.refresh(key, stale)
+            return self.loads(stale.body)
+        if self.instrumentation is not None:
+            return self._load_instrumented(key, resource, resp)
+        try:
+            body = resp.read()
+        finally:
+            resp.close()
+        data = self.loads(body)
+        status_code = data.get('status_code')
+        self._account(resource, status_code)
+        if self.cache is not None and status_code == 1:
+            self._cache_response(key, body, resp.info(), data)
+        return data
+
+    def _load_instrumented(self, key, resource, resp):
+        '''_load_remote reading resp, reporting every phase'''
+
+        metrics = self.instrumentation
+        start = time.time()
+        try:
+            body = resp.read()
+        finally:
+            resp.close()
+        decoding = time.time()
+        metrics.timing(resource, 'body', decoding - start)
+        metrics.transferred(resource, len(body))
+        data = self.loads(body)
+        metrics.timing(resource, 'decode', time.time() - decoding)
+        status_code = data.get('status_code')
+        if status_code != 1:
+            metrics.error(resource, status_code)
+        self._account(resource, status_code)
+        if self.cache is not None and status_code == 1:
+            self._cache_response(key, body, resp.info(), data)
+        return data
+
+    def _cache_response(self, key, body, info, data=None):
+        '''Cache a successful body along with its validators'''
+
+        updated = None
+        if data is not None and isinstance(data.get('results'), dict):
+            updated = data['results'].get('date_last_updated')
+        etag = last_modified = None
+        if info is not None:
+            etag = info.get('ETag')
+            last_modified = info.get('Last-Modified')
+        self.cache.set(key, body, etag=etag, last_modified=last_modified,
+                       updated=updated)
+
+    def _unchanged(self, entry):
+        '''
+        Check whether the object of an expired detail entry is unchanged
+        with a ``field_list=id,date_last_updated`` probe of its list
+        resource.  Entries that cannot be probed count as changed.
+        '''
+
+        if entry.updated is None or entry.gbid is None:
+            return False
+        plural = self.PLURALS.get(entry.resource)
+        if plural is None or 'filter' not in self.LIST_ITEMS[plural][1]:
+            return False
+        url = self._build_url(self.LIST_ITEMS[plural][0],
+                              {'filter': {'id': entry.gbid},
+                               'field_list': 'id,date_last_updated'})
+        data = self.loads(self._download(url, plural))
+        self._account(plural, data.get('status_code'))
+        if data.get('status_code') != 1 or len(data['results']) != 1:
+            return False
+        return data['results'][0].get('date_last_updated') == entry.updated
+
+    def _stream(self, url):
+        '''
+        A ResultStream over the results of the response for url, parsed
+        while the body is still being received.  Streamed requests bypass
+        request coalescing.
+        '''
+
+        key = normalize_url(url)
+        resource = split_key(key)[0]
+        if self.cache is not None:
+            body = self.cache.get(key)
+            if body is not None:
+                return ResultStream(StringIO(body), check_response)
+
+        resp = self._open(url, resource)
+        info = resp.info()
+        if self.cache is not None:
+            resp = TeeReader(resp)
+
+        def check(envelope):
+            '''Account for the request and validate its status'''
+
+            self._account(resource, envelope['status_code'])
+            check_response(envelope)
+
+        def done(envelope):
+            '''Cache the body of a successful response'''
+
+            if self.cache is not None and envelope['status_code'] == 1:
+                self._cache_response(key, resp.getvalue(), info)
+
+        return ResultStream(resp, check, done)
+
+    def invalidate(self, resource, gbid=None):
+        '''
+        Drop cached responses for resource (e.g. 'game' or 'games'),
+        optionally only those of one gbid
+        '''
+
+        if self.cache is None:
+            return
+        if gbid is not None and not isinstance(gbid, int):
+            gbid = gbid.id
+        self.cache.invalidate(resource, gbid)
+
+    def close(self):
+        '''Close any connections held open by the transport'''
+
+        self.transport.close()
+        if self.retry is not None:
+            self.retry.close()
+        if self.refresher is not None:
+            self.refresher.close()
+
+    def get_item(self, uri, cls, gbid, field_list=None):
+        '''
+        Generic method to get an item from giantbomb.  Called by the
+        get_<resource> methods
         '''
 
         if not isinstance(gbid, int):
             gbid = gbid.id
-        url = self._build_url(uri % gbid)
-        resp = simplejson.load(urllib2.urlopen(url))
+        resource = uri.split('/', 1)[0]
+        params = {}
+        if field_list is not None:
+            params['field_list'] = field_list
+        projected = self._project(resource, ('field_list', ), params)
+        url = self._build_url(uri % gbid, params)
+        resp = self._load(url)
+        new_cls = self._model(cls, resource, projected)
+        if self.instrumentation is not None:
+            start = time.time()
+            obj = self._build(new_cls, check_response(resp), resource)
+            self.instrumentation.timing(resource, 'construct',
+                                        time.time() - start)
+            return obj
+        return self._build(new_cls, check_response(resp), resource)
+
+    def get_items(self, uri, valid_args, cls, *args, **kwargs):
+        '''
+        Generic method to get a page of a list resource from giantbomb,
+        the arguments being checked against valid_args.  Pass
+        ``project=False`` to get the full objects even with
+        ``auto_field_list``.  The get_<resources> methods call _get_items
+        directly.
+        '''
+
+        project = kwargs.pop('project', True)
+        return self._get_items(uri, valid_args, cls,
+                               self._list_params(valid_args, args, kwargs),
+                               project)
+
+    def _get_items(self, uri, valid_args, cls, params, project=True):
+        '''get_items with the params of the request already built'''
+
+        projected = project and self._project(uri, valid_args, params)
+        url = self._build_url(uri, params)
+        resp = self._load(url)
+        new_cls = self._model(cls, uri, projected)
+        if self.instrumentation is not None:
+            start = time.time()
+            objs = [new_cls(x) for x in check_response(resp)]
+            self.instrumentation.timing(uri, 'construct', time.time() - start)
+            return objs
+        return [new_cls(x) for x in check_response(resp)]
+
+    def _project(self, resource, valid_args, params):
+        '''
+        Add the automatic field_list of resource to the params of a request
+        that did not choose its own, returning whether it did
+        '''
+
+        if self.profiler is None or 'field_list' in params or \
+                'field_list' not in valid_args:
+            return False
+        field_list = self.profiler.field_list(resource)
+        if field_list is None:
+            return False
+        params['field_list'] = field_list
+        return True
+
+    def _model(self, cls, resource, projected=False):
+        '''
+        The class to build the objects of a request for resource with.
+        projected tells whether the request used an automatic field_list.
+        '''
+
         new_cls = globals()[cls]
-        obj = new_cls(check_response(resp))
+        if self.identity is not None:
+            new_cls = self.identity.bind(new_cls)
+        if self.profiler is None:
+            return new_cls
+        complete = None
+        if projected:
+            complete = self._completers.get(resource)
+            if complete is None:
+                complete = self._completers.setdefault(
+                    resource, functools.partial(self._complete, resource))
+        return self.profiler.tracked(new_cls, resource, complete)
+
+    def _build(self, cls, data, resource):
+        '''
+        An object of an item resource, interned in the identity map if
+        there is one
+        '''
 
-        return obj
+        if self.identity is None:
+            return cls(data)
+        return self.identity.resolve(data, cls, resource)
 
-    def get_items(self, uri, valid_args, cls, *args, **kwargs):
+    def _complete(self, resource, obj):
+        '''Fill in an object fetched with an automatic field_list'''
+
+        if resource not in self.ITEMS:
+            resource = SINGULARS.get(resource)
+            if resource is None:
+                return
+        url = self._build_url(self.ITEMS[resource][0] % obj.id)
+        obj._update(check_response(self._load(url)))
+
+    def _load_reference(self, resource, obj):
+        '''Fill in a lazy nested object with its detail response'''
+
+        url = self._build_url(self.ITEMS[resource][0] % obj.id)
+        obj._update(check_response(self._load(url)))
+
+    def prefetch(self, objs, *relations):
         '''
-        Generic method to get an item from giantbomb.  Intended to be
-        used by the __getattr__ method
+        Load the nested references found under the given relations
+        ('platforms', 'developers'...) of objs at once: their ids are
+        collected across all the objects and fetched with get_many, a
+        hundred per request, instead of one request per reference.  The
+        references are updated in place; objs is returned.
         '''
 
-        params = {}
-        idx = 0
-        for idx, arg in enumerate(args):
-            params[valid_args[idx]] = arg
+        wanted = collections.defaultdict(list)
+        for obj in objs:
+            for relation in relations:
+                value = obj.get(relation)
+                if value is None:
+                    continue
+                if not isinstance(value, list):
+                    value = [value]
+                for ref in value:
+                    if getattr(ref, '_loaded', None) is True:
+                        continue
+                    resource = getattr(ref, '_resource', None)
+                    if resource is None:
+                        resource = resource_of(ref.get('api_detail_url'))
+                    if resource in self.ITEMS and ref.get('id') is not None:
+                        wanted[resource].append(ref)
+
+        for resource, refs in wanted.iteritems():
+            found = self.get_many(resource, [ref.id for ref in refs])
+            for ref in refs:
+                full = found.get(ref.id)
+                if full is not None and full is not ref:
+                    ref._update(full.__getstate__())
+        return objs
+
+    def get_many(self, resource, ids, field_list=None):
+        '''
+        Get many objects of an item resource (an ITEMS key such as 'game')
+        at once, returned as a dict keyed by id.  The ids are looked up in
+        batches of 100 through the ``filter=id:1|2|3`` of the matching list
+        resource; only ids missing from those answers are fetched one by
+        one.  Ids that do not exist are left out of the result.
+        '''
+
+        uri, cls = self.ITEMS[resource]
+        new_cls = globals()[cls]
+        if self.identity is not None:
+            new_cls = self.identity.bind(new_cls)
+        if field_list is not None and 'id' not in field_list.split(','):
+            field_list += ',id'
+        wanted = []
+        seen = set()
+        for gbid in ids:
+            if not isinstance(gbid, int):
+                gbid = gbid.id
+            if gbid not in seen:
+                seen.add(gbid)
+                wanted.append(gbid)
+
+        found = {}
+        plural = self.PLURALS.get(resource)
+        if plural is not None and 'filter' in self.LIST_ITEMS[plural][1]:
+            list_uri = self.LIST_ITEMS[plural][0]
+            for start in xrange(0, len(wanted), PAGE_SIZE):
+                chunk = wanted[start:start + PAGE_SIZE]
+                params = {'limit': PAGE_SIZE,
+                          'filter': {'id': '|'.join(str(x) for x in chunk)}}
+                if field_list is not None:
+                    params['field_list'] = field_list
+                resp = self._load(self._build_url(list_uri, params))
+                for item in check_response(resp):
+                    found[item['id']] = self._build(new_cls, item, resource)
+
+        for gbid in wanted:
+            if gbid in found:
+                continue
+            try:
+                found[gbid] = self.get_item(uri, cls, gbid, field_list)
+            except GiantBombError as exc:
+                if exc.status_code != OBJECT_NOT_FOUND:
+                    raise
+        return found
+
+    @staticmethod
+    def _list_params(valid_args, args, kwargs):
+        '''
+        Map positional and keyword arguments of a list call to params,
+        raising TypeError for arguments the resource does not take
+        '''
+
+        if len(args) > len(valid_args):
+            raise TypeError('expected at most %d arguments (%s), got %d' %
+                            (len(valid_args), ', '.join(valid_args),
+                             len(args)))
+        params = dict(zip(valid_args, args))
         for key, value in kwargs.iteritems():
-            idx += 1
+            if key not in valid_args:
+                raise TypeError('unexpected argument %r, expected one of %s'
+                                % (key, ', '.join(valid_args)))
             params[key] = value
-        url = self._build_url(uri, params)
-        resp = simplejson.load(urllib2.urlopen(url))
-        new_cls = globals()[cls]
-        return [new_cls(x) for x in check_response(resp)]
+        return params
+
+    def _iter_results(self, page_url, offset, limit, prefetch=False,
+                      stream=False):
+        '''
+        Walk a list resource page by page, yielding the raw results.
+        page_url(offset) builds the url of the page at offset.  With
+        prefetch the next page is downloaded while the current one is being
+        consumed; with stream pages not already prefetched are parsed while
+        they are received.
+        '''
+
+        pool = None
+        if prefetch:
+            pool = WorkerPool(1)
+        pending = None
+        try:
+            while True:
+                if pending is None and stream:
+                    page = self._stream(page_url(offset))
+                    for item in page:
+                        yield item
+                    count = page.count
+                    total = page.envelope.get('number_of_total_results')
+                else:
+                    if pending is None:
+                        resp = self._load(page_url(offset))
+                    else:
+                        resp = pending.result()
+                    page = check_response(resp)
+                    count = len(page)
+                    total = resp.get('number_of_total_results')
+
+                offset += count
+                if total is None:
+                    more = count >= limit
+                else:
+                    more = count > 0 and offset < int(total)
+                pending = None
+                if more and pool is not None:
+                    pending = pool.submit(self._load, page_url(offset))
+                if isinstance(page, list):
+                    for item in page:
+                        yield item
+                if not more:
+                    return
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    def iter_items(self, uri, valid_args, cls, *args, **kwargs):
+        '''
+        Generator over every object of a list resource, fetched lazily one
+        page (``limit`` objects, 100 by default) at a time, starting at
+        ``offset``.  Pass ``prefetch=True`` to download the next page in
+        the background, or ``stream=True`` to get each object as soon as
+        it has been received, and ``project=False`` to get the full objects
+        even with ``auto_field_list``.  The iter_<resources> methods call
+        _iter_items directly.
+        '''
+
+        prefetch = kwargs.pop('prefetch', False)
+        stream = kwargs.pop('stream', False)
+        project = kwargs.pop('project', True)
+        return self._iter_items(uri, valid_args, cls,
+                                self._list_params(valid_args, args, kwargs),
+                                prefetch, stream, project)
+
+    def _iter_items(self, uri, valid_args, cls, params, prefetch=False,
+                    stream=False, project=True):
+        '''iter_items with the params of the request already built'''
+
+        offset = int(params.pop('offset', 0))
+        limit = int(params.setdefault('limit', PAGE_SIZE))
+        projected = project and self._project(uri, valid_args, params)
+        new_cls = self._model(cls, uri, projected)
+
+        def page_url(page_offset):
+            '''url of the page at page_offset'''
+
+            params['offset'] = page_offset
+            return self._build_url(uri, params)
+
+        for item in self._iter_results(page_url, offset, limit, prefetch,
+                                       stream):
+            yield new_cls(item)
+
+    @staticmethod
+    def _read_checkpoint(path, resource):
+        '''Offset recorded in a crawl checkpoint file, or None'''
+
+        if not os.path.exists(path):
+            return None
+        with open(path) as fobj:
+            state = simplejson.load(fobj)
+        if state['resource'] != resource:
+            raise ValueError('Checkpoint %s belongs to a crawl of %s' %
+                             (path, state['resource']))
+        return state['offset']
+
+    @staticmethod
+    def _write_checkpoint(path, resource, offset):
+        '''Atomically record the offset a crawl should resume from'''
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as fobj:
+            simplejson.dump({'resource': resource, 'offset': offset}, fobj)
+        os.rename(tmp_path, path)
+
+    def crawl(self, resource, workers=4, checkpoint=None, **kwargs):
+        '''
+        Generator over every object of a list resource (a LIST_ITEMS key
+        such as 'games').  Once the first page gives the total, the other
+        pages are downloaded concurrently by ``workers`` threads, but
+        objects are still yielded in offset order.
+
+        ``checkpoint`` is the path of a file recording the offset of the
+        first page not fully consumed yet; a crawl started with an existing
+        checkpoint resumes from there, so a page may be yielded twice but
+        never skipped.  The file is removed once the crawl completes.
+        Other keyword arguments are list parameters (field_list, filter,
+        limit...); limit is at most PAGE_SIZE, the most the server returns.
+        '''
+
+        uri, valid_args, cls = self.LIST_ITEMS[resource]
+        params = self._list_params(valid_args, (), kwargs)
+        offset = int(params.pop('offset', 0))
+        limit = min(int(params.get('limit', PAGE_SIZE)), PAGE_SIZE)
+        params['limit'] = limit
+        projected = self._project(uri, valid_args, params)
+        new_cls = self._model(cls, uri, projected)
+        if checkpoint is not None:
+            saved = self._read_checkpoint(checkpoint, resource)
+            if saved is not None:
+                offset = saved
+
+        def page_url(page_offset):
+            '''url of the page at page_offset'''
+
+            params['offset'] = page_offset
+            return self._build_url(uri, params)
+
+        def page_items(page_offset, resp):
+            '''
+            The results of the page at page_offset, fetching the rest of
+            the page again while the server returned fewer than asked
+            '''
+
+            items = list(check_response(resp))
+            end = min(total, page_offset + limit)
+            while page_offset + len(items) < end:
+                more = check_response(self._load(
+                    page_url(page_offset + len(items))))
+                if not more:
+                    break
+                items.extend(more)
+            return items[:max(0, end - page_offset)]
+
+        resp = self._load(page_url(offset))
+        total = int(resp.get('number_of_total_results', 0))
+        for item in page_items(offset, resp):
+            yield new_cls(item)
+        offset += limit
+        if checkpoint is not None:
+            self._write_checkpoint(checkpoint, resource, offset)
+
+        pool = WorkerPool(workers)
+        pending = collections.deque()
+        offsets = iter(xrange(offset, total, limit))
+        try:
+            for page_offset in itertools.islice(offsets, workers * 2):
+                pending.append((page_offset, pool.submit(
+                    self._load, page_url(page_offset))))
+            while pending:
+                page_offset, future = pending.popleft()
+                for next_offset in itertools.islice(offsets, 1):
+                    pending.append((next_offset, pool.submit(
+                        self._load, page_url(next_offset))))
+                for item in page_items(page_offset, future.result()):
+                    yield new_cls(item)
+                if checkpoint is not None:
+                    self._write_checkpoint(checkpoint, resource,
+                                           page_offset + limit)
+        finally:
+            pool.shutdown(wait=False)
+
+        if checkpoint is not None:
+            os.remove(checkpoint)
 
     def __getattr__(self, name):
         '''
-        Create a partial call that can be used to call the appropriate method
-        with the stored parameters
+        The bare resource names of older versions (``gb.game(1)``) are
+        aliases of the get_<resource> methods, generated from ITEMS and
+        LIST_ITEMS when the module is imported
         '''
-        if name.startswith('get_'):
-            name = name.split('_', 1)[1]
-        if name in self.ITEMS:
-            return functools.partial(self.get_item, self.ITEMS[name][0],
-                                     self.ITEMS[name][1])
-        if name in self.LIST_ITEMS:
-            return functools.partial(self.get_items, self.LIST_ITEMS[name][0],
-                                     self.LIST_ITEMS[name][1],
-                                     self.LIST_ITEMS[name][2])
+
+        if name in self.ITEMS or name in self.LIST_ITEMS:
+            return getattr(self, 'get_' + name)
+        raise AttributeError("'%s' object has no attribute '%s'" %
+                             (type(self).__name__, name))
 
     ITEMS = {'accessory': ('accessory/%s', 'Accessory'),
              'character': ('character/%s', 'Character'),
@@ -216,6 +938,28 @@ class Api(object):
                                                   'offset'),
                                   'VideoTypes')}
 
+    # The list resource holding the objects of each item resource
+    PLURALS = {'accessory': 'accessories',
+               'character': 'characters',
+               'company': 'companies',
+               'concept': 'concepts',
+               'franchise': 'franchises',
+               'game': 'games',
+               'game_rating': 'game_ratings',
+               'genre': 'genres',
+               'location': 'locations',
+               'object': 'objects',
+               'person': 'people',
+               'platform': 'platforms',
+               'promo': 'promos',
+               'rating_board': 'rating_boards',
+               'region': 'regions',
+               'release': 'releases',
+               'review': 'reviews',
+               'theme': 'themes',
+               'user_review': 'user_reviews',
+               'video': 'videos'}
+
     def search(self, query, offset=0, resources=None, gbfilter=None,
                limit=None):
         '''
@@ -223,6 +967,21 @@ class Api(object):
         http://www.giantbomb.com/api/documentation#toc-0-38
         '''
 
+        url = self._search_url(query, offset, resources, gbfilter, limit)
+        results = self._load(url)
+        if self.instrumentation is not None:
+            start = time.time()
+            objs = [SearchResult(x) for x in check_response(results)]
+            self.instrumentation.timing('search', 'construct',
+                                        time.time() - start)
+            return objs
+        return [SearchResult(x)
+                for x in check_response(results)]
+
+    def _search_url(self, query, offset=0, resources=None, gbfilter=None,
+                    limit=None):
+        '''Build the url of a search request'''
+
         params = {"offset": offset,
                   "query": urllib.quote(query, '').replace('-', '%2D')}
         if resources is not None:
@@ -232,11 +991,27 @@ class Api(object):
         if limit is not None:
             params['limit'] = limit
 
-        url = self._build_url("search", params=params)
+        return self._build_url("search", params=params)
 
-        results = simplejson.load(urllib2.urlopen(url))
-        return [SearchResult(x)
-                for x in check_response(results)]
+    def iter_search(self, query, offset=0, resources=None, gbfilter=None,
+                    limit=None, prefetch=False, stream=False):
+        '''
+        Generator over every search result, fetched lazily one page at a
+        time.  See iter_items for limit, prefetch and stream.
+        '''
+
+        if limit is None:
+            limit = PAGE_SIZE
+
+        def page_url(page_offset):
+            '''url of the page at page_offset'''
+
+            return self._search_url(query, page_offset, resources, gbfilter,
+                                    limit)
+
+        for item in self._iter_results(page_url, offset, limit, prefetch,
+                                       stream):
+            yield SearchResult(item)
 
 
 def update(obj, args):
@@ -261,10 +1036,21 @@ class SimpleObject(object):
         return Api.default_repr(self)
 
 
-for _, VALUE in Api.ITEMS.iteritems():
-    globals()[VALUE[1]] = type(VALUE[1], (SimpleObject,), {})
-for _, VALUE in Api.LIST_ITEMS.iteritems():
-    globals()[VALUE[2]] = type(VALUE[2], (SimpleObject,), {})
+SINGULARS = dict((VALUE, NAME) for NAME, VALUE in Api.PLURALS.iteritems())
+for NAME, VALUE in Api.ITEMS.iteritems():
+    globals()[VALUE[1]] = make_model(VALUE[1], model_fields(NAME), __name__,
+                                     'Represents a %s' % NAME)
+for NAME, VALUE in Api.LIST_ITEMS.iteritems():
+    globals()[VALUE[2]] = make_model(VALUE[2],
+                                     model_fields(SINGULARS.get(NAME)),
+                                     __name__, 'Represents %s' % NAME)
+
+for NAME, VALUE in Api.ITEMS.iteritems():
+    setattr(Api, 'get_' + NAME, make_item_method(NAME, *VALUE))
+for NAME, VALUE in Api.LIST_ITEMS.iteritems():
+    setattr(Api, 'get_' + NAME, make_list_method(NAME, *VALUE))
+    setattr(Api, 'iter_' + NAME, make_list_method(NAME, *VALUE,
+                                                  iterate=True))
 
 
 class SearchResult(SimpleObject):
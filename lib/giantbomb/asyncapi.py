@@ -0,0 +1,64 @@
+'''
+A non-blocking flavour of :class:`giantbomb.Api`.
+
+Every ``get_<resource>`` method known to ``Api.ITEMS``/``Api.LIST_ITEMS``
+and ``search`` return a :class:`giantbomb.pool.Future` straight away; the
+requests run on a bounded pool of workers sharing one ``Api`` and so one
+connection pool and cache.  ``result()`` returns exactly what the blocking
+call would have, or raises the same ``GiantBombError``.
+
+    gb = AsyncApi('YOUR_KEY', concurrency=16)
+    games = gather([gb.get_game(gbid) for gbid in ids])
+'''
+
+import functools
+from giantbomb import Api
+from giantbomb.pool import WorkerPool, gather
+from giantbomb.transport import PooledTransport
+
+
+__all__ = ['AsyncApi', 'gather']
+
+
+class AsyncApi(object):
+    '''
+    Issue api calls concurrently, at most ``concurrency`` at a time.
+    Remaining keyword arguments are passed to :class:`giantbomb.Api`, or an
+    existing instance can be wrapped with ``api=``.
+    '''
+
+    def __init__(self, api_key=None, concurrency=8, api=None, **kwargs):
+        if api is None:
+            kwargs.setdefault('transport',
+                              PooledTransport(maxsize=concurrency))
+            api = Api(api_key, **kwargs)
+        self.api = api
+        self.pool = WorkerPool(concurrency)
+
+    def submit(self, func, *args, **kwargs):
+        '''Run any blocking call on the pool'''
+
+        return self.pool.submit(func, *args, **kwargs)
+
+    def search(self, *args, **kwargs):
+        '''Same arguments as Api.search, returns a Future'''
+
+        return self.submit(self.api.search, *args, **kwargs)
+
+    def close(self):
+        '''Wait for the pending calls and close the connections'''
+
+        self.pool.shutdown()
+        self.api.close()
+
+    def __getattr__(self, name):
+        '''
+        Wrap the Api method of the same name so that calling it returns a
+        Future
+        '''
+
+        if name.startswith('get_'):
+            resource = name.split('_', 1)[1]
+            if resource in Api.ITEMS or resource in Api.LIST_ITEMS:
+                return functools.partial(self.submit, getattr(self.api, name))
+        raise AttributeError(name)
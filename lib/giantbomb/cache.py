@@ -0,0 +1,372 @@
+'''
+Response caches used by :class:`giantbomb.Api`.
+
+Responses are cached as raw bodies keyed on the normalized request url (the
+api key removed and the query parameters sorted), so the same lookup made
+with a different key or argument order is still a hit.  Every cache exposes
+``get(key)``, ``set(key, body)``, ``invalidate(resource, gbid=None)``,
+``clear()`` and a ``stats`` counter object.
+
+Entries also keep the validators of their response (``ETag``,
+``Last-Modified`` and the ``date_last_updated`` of a detail payload).
+Expired entries are not dropped straight away: ``get_entry(key, stale=True)``
+still returns them so that they can be revalidated with a conditional
+request, and ``refresh`` makes them fresh again when they turn out to be
+unchanged.
+'''
+
+import time
+import sqlite3
+import urllib
+import urlparse
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_TTL = 60 * 60
+DAY = 24 * 60 * 60
+
+# How long (seconds) responses stay fresh, by resource.  Reference data such
+# as platforms and genres hardly ever changes, videos are added constantly.
+TTLS = {'genre': 7 * DAY, 'genres': 7 * DAY,
+        'platform': 7 * DAY, 'platforms': 7 * DAY,
+        'rating_board': 7 * DAY, 'rating_boards': 7 * DAY,
+        'region': 7 * DAY, 'regions': 7 * DAY,
+        'theme': 7 * DAY, 'themes': 7 * DAY,
+        'types': 7 * DAY,
+        'video_type': 7 * DAY, 'video_types': 7 * DAY,
+        'search': 10 * 60,
+        'video': 5 * 60, 'videos': 5 * 60}
+
+
+def normalize_url(url):
+    '''
+    Turn a request url into a cache key: the path below ``/api/`` followed by
+    the sorted query parameters, without the api key.
+    '''
+
+    parts = urlparse.urlsplit(url)
+    path = parts.path
+    idx = path.find('/api/')
+    if idx >= 0:
+        path = path[idx + len('/api/'):]
+    params = sorted(x for x in urlparse.parse_qsl(parts.query, True)
+                    if x[0] != 'api_key')
+    return path + '?' + urllib.urlencode(params)
+
+
+def split_key(key):
+    '''Get the (resource, gbid) a cache key refers to; gbid may be None'''
+
+    segments = [x for x in key.split('?', 1)[0].split('/') if x]
+    if not segments:
+        return None, None
+    if len(segments) == 1:
+        return segments[0], None
+    return segments[0], segments[1]
+
+
+class CacheStats(object):
+    '''Hit, miss and eviction counters of a cache'''
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.revalidations = 0
+
+    def __repr__(self):
+        return '<CacheStats hits=%s misses=%s evictions=%s>' % (
+            self.hits, self.misses, self.evictions)
+
+
+class CacheEntry(object):
+    '''A cached response body and its bookkeeping'''
+
+    __slots__ = ('body', 'expires', 'resource', 'gbid', 'etag',
+                 'last_modified', 'updated')
+
+    def __init__(self, body, expires, resource, gbid, etag=None,
+                 last_modified=None, updated=None):
+        self.body = body
+        self.expires = expires
+        self.resource = resource
+        self.gbid = gbid
+        self.etag = etag
+        self.last_modified = last_modified
+        self.updated = updated
+
+    def is_fresh(self, now=None):
+        '''Whether the entry can be used without revalidation'''
+
+        if now is None:
+            now = time.time()
+        return self.expires > now
+
+
+class BaseCache(object):
+    '''
+    Common behaviour of the caches: ttl lookup by resource and statistics.
+    ``ttls`` overrides (or extends) the default :data:`TTLS` table.
+    '''
+
+    def __init__(self, ttls=None, default_ttl=DEFAULT_TTL):
+        self.ttls = dict(TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+
+    def ttl_for(self, resource):
+        '''How long a response for resource stays fresh'''
+
+        return self.ttls.get(resource, self.default_ttl)
+
+    def _entry(self, key, body, ttl=None, etag=None, last_modified=None,
+               updated=None):
+        '''Build the entry stored for key'''
+
+        resource, gbid = split_key(key)
+        if ttl is None:
+            ttl = self.ttl_for(resource)
+        return CacheEntry(body, time.time() + ttl, resource, gbid, etag,
+                          last_modified, updated)
+
+    def get_entry(self, key, stale=False):
+        '''
+        Return the fresh entry stored for key, or None.  With stale an
+        expired entry is returned too.
+        '''
+
+        raise NotImplementedError
+
+    def set_entry(self, key, entry):
+        '''Store an already built entry'''
+
+        raise NotImplementedError
+
+    def get(self, key):
+        '''Return the cached body for key, or None'''
+
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        return entry.body
+
+    def set(self, key, body, ttl=None, etag=None, last_modified=None,
+            updated=None):
+        '''
+        Store body for key, using the resource ttl unless ttl is given.
+        The validators are kept for revalidating the entry once expired.
+        '''
+
+        self.set_entry(key, self._entry(key, body, ttl, etag, last_modified,
+                                        updated))
+
+    def refresh(self, key, entry, ttl=None):
+        '''Make an entry found unchanged on the server fresh again'''
+
+        if ttl is None:
+            ttl = self.ttl_for(entry.resource)
+        entry.expires = time.time() + ttl
+        self.stats.revalidations += 1
+        self.set_entry(key, entry)
+
+    def invalidate(self, resource, gbid=None):
+        '''Drop every entry for resource, or only those of one gbid'''
+
+        raise NotImplementedError
+
+    def clear(self):
+        '''Drop everything'''
+
+        raise NotImplementedError
+
+
+class MemoryCache(BaseCache):
+    '''A bounded, thread safe, in-memory LRU cache'''
+
+    def __init__(self, maxsize=1024, ttls=None, default_ttl=DEFAULT_TTL):
+        super(MemoryCache, self).__init__(ttls, default_ttl)
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_entry(self, key, stale=False):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            # expired entries stay around (subject to the lru) until they
+            # are revalidated or replaced
+            self._entries[key] = entry
+            if not entry.is_fresh():
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                if not stale:
+                    return None
+            else:
+                self.stats.hits += 1
+            return entry
+
+    def set_entry(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, resource, gbid=None):
+        if gbid is not None:
+            gbid = str(gbid)
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry.resource == resource and \
+                        (gbid is None or entry.gbid == gbid):
+                    del self._entries[key]
+                    self.stats.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCache(BaseCache):
+    '''
+    A cache kept in a sqlite database at ``path`` so that it survives
+    restarts.  Expired rows are ignored and can be removed with ``purge``.
+    '''
+
+    def __init__(self, path, ttls=None, default_ttl=DEFAULT_TTL):
+        super(DiskCache, self).__init__(ttls, default_ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS cache '
+                             '(key TEXT PRIMARY KEY, resource TEXT, '
+                             'gbid TEXT, expires REAL, body BLOB)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS cache_resource '
+                             'ON cache (resource, gbid)')
+            # databases written before the validators were kept
+            columns = set(row[1] for row in
+                          self._db.execute('PRAGMA table_info(cache)'))
+            for column in ('etag', 'last_modified', 'updated'):
+                if column not in columns:
+                    self._db.execute('ALTER TABLE cache ADD COLUMN %s TEXT'
+                                     % column)
+
+    def get_entry(self, key, stale=False):
+        with self._lock:
+            row = self._db.execute('SELECT body, expires, resource, gbid, '
+                                   'etag, last_modified, updated '
+                                   'FROM cache WHERE key = ?',
+                                   (key, )).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            entry = CacheEntry(str(row[0]), *row[1:])
+            if not entry.is_fresh():
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                if not stale:
+                    return None
+            else:
+                self.stats.hits += 1
+        return entry
+
+    def set_entry(self, key, entry):
+        with self._lock:
+            with self._db:
+                self._db.execute('INSERT OR REPLACE INTO cache '
+                                 '(key, resource, gbid, expires, body, etag, '
+                                 'last_modified, updated) '
+                                 'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                 (key, entry.resource, entry.gbid,
+                                  entry.expires, sqlite3.Binary(entry.body),
+                                  entry.etag, entry.last_modified,
+                                  entry.updated))
+
+    def invalidate(self, resource, gbid=None):
+        with self._lock:
+            with self._db:
+                if gbid is None:
+                    cur = self._db.execute('DELETE FROM cache '
+                                           'WHERE resource = ?', (resource, ))
+                else:
+                    cur = self._db.execute('DELETE FROM cache WHERE '
+                                           'resource = ? AND gbid = ?',
+                                           (resource, str(gbid)))
+            self.stats.invalidations += cur.rowcount
+
+    def purge(self):
+        '''Remove the expired rows'''
+
+        with self._lock:
+            with self._db:
+                cur = self._db.execute('DELETE FROM cache WHERE expires <= ?',
+                                       (time.time(), ))
+            self.stats.evictions += cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            with self._db:
+                self._db.execute('DELETE FROM cache')
+
+    def close(self):
+        '''Close the database'''
+
+        self._db.close()
+
+
+class TieredCache(BaseCache):
+    '''
+    An in-memory LRU in front of an optional slower (usually on-disk) cache.
+    Hits in the slow tier are promoted to the memory tier.
+    '''
+
+    def __init__(self, memory=None, disk=None):
+        super(TieredCache, self).__init__()
+        if memory is None:
+            memory = MemoryCache()
+        self.memory = memory
+        self.disk = disk
+
+    def get_entry(self, key, stale=False):
+        entry = self.memory.get_entry(key, stale)
+        if (entry is None or not entry.is_fresh()) and self.disk is not None:
+            slow = self.disk.get_entry(key, stale)
+            if slow is not None and (entry is None or
+                                     slow.expires > entry.expires):
+                entry = slow
+                self.memory.set_entry(key, entry)
+        if entry is None or not entry.is_fresh():
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return entry
+
+    def set_entry(self, key, entry):
+        self.memory.set_entry(key, entry)
+        if self.disk is not None:
+            self.disk.set_entry(key, entry)
+
+    def ttl_for(self, resource):
+        return self.memory.ttl_for(resource)
+
+    def invalidate(self, resource, gbid=None):
+        self.memory.invalidate(resource, gbid)
+        if self.disk is not None:
+            self.disk.invalidate(resource, gbid)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
@@ -0,0 +1,46 @@
+'''
+Request coalescing: concurrent identical lookups share one fetch.
+'''
+
+import threading
+from giantbomb.pool import Future
+
+
+class SingleFlight(object):
+    '''
+    Run at most one call per key at a time.  Callers arriving with a key
+    whose call is still in flight wait for it and get the same result (or
+    exception) instead of making their own call.  ``calls`` counts the calls
+    actually made, ``coalesced`` the ones that piggybacked on another.
+    '''
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        '''Return func(*args, **kwargs), shared with concurrent callers'''
+
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                self.calls += 1
+                self._flights[key] = leader = Future()
+        if future is not None:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            leader.set_exception(exc)
+            raise
+        else:
+            leader.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
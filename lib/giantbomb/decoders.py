@@ -0,0 +1,83 @@
+'''
+Pluggable json decoders.
+
+Decoding is a visible part of the cost of every request, and the third party
+decoders are several times faster than the standard library on giantbomb
+payloads.  :func:`get_decoder` returns the ``loads`` function of a decoder by
+name, or of the fastest one installed when no name is given.  Run
+``benchmarks/bench_json.py`` to compare the decoders available on a machine.
+'''
+
+
+def _orjson():
+    '''orjson loads'''
+
+    import orjson
+    return orjson.loads
+
+
+def _rapidjson():
+    '''python-rapidjson loads'''
+
+    import rapidjson
+    return rapidjson.loads
+
+
+def _ujson():
+    '''ujson loads'''
+
+    import ujson
+    return ujson.loads
+
+
+def _simplejson():
+    '''simplejson loads (fast with its C speedups)'''
+
+    import simplejson
+    return simplejson.loads
+
+
+def _json():
+    '''standard library loads'''
+
+    import json
+    return json.loads
+
+
+DECODERS = {'orjson': _orjson,
+            'rapidjson': _rapidjson,
+            'ujson': _ujson,
+            'simplejson': _simplejson,
+            'json': _json}
+
+# Fastest first, as measured by benchmarks/bench_json.py on giantbomb payloads
+PREFERENCE = ('orjson', 'rapidjson', 'ujson', 'simplejson', 'json')
+
+
+def available():
+    '''Names of the decoders that can be imported, fastest first'''
+
+    names = []
+    for name in PREFERENCE:
+        try:
+            DECODERS[name]()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_decoder(decoder=None):
+    '''
+    Return a loads function.  decoder may be None (the fastest installed),
+    the name of one of the DECODERS or a loads-like callable.
+    '''
+
+    if callable(decoder):
+        return decoder
+    if decoder is None:
+        return DECODERS[available()[0]]()
+    if decoder not in DECODERS:
+        raise ValueError('Unknown json decoder %r, expected one of %s' %
+                         (decoder, ', '.join(PREFERENCE)))
+    return DECODERS[decoder]()
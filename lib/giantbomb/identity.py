@@ -0,0 +1,177 @@
+'''
+Identity map for the objects built by an :class:`giantbomb.Api`.
+
+Every response repeats the nested objects it refers to (a game's
+``platforms``, ``genres``, ``developers``...), so a crawl of thousands of
+games ends up holding thousands of copies of the same few platforms.  With
+an :class:`IdentityMap` the objects of the same ``(resource, id)`` are
+interned: the first copy is kept and later copies only update its fields in
+place, so a field that one response lacks and another has ends up on the
+shared object.
+
+Objects are only referenced weakly, so the map never keeps alive what the
+program has dropped, except for the ``maxsize`` most recently seen ones,
+which are kept so that objects shared by consecutive responses survive
+between them.
+
+Given a ``loader``, nested objects are lazy: reading a field their
+reference lacks (``game.platforms[0].install_base``) calls
+``loader(resource, obj)`` once to fill the object in, after which the read
+is retried.
+'''
+
+import re
+import weakref
+import threading
+from collections import OrderedDict
+from giantbomb.models import Model, Reference, load_once
+
+
+# Resource name in the api_detail_url of a nested object
+RESOURCE_URL = re.compile(r'/api/([a-z_]+)/')
+
+
+def resource_of(url):
+    '''The resource ('platform') an api_detail_url points to, or None'''
+
+    if not url:
+        return None
+    match = RESOURCE_URL.search(url)
+    if match is None:
+        return None
+    return match.group(1)
+
+
+class IdentityMap(object):
+    '''
+    Interns objects by (resource, id).  ``models`` maps item resources to
+    the classes nested objects of that resource are built with, anything
+    else becomes a :class:`giantbomb.models.Reference`.  ``loader`` fills in
+    lazy nested objects.  ``hits`` counts the objects resolved to an
+    existing one, ``misses`` the new ones and ``loads`` the lazy loads.
+    '''
+
+    def __init__(self, maxsize=1024, models=None, loader=None):
+        self.maxsize = maxsize
+        self.models = dict(models or {})
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._refs = weakref.WeakValueDictionary()
+        self._recent = OrderedDict()
+        self._classes = {}
+        self._lazy_classes = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._refs)
+
+    def bind(self, cls):
+        '''
+        A subclass of the model cls whose nested objects are resolved
+        through this map
+        '''
+
+        if cls._identity is self:
+            return cls
+        with self._lock:
+            bound = self._classes.get(cls)
+            if bound is None:
+                namespace = {'__slots__': (), '__module__': cls.__module__,
+                             '__doc__': cls.__doc__, '_identity': self}
+                bound = type(cls.__name__, (cls, ), namespace)
+                self._classes[cls] = bound
+        return bound
+
+    def lazy(self, cls, resource):
+        '''
+        A bound subclass of the model cls whose objects call the loader the
+        first time a missing field of theirs is read
+        '''
+
+        key = (cls, resource)
+        with self._lock:
+            lazy_cls = self._lazy_classes.get(key)
+            if lazy_cls is None:
+                lazy_cls = self._make_lazy(self.bind(cls), resource)
+                self._lazy_classes[key] = lazy_cls
+        return lazy_cls
+
+    def _make_lazy(self, cls, resource):
+        '''Build the lazy subclass of a bound class'''
+
+        identity = self
+
+        def load(obj):
+            with identity._lock:
+                identity.loads += 1
+            identity.loader(resource, obj)
+
+        def __getattr__(obj, name):
+            if name[0] != '_' and identity.loader is not None:
+                extra = object.__getattribute__(obj, '_extra')
+                if extra is None or name not in extra:
+                    load_once(obj, '_loaded', identity._lock, load)
+                    try:
+                        return object.__getattribute__(obj, name)
+                    except AttributeError:
+                        pass
+            return Model.__getattr__(obj, name)
+
+        namespace = {'__slots__': ('_loaded', ), '__module__': cls.__module__,
+                     '__doc__': cls.__doc__, '_resource': resource,
+                     '__getattr__': __getattr__}
+        return type(cls.__name__, (cls, ), namespace)
+
+    def resolve(self, data, cls=None, resource=None):
+        '''
+        The object for the json dict data: the one already known for its
+        (resource, id), updated with data, or a new one built with cls (by
+        default the class of the resource in ``models``).  resource is found
+        from the ``api_detail_url`` of data when not given.
+        '''
+
+        if resource is None:
+            resource = resource_of(data.get('api_detail_url'))
+        gbid = data.get('id')
+        if cls is not None:
+            # the object known may be of another subclass (lazy, tracked)
+            # of the same model
+            base = cls._base
+        else:
+            base = self.models.get(resource, Reference)
+            if resource in self.models and gbid is not None:
+                cls = self.lazy(base, resource)
+            else:
+                cls = base
+        if resource is None or gbid is None:
+            return self.bind(cls)(data)
+
+        key = (resource, gbid)
+        with self._lock:
+            obj = self._refs.get(key)
+            if obj is not None and isinstance(obj, base):
+                self.hits += 1
+                obj._update(data)
+            else:
+                self.misses += 1
+                obj = self.bind(cls)(data)
+                self._refs[key] = obj
+            self._recent.pop(key, None)
+            self._recent[key] = obj
+            if len(self._recent) > self.maxsize:
+                self._recent.popitem(last=False)
+        return obj
+
+    def get(self, resource, gbid):
+        '''The live object of (resource, gbid), or None'''
+
+        return self._refs.get((resource, gbid))
+
+    def clear(self):
+        '''Forget every object'''
+
+        with self._lock:
+            self._refs.clear()
+            self._recent.clear()
@@ -0,0 +1,77 @@
+'''
+The ``get_<resource>`` and ``iter_<resources>`` methods of
+:class:`giantbomb.Api`.
+
+They are generated once, when the module is imported, from the ``ITEMS`` and
+``LIST_ITEMS`` tables, as plain functions with the explicit signature of
+their resource: ``get_games(self, field_list=None, limit=None, offset=None,
+platforms=None, sort=None, filter=None)``.  Looking one up is an ordinary
+attribute access, arguments the resource does not take are rejected by
+Python itself, and ``help()``/``inspect`` show what each one accepts.
+'''
+
+# Template of an item method, called with an id or an object having one
+ITEM_TEMPLATE = '''\
+def %(method)s(self, gbid, field_list=None):
+    return self.get_item(%(uri)r, %(cls)r, gbid, field_list)
+'''
+
+# Template of the list and iter methods, whose parameters are the valid_args
+LIST_TEMPLATE = '''\
+def %(method)s(self, %(signature)s):
+    params = {}
+%(params)s
+    return self.%(target)s(%(uri)r, %(valid_args)r, %(cls)r, params%(extra)s)
+'''
+
+PARAM_TEMPLATE = '''\
+    if %(arg)s is not None:
+        params[%(arg)r] = %(arg)s'''
+
+
+def compile_method(method, source, doc, module='giantbomb'):
+    '''Build the function method defined by source'''
+
+    namespace = {}
+    exec(compile(source, '<giantbomb.methods %s>' % method, 'exec'),
+         namespace)
+    func = namespace[method]
+    func.__doc__ = doc
+    func.__module__ = module
+    return func
+
+
+def make_item_method(name, uri, cls):
+    '''The get_<name> method of an item resource'''
+
+    method = 'get_%s' % name
+    source = ITEM_TEMPLATE % {'method': method, 'uri': uri, 'cls': cls}
+    doc = ('Get the %s with the given id (or of an object with an ``id``), '
+           'restricted to the fields of ``field_list`` if given.' % name)
+    return compile_method(method, source, doc)
+
+
+def make_list_method(name, uri, valid_args, cls, iterate=False):
+    '''
+    The get_<name> method of a list resource, or its iter_<name> method
+    with iterate
+    '''
+
+    signature = ['%s=None' % arg for arg in valid_args]
+    extra = ''
+    if iterate:
+        method, target = 'iter_%s' % name, '_iter_items'
+        signature.extend(['prefetch=False', 'stream=False'])
+        extra = ', prefetch, stream'
+        doc = ('Generator over every object of %s, fetched a page at a time. '
+               'See Api.iter_items.' % name)
+    else:
+        method, target = 'get_%s' % name, '_get_items'
+        doc = 'Get a page of %s.' % name
+    source = LIST_TEMPLATE % {
+        'method': method, 'signature': ', '.join(signature),
+        'params': '\n'.join(PARAM_TEMPLATE % {'arg': arg}
+                            for arg in valid_args),
+        'target': target, 'uri': uri, 'valid_args': tuple(valid_args),
+        'cls': cls, 'extra': extra}
+    return compile_method(method, source, doc)
@@ -0,0 +1,279 @@
+'''
+Instrumentation of the requests made by :class:`giantbomb.Api`.
+
+Given ``Api(instrumentation=hooks)``, every request reports where its time
+went, per resource (``'game'``, ``'games'``, ``'search'``...) and phase:
+
+``connect``
+    opening a new connection (only reported when one was opened)
+``ttfb``
+    from sending the request to receiving the response headers
+``body``
+    reading the response body
+``decode``
+    decoding the json
+``construct``
+    building the model objects
+
+along with the bytes received and the status codes of the responses that
+raise ``GiantBombError``.  Streamed responses (``stream=True``) only report
+connect and ttfb, their body being decoded while it is read.
+
+Hooks implement the three methods of :class:`Instrumentation`;
+:class:`Collector` keeps latency histograms in process,
+:class:`PrometheusHooks` and :class:`OpenTelemetryHooks` forward to those
+libraries when they are installed.  Without instrumentation (the
+default) nothing is measured at all.
+'''
+
+import bisect
+import threading
+from collections import defaultdict
+
+
+PHASES = ('connect', 'ttfb', 'body', 'decode', 'construct')
+
+# Upper bounds (seconds) of the histogram buckets, the same as the default
+# buckets of the prometheus client
+BUCKETS = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0,
+           7.5, 10.0)
+
+# Finer buckets for the phases spent in process, which take microseconds
+# rather than milliseconds
+FAST_BUCKETS = (.00001, .000025, .00005, .0001, .00025, .0005, .001, .0025,
+                .005, .01, .025, .05, .1)
+
+PHASE_BUCKETS = {'decode': FAST_BUCKETS, 'construct': FAST_BUCKETS}
+
+
+class Instrumentation(object):
+    '''Base class for instrumentation hooks'''
+
+    def timing(self, resource, phase, seconds):
+        '''A phase of a request for resource took seconds'''
+
+        pass
+
+    def transferred(self, resource, nbytes):
+        '''A response body of nbytes was received for resource'''
+
+        pass
+
+    def error(self, resource, status_code):
+        '''A response for resource had an error status_code'''
+
+        pass
+
+
+class Fanout(Instrumentation):
+    '''Forward everything to several hooks'''
+
+    def __init__(self, *hooks):
+        self.hooks = hooks
+
+    def timing(self, resource, phase, seconds):
+        for hooks in self.hooks:
+            hooks.timing(resource, phase, seconds)
+
+    def transferred(self, resource, nbytes):
+        for hooks in self.hooks:
+            hooks.transferred(resource, nbytes)
+
+    def error(self, resource, status_code):
+        for hooks in self.hooks:
+            hooks.error(resource, status_code)
+
+
+class Histogram(object):
+    '''
+    A fixed bucket histogram: ``counts[i]`` observations fell at or below
+    ``bounds[i]`` (and above the previous bound), the last count being those
+    above every bound.
+    '''
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        '''Add an observation'''
+
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        '''
+        Estimate the q quantile (0.5 for the median), interpolating within
+        the bucket it falls in
+        '''
+
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[idx - 1] if idx else 0.0
+                if idx < len(self.bounds):
+                    upper = self.bounds[idx]
+                else:
+                    upper = self.max
+                return min(lower + (upper - lower) * (rank - seen) / count,
+                           self.max)
+            seen += count
+        return self.max
+
+    def snapshot(self):
+        '''A json friendly copy'''
+
+        return {'bounds': list(self.bounds), 'counts': list(self.counts),
+                'count': self.count, 'sum': self.sum, 'max': self.max}
+
+
+class Collector(Instrumentation):
+    '''
+    Thread safe, dependency free hooks keeping a :class:`Histogram` per
+    (resource, phase), the bytes received per resource and the error
+    status codes per resource.
+    '''
+
+    def __init__(self):
+        self.histograms = {}
+        self.bytes = defaultdict(int)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def timing(self, resource, phase, seconds):
+        key = (resource, phase)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(
+                    PHASE_BUCKETS.get(phase, BUCKETS))
+            histogram.observe(seconds)
+
+    def transferred(self, resource, nbytes):
+        with self._lock:
+            self.bytes[resource] += nbytes
+
+    def error(self, resource, status_code):
+        with self._lock:
+            self.errors[(resource, status_code)] += 1
+
+    def histogram(self, resource, phase):
+        '''The histogram of a phase of resource, or None'''
+
+        return self.histograms.get((resource, phase))
+
+    def reset(self):
+        '''Forget everything collected'''
+
+        with self._lock:
+            self.histograms.clear()
+            self.bytes.clear()
+            self.errors.clear()
+
+    def snapshot(self):
+        '''Everything collected, as json friendly dicts'''
+
+        with self._lock:
+            timings = defaultdict(dict)
+            for (resource, phase), histogram in self.histograms.items():
+                timings[resource][phase] = histogram.snapshot()
+            errors = defaultdict(dict)
+            for (resource, status_code), count in self.errors.items():
+                errors[resource][str(status_code)] = count
+            return {'timings': dict(timings), 'bytes': dict(self.bytes),
+                    'errors': dict(errors)}
+
+    def report(self):
+        '''A text table of the median and 99th percentile of every phase'''
+
+        lines = ['%-16s %-10s %8s %10s %10s' % ('resource', 'phase', 'count',
+                                                'p50 ms', 'p99 ms')]
+        with self._lock:
+            for resource, phase in sorted(
+                    self.histograms,
+                    key=lambda x: (x[0], PHASES.index(x[1])
+                                   if x[1] in PHASES else len(PHASES))):
+                histogram = self.histograms[(resource, phase)]
+                lines.append('%-16s %-10s %8d %10.3f %10.3f' % (
+                    resource, phase, histogram.count,
+                    histogram.quantile(0.5) * 1000,
+                    histogram.quantile(0.99) * 1000))
+        return '\n'.join(lines)
+
+
+class PrometheusHooks(Instrumentation):
+    '''
+    Hooks feeding ``prometheus_client`` metrics: a
+    ``giantbomb_request_phase_seconds`` histogram labelled by resource and
+    phase, and the ``giantbomb_response_bytes_total`` and
+    ``giantbomb_errors_total`` counters.  Requires the prometheus_client
+    package.
+    '''
+
+    def __init__(self, registry=None, namespace='giantbomb'):
+        import prometheus_client
+        kwargs = {'namespace': namespace}
+        if registry is not None:
+            kwargs['registry'] = registry
+        self.seconds = prometheus_client.Histogram(
+            'request_phase_seconds', 'Time spent per request phase',
+            ['resource', 'phase'], **kwargs)
+        self.bytes = prometheus_client.Counter(
+            'response_bytes', 'Response bytes received', ['resource'],
+            **kwargs)
+        self.errors = prometheus_client.Counter(
+            'errors', 'Responses with an error status code',
+            ['resource', 'status_code'], **kwargs)
+
+    def timing(self, resource, phase, seconds):
+        self.seconds.labels(resource, phase).observe(seconds)
+
+    def transferred(self, resource, nbytes):
+        self.bytes.labels(resource).inc(nbytes)
+
+    def error(self, resource, status_code):
+        self.errors.labels(resource, str(status_code)).inc()
+
+
+class OpenTelemetryHooks(Instrumentation):
+    '''
+    Hooks recording OpenTelemetry metrics with ``meter`` (the ``giantbomb``
+    meter of the global provider by default): a
+    ``giantbomb.request.phase.duration`` histogram and the
+    ``giantbomb.response.size`` and ``giantbomb.errors`` counters, with
+    ``resource``, ``phase`` and ``status_code`` attributes.  Requires the
+    opentelemetry-api package.
+    '''
+
+    def __init__(self, meter=None):
+        if meter is None:
+            from opentelemetry import metrics
+            meter = metrics.get_meter('giantbomb')
+        self.seconds = meter.create_histogram(
+            'giantbomb.request.phase.duration', unit='s',
+            description='Time spent per request phase')
+        self.bytes = meter.create_counter(
+            'giantbomb.response.size', unit='By',
+            description='Response bytes received')
+        self.errors = meter.create_counter(
+            'giantbomb.errors',
+            description='Responses with an error status code')
+
+    def timing(self, resource, phase, seconds):
+        self.seconds.record(seconds, {'resource': resource, 'phase': phase})
+
+    def transferred(self, resource, nbytes):
+        self.bytes.add(nbytes, {'resource': resource})
+
+    def error(self, resource, status_code):
+        self.errors.add(1, {'resource': resource,
+                            'status_code': str(status_code)})
@@ -0,0 +1,409 @@
+'''
+A local, offline copy of the giantbomb data.
+
+:class:`Mirror` keeps objects of every ``Api.ITEMS`` resource in an indexed
+sqlite database and answers ``get_<resource>``, ``get_<resources>`` and
+``search`` calls the way :class:`giantbomb.Api` does, with the same
+classes, from disk instead of over the network.  Objects get in with
+``upsert`` (a Mirror can be the ``store`` of a :class:`giantbomb.sync.Sync`)
+or, when the mirror has an ``api`` and ``fallback`` is on, are fetched live
+the first time they are looked up and kept from then on.
+
+Objects are indexed on id and name, and the ids of their ``platforms``,
+``franchises`` and ``game`` go to an indexed link table, so that related
+objects are found without a scan::
+
+    mirror = Mirror('giantbomb.db')
+    Sync(gb, store=mirror).sync('games')
+    mirror.get_game(21373)
+    mirror.get_games(platforms=94, sort='name:asc')
+'''
+
+import json
+import sqlite3
+import threading
+import giantbomb
+from giantbomb import (Api, GiantBombError, OBJECT_NOT_FOUND, PAGE_SIZE,
+                       SINGULARS, SearchResult)
+from giantbomb.models import Model, raw
+from giantbomb.decoders import get_decoder
+from giantbomb.methods import compile_method, PARAM_TEMPLATE
+from giantbomb.sync import parse_filter
+
+
+# Relations whose ids are indexed, for lookups such as get_games(platforms=)
+# or get_user_reviews(game=): every argument of the generated methods that
+# is not a list parameter must be one of them
+RELATIONS = ('franchises', 'game', 'platforms')
+
+# Columns a listing can be sorted on
+SORTABLE = ('date_last_updated', 'id', 'name')
+
+SCHEMA = ('CREATE TABLE IF NOT EXISTS objects '
+          '(resource TEXT NOT NULL, id INTEGER NOT NULL, name TEXT, '
+          'date_last_updated TEXT, body TEXT NOT NULL, '
+          'PRIMARY KEY (resource, id))',
+          'CREATE INDEX IF NOT EXISTS objects_name '
+          'ON objects (resource, name COLLATE NOCASE)',
+          'CREATE TABLE IF NOT EXISTS links '
+          '(resource TEXT NOT NULL, id INTEGER NOT NULL, '
+          'relation TEXT NOT NULL, target INTEGER NOT NULL, '
+          'PRIMARY KEY (resource, id, relation, target))',
+          'CREATE INDEX IF NOT EXISTS links_target '
+          'ON links (relation, target, resource)')
+
+
+# Templates of the get_<resource> and get_<resources> methods of a Mirror
+ITEM_TEMPLATE = '''\
+def %(method)s(self, gbid, field_list=None):
+    return self.get_item(%(resource)r, gbid, field_list)
+'''
+
+LIST_TEMPLATE = '''\
+def %(method)s(self, %(signature)s):
+    params = {}
+%(params)s
+    return self.get_items(%(resource)r, **params)
+'''
+
+
+def item_resource(resource):
+    '''
+    The item resource ('game') of an item or list resource ('games').  The
+    list resources without an item resource ('types') are their own.
+    '''
+
+    if resource in Api.ITEMS:
+        return resource
+    if resource in SINGULARS:
+        return SINGULARS[resource]
+    if resource in Api.LIST_ITEMS:
+        return resource
+    raise ValueError('Unknown resource %r' % resource)
+
+
+def escape_like(value):
+    '''value quoted for a LIKE pattern using ESCAPE '\\' '''
+
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace(
+        '_', '\\_')
+
+
+def filter_sql(item, conditions):
+    '''
+    The SQL conditions (and their arguments) selecting the objects of the
+    item resource (None for any) matching a dict of filters: id, name
+    (substring) and the RELATIONS.  (None, None) when an id or relation
+    filter lists no id, which nothing matches.
+    '''
+
+    sql = []
+    args = []
+    for key, value in sorted(conditions.iteritems()):
+        values = [x for x in unicode(value).split('|') if x]
+        if not values and (key == 'id' or key in RELATIONS):
+            return None, None
+        if key == 'name':
+            sql.append("AND name LIKE ? ESCAPE '\\'")
+            args.append(u'%%%s%%' % escape_like(unicode(value)))
+        elif key == 'id':
+            sql.append('AND id IN (%s)' % ','.join('?' * len(values)))
+            args.extend(int(x) for x in values)
+        elif key in RELATIONS:
+            if item is None:
+                sql.append('AND id IN (SELECT id FROM links WHERE '
+                           'links.resource = objects.resource AND '
+                           'relation = ? AND target IN (%s))'
+                           % ','.join('?' * len(values)))
+                args.append(key)
+            else:
+                sql.append('AND id IN (SELECT id FROM links WHERE '
+                           'resource = ? AND relation = ? AND target IN '
+                           '(%s))' % ','.join('?' * len(values)))
+                args.extend([item, key])
+            args.extend(int(x) for x in values)
+        else:
+            raise ValueError('The mirror cannot filter on %r' % key)
+    return sql, args
+
+
+def related_ids(value):
+    '''The ids of a relation value: one nested object or a list of them'''
+
+    if isinstance(value, dict):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [x['id'] for x in value if isinstance(x, dict) and 'id' in x]
+
+
+def project(data, field_list):
+    '''Keep only the fields of a comma separated field_list'''
+
+    if not field_list:
+        return data
+    fields = field_list.split(',')
+    return dict((key, value) for key, value in data.iteritems()
+                if key in fields)
+
+
+class Mirror(object):
+    '''
+    A sqlite mirror at ``path`` (``':memory:'`` works too).  Lookups of
+    objects missing from the mirror go to ``api`` when ``fallback`` is
+    True, and raise the ``GiantBombError`` an unknown id would otherwise.
+    '''
+
+    def __init__(self, path, api=None, fallback=True, json_decoder=None):
+        self.path = path
+        self.api = api
+        self.fallback = fallback
+        self.loads = get_decoder(json_decoder)
+        self.live_lookups = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            for statement in SCHEMA:
+                self._db.execute(statement)
+
+    def close(self):
+        '''Close the database'''
+
+        self._db.close()
+
+    def __len__(self):
+        return self.count()
+
+    def count(self, resource=None):
+        '''Number of objects mirrored, of one resource or in total'''
+
+        with self._lock:
+            if resource is None:
+                row = self._db.execute('SELECT COUNT(*) FROM objects')
+            else:
+                row = self._db.execute('SELECT COUNT(*) FROM objects '
+                                       'WHERE resource = ?',
+                                       (item_resource(resource), ))
+            return row.fetchone()[0]
+
+    def upsert(self, resource, obj):
+        '''
+        Add or update one object (a model or a json dict) of resource,
+        either the item or the list resource name.  Fields missing from obj
+        keep their mirrored value, so a list entry does not wipe the extra
+        fields of a detail object.
+        '''
+
+        self.upsert_many(resource, [obj])
+
+    def upsert_many(self, resource, objs):
+        '''Upsert several objects of resource in one transaction'''
+
+        resource = item_resource(resource)
+        with self._lock:
+            with self._db:
+                for obj in objs:
+                    self._upsert(resource, obj)
+
+    def _upsert(self, resource, obj):
+        '''Store one object, the lock and a transaction being held'''
+
+        if isinstance(obj, Model):
+            data = raw(obj)
+        else:
+            data = dict((key, raw(value)) for key, value in obj.iteritems())
+        gbid = data['id']
+        row = self._db.execute('SELECT body FROM objects '
+                               'WHERE resource = ? AND id = ?',
+                               (resource, gbid)).fetchone()
+        if row is not None:
+            merged = self.loads(row[0])
+            merged.update(data)
+            data = merged
+        self._db.execute('INSERT OR REPLACE INTO objects '
+                         '(resource, id, name, date_last_updated, body) '
+                         'VALUES (?, ?, ?, ?, ?)',
+                         (resource, gbid, data.get('name'),
+                          data.get('date_last_updated'), json.dumps(data)))
+        for relation in RELATIONS:
+            if relation not in data:
+                continue
+            self._db.execute('DELETE FROM links WHERE resource = ? AND '
+                             'id = ? AND relation = ?',
+                             (resource, gbid, relation))
+            self._db.executemany('INSERT OR IGNORE INTO links '
+                                 '(resource, id, relation, target) '
+                                 'VALUES (?, ?, ?, ?)',
+                                 [(resource, gbid, relation, target)
+                                  for target in related_ids(data[relation])])
+
+    def remove(self, resource, gbid):
+        '''Drop an object from the mirror'''
+
+        resource = item_resource(resource)
+        with self._lock:
+            with self._db:
+                self._db.execute('DELETE FROM objects '
+                                 'WHERE resource = ? AND id = ?',
+                                 (resource, gbid))
+                self._db.execute('DELETE FROM links '
+                                 'WHERE resource = ? AND id = ?',
+                                 (resource, gbid))
+
+    def iter_objects(self, resources=None):
+        '''
+        The (item resource, json dict) of every mirrored object, or only of
+        those of the given item resources
+        '''
+
+        sql = 'SELECT resource, body FROM objects'
+        args = []
+        if resources:
+            args = [item_resource(x) for x in resources]
+            sql += ' WHERE resource IN (%s)' % ','.join('?' * len(args))
+        with self._lock:
+            rows = self._db.execute(sql + ' ORDER BY resource, id',
+                                    args).fetchall()
+        for resource, body in rows:
+            yield resource, self.loads(body)
+
+    def get_item(self, resource, gbid, field_list=None):
+        '''
+        The object of an item resource ('game') with the given id, as
+        Api.get_item would return it
+        '''
+
+        if not isinstance(gbid, int):
+            gbid = gbid.id
+        uri, cls = Api.ITEMS[resource]
+        with self._lock:
+            row = self._db.execute('SELECT body FROM objects '
+                                   'WHERE resource = ? AND id = ?',
+                                   (resource, gbid)).fetchone()
+        if row is not None:
+            data = project(self.loads(row[0]), field_list)
+            return getattr(giantbomb, cls)(data)
+
+        if self.api is None or not self.fallback:
+            raise GiantBombError('Error code %s: Object Not Found' %
+                                 OBJECT_NOT_FOUND, OBJECT_NOT_FOUND)
+        self.live_lookups += 1
+        obj = self.api.get_item(uri, cls, gbid)
+        self.upsert(resource, obj)
+        if field_list:
+            obj = getattr(giantbomb, cls)(project(raw(obj), field_list))
+        return obj
+
+    def get_items(self, resource, field_list=None, limit=PAGE_SIZE,
+                  offset=0, sort=None, filter=None, **relations):
+        '''
+        A page of the objects of a list resource ('games'), as
+        Api.get_items would return it.  ``filter`` (a dict or
+        ``'name:foo,id:1|2'``) may use id, name (substring) and the
+        RELATIONS; ``sort`` is ``'<field>:asc'`` or ``':desc'`` on one of
+        SORTABLE.  Relations can also be passed directly
+        (``platforms=94``).  Listings are only ever answered locally.
+        '''
+
+        item = item_resource(resource)
+        cls = getattr(giantbomb, Api.LIST_ITEMS[resource][2])
+        conditions = parse_filter(filter)
+        conditions.update(relations)
+
+        sql = ['SELECT body FROM objects WHERE resource = ?']
+        args = [item]
+        where, where_args = filter_sql(item, conditions)
+        if where is None:
+            return []
+        sql.extend(where)
+        args.extend(where_args)
+
+        column, direction = 'id', 'ASC'
+        if sort:
+            column, _, direction = sort.partition(':')
+            direction = direction.upper() or 'ASC'
+            if column not in SORTABLE or direction not in ('ASC', 'DESC'):
+                raise ValueError('The mirror cannot sort on %r' % sort)
+        sql.append('ORDER BY %s %s, id LIMIT ? OFFSET ?' % (column,
+                                                           direction))
+        args.extend([int(limit), int(offset)])
+
+        with self._lock:
+            rows = self._db.execute(' '.join(sql), args).fetchall()
+        return [cls(project(self.loads(row[0]), field_list))
+                for row in rows]
+
+    def search(self, query, offset=0, resources=None, gbfilter=None,
+               limit=None):
+        '''
+        Search the names of the mirrored objects, like Api.search.
+        ``resources`` is a comma separated list of item resources and
+        ``gbfilter`` filters like the ``filter`` of get_items.  Exact
+        matches come first, then prefixes, then any other match.  With no
+        local match the search goes to the live api when fallback is on.
+        '''
+
+        if limit is None:
+            limit = PAGE_SIZE
+        pattern = escape_like(query)
+        sql = ["SELECT resource, body FROM objects WHERE name LIKE ? "
+               "ESCAPE '\\'"]
+        args = [u'%%%s%%' % pattern]
+        if resources:
+            names = resources.split(',')
+            sql.append('AND resource IN (%s)' % ','.join('?' * len(names)))
+            args.extend(names)
+        where, where_args = filter_sql(None, parse_filter(gbfilter))
+        if where is None:
+            return []
+        sql.extend(where)
+        args.extend(where_args)
+        sql.append("ORDER BY (name = ? COLLATE NOCASE) DESC, "
+                   "(name LIKE ? ESCAPE '\\') DESC, name COLLATE NOCASE, "
+                   "resource, id LIMIT ? OFFSET ?")
+        args.extend([query, u'%s%%' % pattern, int(limit), int(offset)])
+
+        with self._lock:
+            rows = self._db.execute(' '.join(sql), args).fetchall()
+        if not rows and not offset and self.api is not None and \
+                self.fallback:
+            self.live_lookups += 1
+            return self.api.search(query, offset, resources, gbfilter,
+                                   limit)
+        results = []
+        for resource, body in rows:
+            data = self.loads(body)
+            data['resource_type'] = resource
+            results.append(SearchResult(data))
+        return results
+
+
+def make_item_method(resource):
+    '''The get_<resource> method of a Mirror for an item resource'''
+
+    method = 'get_%s' % resource
+    return compile_method(
+        method, ITEM_TEMPLATE % {'method': method, 'resource': resource},
+        'Get the mirrored %s with the given id, like Api.%s.'
+        % (resource, method), __name__)
+
+
+def make_list_method(resource, valid_args):
+    '''The get_<resources> method of a Mirror for a list resource'''
+
+    method = 'get_%s' % resource
+    source = LIST_TEMPLATE % {
+        'method': method,
+        'signature': ', '.join('%s=None' % arg for arg in valid_args),
+        'params': '\n'.join(PARAM_TEMPLATE % {'arg': arg}
+                            for arg in valid_args) or '    pass',
+        'resource': resource}
+    return compile_method(method, source,
+                          'Get a page of the mirrored %s, like Api.%s.'
+                          % (resource, method), __name__)
+
+
+for NAME in Api.ITEMS:
+    setattr(Mirror, 'get_' + NAME, make_item_method(NAME))
+for NAME, VALUE in Api.LIST_ITEMS.iteritems():
+    setattr(Mirror, 'get_' + NAME, make_list_method(NAME, VALUE[1]))
@@ -0,0 +1,312 @@
+'''
+Compact resource classes.
+
+The classes returned by :class:`giantbomb.Api` (``Game``, ``Games``,
+``Platform``...) are generated by :func:`make_model` with a ``__slots__``
+entry for every field the resource is known to return, so an object costs a
+fixed handful of pointers instead of a per-instance ``__dict__``.  Keys that
+are not known fields land in a small overflow mapping and are still readable
+as attributes.
+
+Nested dicts and lists of dicts (a game's ``platforms``, an ``image``...)
+are stored as-is and only turned into :class:`Reference` objects the first
+time the attribute is read.  References also answer ``ref['name']`` and
+``ref.get('name')`` so code written against the plain dicts keeps working.
+Classes bound to a :class:`giantbomb.identity.IdentityMap` (``_identity``)
+resolve their nested objects through it instead.
+'''
+
+import threading
+
+
+# Fields every resource returns
+COMMON_FIELDS = ('aliases', 'api_detail_url', 'date_added',
+                 'date_last_updated', 'deck', 'description', 'guid', 'id',
+                 'image', 'name', 'site_detail_url')
+
+# Known extra fields, by item resource
+FIELDS = {
+    'character': ('birthday', 'concepts', 'enemies', 'first_appeared_in_game',
+                  'franchises', 'friends', 'games', 'gender', 'last_name',
+                  'locations', 'objects', 'people', 'real_name'),
+    'company': ('abbreviation', 'characters', 'concepts', 'date_founded',
+                'developed_games', 'developer_releases',
+                'distributor_releases', 'location_address', 'location_city',
+                'location_country', 'location_state', 'locations', 'objects',
+                'people', 'phone', 'published_games', 'publisher_releases',
+                'website'),
+    'franchise': ('characters', 'concepts', 'games', 'locations', 'objects',
+                  'people'),
+    'game': ('characters', 'concepts', 'developers', 'expected_release_day',
+             'expected_release_month', 'expected_release_quarter',
+             'expected_release_year', 'first_appearance_characters',
+             'first_appearance_concepts', 'first_appearance_locations',
+             'first_appearance_objects', 'first_appearance_people',
+             'franchises', 'genres', 'images', 'killed_characters',
+             'locations', 'number_of_user_reviews', 'objects',
+             'original_game_rating', 'original_release_date', 'people',
+             'platforms', 'publishers', 'releases', 'reviews',
+             'similar_games', 'themes', 'videos'),
+    'game_rating': ('rating_board', ),
+    'person': ('birth_date', 'characters', 'concepts', 'country',
+               'death_date', 'first_credited_game', 'franchises', 'games',
+               'gender', 'hometown', 'last_name', 'locations', 'objects',
+               'people'),
+    'platform': ('abbreviation', 'company', 'install_base',
+                 'online_support', 'original_price', 'release_date'),
+    'rating_board': ('region', ),
+    'release': ('developers', 'expected_release_day',
+                'expected_release_month', 'expected_release_quarter',
+                'expected_release_year', 'game', 'game_rating', 'images',
+                'maximum_players', 'minimum_players', 'multiplayer_features',
+                'platform', 'product_code_type', 'product_code_value',
+                'publishers', 'region', 'release_date', 'resolutions',
+                'singleplayer_features', 'sound_systems',
+                'widescreen_support'),
+    'review': ('dlc_name', 'game', 'publish_date', 'release', 'reviewer',
+               'score'),
+    'user_review': ('game', 'reviewer', 'score'),
+    'video': ('hd_url', 'high_url', 'length_seconds', 'low_url',
+              'publish_date', 'url', 'user', 'video_type', 'youtube_id'),
+}
+
+
+def model_fields(resource):
+    '''The known fields of an item resource (e.g. 'game')'''
+
+    fields = set(COMMON_FIELDS)
+    fields.update(FIELDS.get(resource, ()))
+    return tuple(sorted(fields))
+
+
+def materialize(value, identity=None):
+    '''
+    Turn a raw nested json value into objects: dicts become References (or
+    the objects identity resolves them to) and lists become ResourceLists,
+    anything else is returned unchanged
+    '''
+
+    kind = type(value)
+    if kind is dict:
+        if identity is not None:
+            return identity.resolve(value)
+        return Reference(value)
+    if kind is list:
+        return ResourceList(materialize(item, identity) for item in value)
+    return value
+
+
+def raw(value):
+    '''
+    The reverse of materialize: turn objects (and lists of them) back into
+    plain json values
+    '''
+
+    if isinstance(value, Model):
+        return dict((key, raw(item))
+                    for key, item in value.__getstate__().iteritems())
+    if isinstance(value, list):
+        return [raw(item) for item in value]
+    return value
+
+
+def load_once(obj, flag, lock, load):
+    '''
+    Call load(obj) unless the slot flag of obj tells it already succeeded.
+    Other threads reading obj meanwhile wait for the load to finish instead
+    of finding the object half filled, and a failed load is tried again by
+    the next read.  lock guards the creation of the per-object lock kept in
+    the slot until then.  Returns whether this call did the load.
+    '''
+
+    with lock:
+        try:
+            state = object.__getattribute__(obj, flag)
+        except AttributeError:
+            state = None
+        if state is True:
+            return False
+        if state is None:
+            state = threading.RLock()
+            object.__setattr__(obj, flag, state)
+    with state:
+        if object.__getattribute__(obj, flag) is True:
+            return False
+        load(obj)
+        object.__setattr__(obj, flag, True)
+    return True
+
+
+class ResourceList(list):
+    '''A list whose nested dicts have already been materialized'''
+
+    __slots__ = ()
+
+
+class LazyField(object):
+    '''
+    Descriptor wrapping the slot of a field: the raw json value is stored
+    in the slot and materialized the first time it is read
+    '''
+
+    __slots__ = ('member', )
+
+    def __init__(self, member):
+        self.member = member
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        value = self.member.__get__(obj, cls)
+        kind = type(value)
+        if kind is dict or kind is list:
+            value = materialize(value, type(obj)._identity)
+            self.member.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        self.member.__set__(obj, value)
+
+    def __delete__(self, obj):
+        self.member.__delete__(obj)
+
+
+class Model(object):
+    '''
+    Base class of the generated resource classes.  ``FIELDS`` lists the
+    slotted fields; anything else is kept in the ``_extra`` overflow dict.
+    '''
+
+    __slots__ = ('_extra', '__weakref__')
+    FIELDS = frozenset()
+    _members = {}
+    _setters = {}
+    _identity = None
+
+    def __init__(self, json=None, **kwargs):
+        object.__setattr__(self, '_extra', None)
+        if json:
+            self._update(json)
+        if kwargs:
+            self._update(kwargs)
+
+    def _update(self, data):
+        '''Store the values of a json dict'''
+
+        setter = self._setters.get
+        extra = self._extra
+        for key, value in data.iteritems():
+            set_value = setter(key)
+            if set_value is not None:
+                set_value(self, value)
+            else:
+                if extra is None:
+                    extra = {}
+                    object.__setattr__(self, '_extra', extra)
+                extra[key] = value
+
+    def __getattr__(self, name):
+        '''Look up keys that are not known fields'''
+
+        if name != '_extra':
+            extra = self._extra
+            if extra is not None and name in extra:
+                value = extra[name]
+                kind = type(value)
+                if kind is dict or kind is list:
+                    value = extra[name] = materialize(value, self._identity)
+                return value
+        raise AttributeError("'%s' object has no attribute '%s'" %
+                             (type(self).__name__, name))
+
+    def __setattr__(self, name, value):
+        try:
+            object.__setattr__(self, name, value)
+        except AttributeError:
+            if self._extra is None:
+                object.__setattr__(self, '_extra', {})
+            self._extra[name] = value
+
+    def __getstate__(self):
+        state = {}
+        for name in self._members:
+            try:
+                state[name] = self._members[name].__get__(self)
+            except AttributeError:
+                pass
+        if self._extra:
+            state.update(self._extra)
+        return state
+
+    def __setstate__(self, state):
+        object.__setattr__(self, '_extra', None)
+        self._update(state)
+
+    def __reduce__(self):
+        # pickle the objects of generated subclasses (bound to an identity
+        # map, tracked...) as the plain model class
+        return (self._base, (), self.__getstate__())
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        # only the fields held, without loading or completing the object
+        member = self._members.get(key)
+        if member is not None:
+            try:
+                member.__get__(self)
+            except AttributeError:
+                return False
+            return True
+        return self._extra is not None and key in self._extra
+
+    def get(self, key, default=None):
+        '''
+        dict-like access, for code written against the raw json.  Like
+        ``in``, it only looks at the fields held, and never loads a lazy
+        object (the projected objects of :mod:`giantbomb.projection` are
+        completed when a field of their resource is missing, though).
+        '''
+
+        if key in self:
+            return getattr(self, key)
+        return default
+
+    def keys(self):
+        '''The names of the fields that are set'''
+
+        return self.__getstate__().keys()
+
+    def __repr__(self):
+        # from the state, so that printing an object neither loads nor
+        # profiles it
+        state = self.__getstate__()
+        return unicode("<%s: %s>" % (state.get('id'),
+                                     state.get('name'))).encode('utf-8')
+
+
+def make_model(name, fields, module=None, doc=None):
+    '''Generate a slotted Model subclass for the given fields'''
+
+    namespace = {'__slots__': tuple(fields), 'FIELDS': frozenset(fields),
+                 '__doc__': doc}
+    if module is not None:
+        namespace['__module__'] = module
+    cls = type(name, (Model, ), namespace)
+    members = {}
+    for field in fields:
+        members[field] = cls.__dict__[field]
+        setattr(cls, field, LazyField(members[field]))
+    cls._members = members
+    cls._base = cls
+    cls._setters = dict((field, member.__set__)
+                        for field, member in members.iteritems())
+    return cls
+
+
+Reference = make_model('Reference', COMMON_FIELDS, __name__,
+                       '''A nested object (e.g. one of a game's platforms)''')
@@ -0,0 +1,137 @@
+'''
+A small fixed size worker pool and the futures it hands out.
+'''
+
+import threading
+import Queue
+
+
+class Future(object):
+    '''The eventual result (or exception) of a call run by a WorkerPool'''
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        '''Whether the call has finished'''
+
+        return self._event.is_set()
+
+    def _finish(self):
+        '''Wake up the waiters and run the callbacks'''
+
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def set_result(self, result):
+        '''Resolve the future with a value'''
+
+        self._result = result
+        self._finish()
+
+    def set_exception(self, exception):
+        '''Resolve the future with an error'''
+
+        self._exception = exception
+        self._finish()
+
+    def add_done_callback(self, callback):
+        '''Call callback(future) once the future is resolved'''
+
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def exception(self, timeout=None):
+        '''Wait for the call and return the exception it raised, if any'''
+
+        if not self._event.wait(timeout):
+            raise RuntimeError('Timed out waiting for the result')
+        return self._exception
+
+    def result(self, timeout=None):
+        '''Wait for the call and return its result, or raise its error'''
+
+        exception = self.exception(timeout)
+        if exception is not None:
+            raise exception
+        return self._result
+
+
+class WorkerPool(object):
+    '''
+    Run calls on at most ``size`` worker threads.  Threads are started on
+    demand and live until ``shutdown`` is called.
+    '''
+
+    def __init__(self, size=8):
+        self.size = size
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._queued = 0
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def _work(self):
+        '''Worker loop'''
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, func, args, kwargs = item
+            with self._lock:
+                self._queued -= 1
+                self._busy += 1
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as exc:
+                future.set_exception(exc)
+            with self._lock:
+                self._busy -= 1
+
+    def submit(self, func, *args, **kwargs):
+        '''Schedule func(*args, **kwargs) and return its Future'''
+
+        future = Future()
+        with self._lock:
+            self._queued += 1
+            idle = len(self._threads) - self._busy
+            if idle < self._queued and len(self._threads) < self.size:
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                self._threads.append(thread)
+                thread.start()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def map(self, func, iterable):
+        '''Run func on each item, returning the futures in order'''
+
+        return [self.submit(func, item) for item in iterable]
+
+    def shutdown(self, wait=True):
+        '''Stop the workers once the queued calls are done'''
+
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+def gather(futures, timeout=None):
+    '''Wait for every future, returning their results in order'''
+
+    return [future.result(timeout) for future in futures]
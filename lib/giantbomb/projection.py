@@ -0,0 +1,116 @@
+'''
+Automatic ``field_list`` projection.
+
+With ``Api(auto_field_list=True)`` the objects returned by the api record
+which attributes their callers read, per requested resource ('game',
+'games'...).  Once a resource has been requested ``warmup`` times, later
+requests for it that do not pass their own ``field_list`` only ask for the
+fields read so far, which shrinks the responses (no more ``description``
+html nobody looks at).  Reading a field that was left out of such a
+response, as an attribute or with ``obj.get(field)`` / ``field in obj``,
+transparently fetches the full object once and adds the field to the
+profile.
+'''
+
+import threading
+from collections import defaultdict
+from giantbomb.models import Model, load_once
+
+
+# Attributes of the models themselves, never recorded as fields
+MODEL_ATTRS = frozenset(dir(Model))
+
+
+class FieldProfiler(object):
+    '''
+    Records field accesses per resource and derives the field_list to
+    request.  ``always`` fields are requested in any case.
+    '''
+
+    def __init__(self, warmup=3, always=('id', )):
+        self.warmup = warmup
+        self.always = frozenset(always)
+        self.fields = defaultdict(set)
+        self.requests = defaultdict(int)
+        self.lazy_fetches = 0
+        self._classes = {}
+        self._lock = threading.Lock()
+
+    def field_list(self, resource):
+        '''
+        Count a request for resource and return the field_list it should
+        use, or None while the resource is still warming up
+        '''
+
+        with self._lock:
+            self.requests[resource] += 1
+            if self.requests[resource] <= self.warmup:
+                return None
+            fields = self.fields[resource] | self.always
+        return ','.join(sorted(fields))
+
+    def tracked(self, cls, resource, complete=None):
+        '''
+        A subclass of the model cls recording attribute reads into the
+        profile of resource.  When ``complete`` is given the objects were
+        fetched with a projected field_list, and complete(obj) is called to
+        fetch the rest of the object the first time a missing field is read.
+        '''
+
+        # complete is bound to one Api, whose objects must not be filled
+        # from another's server
+        key = (cls, resource, complete)
+        with self._lock:
+            tracked_cls = self._classes.get(key)
+            if tracked_cls is None:
+                tracked_cls = self._make_tracked(cls, self.fields[resource],
+                                                 complete)
+                self._classes[key] = tracked_cls
+        return tracked_cls
+
+    def _make_tracked(self, cls, seen, complete):
+        '''Build the recording subclass of cls'''
+
+        base_getattribute = cls.__getattribute__
+        base_contains = cls.__contains__
+        profiler = self
+
+        def complete_once(obj):
+            if load_once(obj, '_completed', profiler._lock, complete):
+                with profiler._lock:
+                    profiler.lazy_fetches += 1
+
+        def __getattribute__(obj, name):
+            if name[0] != '_' and name not in MODEL_ATTRS:
+                seen.add(name)
+            return base_getattribute(obj, name)
+
+        def __getattr__(obj, name):
+            if complete is not None and name[0] != '_' and \
+                    name not in MODEL_ATTRS:
+                complete_once(obj)
+                try:
+                    return base_getattribute(obj, name)
+                except AttributeError:
+                    pass
+            return Model.__getattr__(obj, name)
+
+        def __contains__(obj, key):
+            # ``in`` and get() record the fields of the resource too, and
+            # complete the object when one was left out of its projection
+            found = base_contains(obj, key)
+            if isinstance(key, basestring) and key[:1] != '_' and \
+                    key not in MODEL_ATTRS and (found or key in cls.FIELDS):
+                seen.add(key)
+                if complete is not None and not found:
+                    complete_once(obj)
+                    found = base_contains(obj, key)
+            return found
+
+        namespace = {'__slots__': ('_completed', ),
+                     '__module__': cls.__module__,
+                     '__doc__': cls.__doc__,
+                     '__getattribute__': __getattribute__,
+                     '__getattr__': __getattr__,
+                     '__contains__': __contains__}
+        return type(cls.__name__, (cls, ), namespace)
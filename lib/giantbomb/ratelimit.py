@@ -0,0 +1,204 @@
+'''
+Client side rate limiting for :class:`giantbomb.Api`.
+
+giantbomb.com enforces a request quota per api key and resource.  A
+:class:`RateLimiter` keeps a token bucket per resource path and makes callers
+wait for a token before a request goes out, so that many threads (or, with a
+:class:`FileBackend`, many processes) sharing a key get a steady request rate
+instead of bursts followed by lockouts.  When the server signals throttling
+anyway the rate of that resource is halved, then slowly raised again as
+requests succeed.
+'''
+
+import os
+import json
+import time
+import threading
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Documented quota: 200 requests per resource per hour
+DEFAULT_RATE = 200.0 / (60 * 60)
+DEFAULT_BURST = 200
+
+# "Rate limit exceeded" api status code and throttling http status codes
+THROTTLE_STATUS_CODES = (107, )
+THROTTLE_HTTP_CODES = (420, 429)
+
+
+class MemoryBackend(object):
+    '''Bucket state shared by the threads of one process'''
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, func):
+        '''
+        Atomically replace the state of key by func(state)[0] and return
+        func(state)[1].  state is None for an unknown key.
+        '''
+
+        with self._lock:
+            state, result = func(self._states.get(key))
+            self._states[key] = state
+        return result
+
+
+class FileBackend(object):
+    '''
+    Bucket state kept in a json file at ``path`` and guarded by an exclusive
+    ``flock``, shared by every process (and thread) using the same path.
+    '''
+
+    def __init__(self, path):
+        if fcntl is None:
+            raise Exception("FileBackend requires fcntl (a POSIX system)")
+        self.path = path
+
+    def update(self, key, func):
+        fobj = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT), 'r+')
+        try:
+            fcntl.flock(fobj, fcntl.LOCK_EX)
+            data = fobj.read()
+            states = json.loads(data) if data else {}
+            state, result = func(states.get(key))
+            states[key] = state
+            fobj.seek(0)
+            fobj.truncate()
+            json.dump(states, fobj)
+            fobj.flush()
+        finally:
+            fobj.close()
+        return result
+
+
+class RateLimiter(object):
+    '''
+    Token bucket limiter, one bucket per resource (or a single shared one
+    with ``per_resource=False``).
+
+    Each bucket refills at ``rate`` tokens per second up to ``burst``.  A
+    request that finds no token reserves one anyway and waits until it is
+    due, so concurrent callers are spread out evenly.  ``throttled`` halves
+    the rate of a bucket (never below ``min_rate``) and ``succeeded`` adds
+    back ``recovery`` times the configured rate, up to the configured rate.
+    '''
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 min_rate=None, recovery=0.05, per_resource=True,
+                 backend=None):
+        self.rate = float(rate)
+        self.burst = burst
+        if min_rate is None:
+            min_rate = self.rate / 64
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.per_resource = per_resource
+        if backend is None:
+            backend = MemoryBackend()
+        self.backend = backend
+        self.waited = 0.0
+        self.throttle_count = 0
+
+    def _key(self, resource):
+        '''The bucket used for resource'''
+
+        if self.per_resource:
+            return resource or ''
+        return ''
+
+    def _refill(self, state, now):
+        '''A bucket state with the tokens earned since its last update'''
+
+        if state is None:
+            return {'tokens': float(self.burst), 'last': now,
+                    'rate': self.rate}
+        elapsed = max(now - state['last'], 0)
+        state['tokens'] = min(float(self.burst),
+                              state['tokens'] + elapsed * state['rate'])
+        state['last'] = now
+        return state
+
+    def reserve(self, resource=None):
+        '''Take a token and return how long to wait before using it'''
+
+        def take(state):
+            '''Remove one token'''
+
+            state = self._refill(state, time.time())
+            state['tokens'] -= 1
+            if state['tokens'] >= 0:
+                return state, 0.0
+            return state, -state['tokens'] / state['rate']
+
+        return self.backend.update(self._key(resource), take)
+
+    def acquire(self, resource=None):
+        '''Block until a request for resource may be sent'''
+
+        wait = self.reserve(resource)
+        if wait > 0:
+            self.waited += wait
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self, resource=None):
+        '''Take a token for resource if one is available, without waiting'''
+
+        def take(state):
+            '''Remove one token, if there is a whole one'''
+
+            state = self._refill(state, time.time())
+            if state['tokens'] < 1:
+                return state, False
+            state['tokens'] -= 1
+            return state, True
+
+        return self.backend.update(self._key(resource), take)
+
+    def throttled(self, resource=None, retry_after=None):
+        '''
+        The server refused a request: slow the bucket down and, when the
+        server said how long to back off, empty it for that long
+        '''
+
+        def slow_down(state):
+            '''Halve the rate'''
+
+            state = self._refill(state, time.time())
+            state['rate'] = max(self.min_rate, state['rate'] / 2)
+            state['tokens'] = min(state['tokens'], 0.0)
+            if retry_after:
+                state['tokens'] -= retry_after * state['rate']
+            return state, None
+
+        self.throttle_count += 1
+        self.backend.update(self._key(resource), slow_down)
+
+    def succeeded(self, resource=None):
+        '''A request went through: speed a slowed down bucket back up'''
+
+        def speed_up(state):
+            '''Additive increase of the rate'''
+
+            state = self._refill(state, time.time())
+            state['rate'] = min(self.rate,
+                                state['rate'] + self.rate * self.recovery)
+            return state, None
+
+        self.backend.update(self._key(resource), speed_up)
+
+    def current_rate(self, resource=None):
+        '''The rate currently applied to resource'''
+
+        def read(state):
+            '''Leave the state alone'''
+
+            state = self._refill(state, time.time())
+            return state, state['rate']
+
+        return self.backend.update(self._key(resource), read)
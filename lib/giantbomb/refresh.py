@@ -0,0 +1,110 @@
+'''
+Stale-while-revalidate for the cache of :class:`giantbomb.Api`.
+
+With ``Api(cache=..., stale_while_revalidate=Refresher())`` a request whose
+cached response has expired less than ``max_stale`` seconds ago is answered
+from that response at once, and the entry is revalidated by a background
+worker, so that the next request finds it fresh.  Responses older than
+that are revalidated before answering, as without a refresher.
+
+Refreshes of the same url are deduplicated, and they are paced by a token
+bucket: a refresh finding no token is skipped, the next request of that
+url will schedule it again.
+'''
+
+import time
+import threading
+from giantbomb.pool import WorkerPool
+from giantbomb.ratelimit import RateLimiter
+
+
+class Refresher(object):
+    '''
+    Background refreshes for at most ``workers`` urls at a time and
+    ``rate`` per second (in bursts of ``burst``).  The counters tell how
+    many stale responses were ``served``, how many refreshes were
+    ``scheduled``, ``deduplicated`` with one already pending and
+    ``dropped`` by the rate limit, and how many of them ``failed``.
+    '''
+
+    def __init__(self, max_stale=300, workers=4, rate=10.0, burst=20):
+        self.max_stale = max_stale
+        self.workers = workers
+        self.limiter = RateLimiter(rate=rate, burst=burst,
+                                   per_resource=False)
+        self.served = 0
+        self.scheduled = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.failed = 0
+        self._pool = None
+        self._pending = set()
+        self._idle = threading.Condition(threading.Lock())
+
+    def usable(self, entry, now):
+        '''Whether an expired entry may still be served'''
+
+        return now - entry.expires <= self.max_stale
+
+    def serve(self, key, func, *args):
+        '''
+        Schedule func(*args), the refresh of key, unless one is pending or
+        the rate limit is reached.  Returns whether it was scheduled.
+        '''
+
+        with self._idle:
+            self.served += 1
+            if key in self._pending:
+                self.deduplicated += 1
+                return False
+            if not self.limiter.try_acquire():
+                self.dropped += 1
+                return False
+            self._pending.add(key)
+            self.scheduled += 1
+            if self._pool is None:
+                self._pool = WorkerPool(self.workers)
+            pool = self._pool
+        pool.submit(self._refresh, key, func, args)
+        return True
+
+    def _refresh(self, key, func, args):
+        '''Run a refresh, its errors only being counted'''
+
+        try:
+            func(*args)
+        except Exception:
+            with self._idle:
+                self.failed += 1
+        finally:
+            with self._idle:
+                self._pending.discard(key)
+                if not self._pending:
+                    self._idle.notify_all()
+
+    def wait(self, timeout=None):
+        '''
+        Wait until no refresh is pending (at most timeout seconds),
+        returning whether that is the case
+        '''
+
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                self._idle.wait(remaining)
+            return not self._pending
+
+    def close(self):
+        '''Stop the workers once the pending refreshes are done'''
+
+        with self._idle:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
@@ -0,0 +1,196 @@
+'''
+Record and replay of http responses, cassette style.
+
+A :class:`Cassette` is a json file of recorded responses keyed by
+:func:`giantbomb.cache.normalize_url`, so the api key never ends up in it
+and the order of the query parameters does not matter.
+:class:`CassetteTransport` plugs into ``Api(transport=...)`` and either
+replays the cassette, records into it, or both::
+
+    transport = CassetteTransport('tests/cassettes/sanity.json', mode='once')
+    gb = giantbomb.Api(key, transport=transport)
+    ...
+    transport.save()
+
+The same cassette can be served over http by
+:class:`giantbomb.standin.Server` for benchmarks that need real sockets.
+'''
+
+import os
+import json
+import httplib
+import urllib
+import urllib2
+import threading
+from cStringIO import StringIO
+from giantbomb.cache import normalize_url
+from giantbomb.transport import Transport, UrllibTransport
+
+
+# Replay only, a request that was not recorded is an error
+REPLAY = 'replay'
+# Always go to the network, recording every response
+RECORD = 'record'
+# Replay what was recorded, record what was not
+ONCE = 'once'
+
+MODES = (REPLAY, RECORD, ONCE)
+
+# Response headers worth keeping
+KEPT_HEADERS = ('content-type', 'etag', 'last-modified', 'retry-after')
+
+
+class CassetteMiss(urllib2.URLError):
+    '''A request with no recorded response in replay mode'''
+
+
+def make_headers(headers):
+    '''An httplib message holding the (name, value) pairs of headers'''
+
+    text = ''.join('%s: %s\r\n' % (name, value) for name, value in headers)
+    return httplib.HTTPMessage(StringIO(text + '\r\n'))
+
+
+class Cassette(object):
+    '''
+    Recorded responses, by normalized url.  A url requested several times
+    may have several responses ("episodes"), which are replayed in order;
+    the last one is repeated once they have all been played.
+    '''
+
+    def __init__(self, path=None):
+        self.path = path
+        self.responses = {}
+        self.dirty = False
+        self._played = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.responses)
+
+    def __contains__(self, url):
+        return normalize_url(url) in self.responses
+
+    def load(self, path):
+        '''Read the responses recorded in path'''
+
+        with open(path) as fobj:
+            data = json.load(fobj)
+        with self._lock:
+            self.responses = data['responses']
+            self._played = {}
+            self.dirty = False
+
+    def save(self, path=None):
+        '''Write the cassette (to its own path by default)'''
+
+        path = path or self.path
+        with self._lock:
+            data = {'version': 1, 'responses': self.responses}
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w') as fobj:
+                json.dump(data, fobj, indent=1, sort_keys=True)
+            os.rename(tmp_path, path)
+            self.dirty = False
+
+    def record(self, url, status, headers, body):
+        '''Add a response for url'''
+
+        episode = {'status': status, 'body': body.decode('utf-8'),
+                   'headers': [[name, value] for name, value in headers
+                               if name.lower() in KEPT_HEADERS]}
+        with self._lock:
+            self.responses.setdefault(normalize_url(url), []).append(episode)
+            self.dirty = True
+
+    def play(self, url):
+        '''The next (status, headers, body) recorded for url, or None'''
+
+        key = normalize_url(url)
+        with self._lock:
+            episodes = self.responses.get(key)
+            if not episodes:
+                return None
+            idx = self._played.get(key, 0)
+            self._played[key] = idx + 1
+            episode = episodes[min(idx, len(episodes) - 1)]
+        return (episode['status'], episode['headers'],
+                episode['body'].encode('utf-8'))
+
+    def rewind(self):
+        '''Replay every url from its first episode again'''
+
+        with self._lock:
+            self._played = {}
+
+
+class CassetteTransport(Transport):
+    '''
+    A transport replaying and/or recording a :class:`Cassette` (or the
+    path of one) according to ``mode``: REPLAY, RECORD or ONCE.  Requests
+    that have to go to the network use ``transport``, a
+    :class:`giantbomb.transport.UrllibTransport` by default.
+    '''
+
+    def __init__(self, cassette, mode=REPLAY, transport=None):
+        if mode not in MODES:
+            raise ValueError('Unknown cassette mode %r' % mode)
+        if not isinstance(cassette, Cassette):
+            cassette = Cassette(cassette)
+        if transport is None and mode != REPLAY:
+            transport = UrllibTransport()
+        self.cassette = cassette
+        self.mode = mode
+        self.transport = transport
+        self.played = 0
+        self.recorded = 0
+
+    def open(self, url, headers=None):
+        if self.mode != RECORD:
+            episode = self.cassette.play(url)
+            if episode is not None:
+                self.played += 1
+                return self._response(url, *episode)
+            if self.mode == REPLAY:
+                raise CassetteMiss('No recorded response for %s' %
+                                   normalize_url(url))
+
+        try:
+            resp = self.transport.open(url, headers)
+        except urllib2.HTTPError as exc:
+            body = exc.read()
+            self.cassette.record(url, exc.code, exc.headers.items(), body)
+            self.recorded += 1
+            raise urllib2.HTTPError(url, exc.code, exc.msg, exc.headers,
+                                    StringIO(body))
+        try:
+            body = resp.read()
+            info = resp.info()
+            status = resp.getcode()
+        finally:
+            resp.close()
+        self.cassette.record(url, status, info.items(), body)
+        self.recorded += 1
+        return self._response(url, status, info.items(), body)
+
+    @staticmethod
+    def _response(url, status, headers, body):
+        '''A file-like response, or the HTTPError of an error status'''
+
+        headers = make_headers(headers)
+        if not 200 <= status < 300:
+            raise urllib2.HTTPError(url, status, httplib.responses.get(
+                status, ''), headers, StringIO(body))
+        return urllib.addinfourl(StringIO(body), headers, url, status)
+
+    def save(self):
+        '''Write the cassette if anything was recorded'''
+
+        if self.cassette.dirty:
+            self.cassette.save()
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
@@ -0,0 +1,239 @@
+'''
+Retries and hedged requests for :class:`giantbomb.Api`.
+
+A :class:`RetryPolicy` given as ``Api(retry=...)`` retries the requests that
+failed for a transient reason (timeouts, dropped connections, 5xx
+responses, throttling http codes and the "rate limit exceeded"
+``status_code``) with exponential backoff and full jitter, honouring
+``Retry-After``, for as long as the overall ``deadline`` allows.
+
+With ``hedge`` the policy also cuts the tail latency of these idempotent
+GETs: when a request has not answered after ``hedge_delay`` (by default the
+``hedge_quantile`` of the recent latencies), a duplicate is sent and
+whichever answers first is used.  Streamed responses (``stream=True``) are
+neither retried nor hedged.
+'''
+
+import time
+import random
+import socket
+import httplib
+import threading
+import urllib2
+import Queue
+from collections import deque
+from giantbomb.pool import WorkerPool
+from giantbomb.ratelimit import THROTTLE_STATUS_CODES, THROTTLE_HTTP_CODES
+
+
+# Http codes of server errors worth trying again
+TRANSIENT_HTTP_CODES = (500, 502, 503, 504) + THROTTLE_HTTP_CODES
+
+
+class DeadlineExceeded(urllib2.URLError):
+    '''A request still unanswered when the deadline of its policy passed'''
+
+
+def retry_after(exc):
+    '''Seconds to back off according to an HTTPError, or None'''
+
+    try:
+        return float(exc.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def is_transient(exc):
+    '''Whether the error exc is worth retrying'''
+
+    if isinstance(exc, urllib2.HTTPError):
+        return exc.code in TRANSIENT_HTTP_CODES
+    if isinstance(exc, DeadlineExceeded):
+        return False
+    if isinstance(exc, urllib2.URLError):
+        return isinstance(exc.reason, socket.error)
+    if isinstance(exc, (socket.error, httplib.HTTPException)):
+        return True
+    return getattr(exc, 'status_code', None) in THROTTLE_STATUS_CODES
+
+
+class RetryPolicy(object):
+    '''
+    Make at most ``attempts`` attempts, the n-th retry waiting a random
+    time between 0 and ``backoff * 2 ** n`` seconds (at most
+    ``max_backoff``, at least the ``Retry-After`` of the response), or
+    exactly that long without ``jitter``.  No attempt starts, and no wait
+    goes, past ``deadline`` seconds after the first one.
+
+    ``hedge`` turns hedged requests on; ``hedge_delay`` fixes the wait
+    before the duplicate, otherwise it is the ``hedge_quantile`` of the
+    last ``window`` latencies, once ``min_samples`` of them are known.
+
+    ``retries``, ``giveups``, ``hedges`` and ``hedge_wins`` count the
+    retries made, the transient errors raised anyway, the duplicates sent
+    and the duplicates that answered first.
+    '''
+
+    def __init__(self, attempts=4, backoff=0.1, max_backoff=10.0,
+                 jitter=True, deadline=30.0, hedge=False, hedge_delay=None,
+                 hedge_quantile=0.95, min_samples=20, window=200,
+                 workers=32):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.retries = 0
+        self.giveups = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.sleep = time.sleep
+        self.random = random.random
+        self._latencies = deque(maxlen=window)
+        self._workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def delay(self, retry, exc=None):
+        '''Seconds to wait before the retry-th retry (0 for the first)'''
+
+        delay = min(self.max_backoff, self.backoff * 2 ** retry)
+        if self.jitter:
+            delay *= self.random()
+        wait = retry_after(exc)
+        if wait is not None:
+            delay = max(delay, wait)
+        return delay
+
+    def call(self, func, *args):
+        '''
+        Return func(*args), retrying transient errors and hedging slow
+        calls according to the policy
+        '''
+
+        deadline = None
+        if self.deadline is not None:
+            deadline = time.time() + self.deadline
+        retry = 0
+        while True:
+            try:
+                if self.hedge:
+                    return self._hedged(func, args, deadline)
+                return func(*args)
+            except Exception as exc:
+                if not is_transient(exc):
+                    raise
+                delay = self.delay(retry, exc)
+                if retry + 1 >= self.attempts or (
+                        deadline is not None and
+                        time.time() + delay >= deadline):
+                    with self._lock:
+                        self.giveups += 1
+                    raise
+            with self._lock:
+                self.retries += 1
+            retry += 1
+            self.sleep(delay)
+
+    def current_hedge_delay(self):
+        '''Seconds to wait before hedging a request, None for never'''
+
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1,
+                             int(len(latencies) * self.hedge_quantile))]
+
+    def _record(self, start):
+        '''A callback recording the latency of a call started at start'''
+
+        def record(future):
+            if future.exception() is None:
+                with self._lock:
+                    self._latencies.append(time.time() - start)
+        return record
+
+    def _submit(self, func, args, done):
+        '''Run func(*args) on the pool, queueing its future on done'''
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = WorkerPool(self._workers)
+            pool = self._pool
+        start = time.time()
+        future = pool.submit(func, *args)
+        future.add_done_callback(self._record(start))
+        future.add_done_callback(done.put)
+        return future
+
+    def _hedged(self, func, args, deadline):
+        '''One attempt, duplicated if it is slower than the hedge delay'''
+
+        delay = self.current_hedge_delay()
+        if delay is None:
+            start = time.time()
+            result = func(*args)
+            with self._lock:
+                self._latencies.append(time.time() - start)
+            return result
+
+        done = Queue.Queue()
+        primary = self._submit(func, args, done)
+        pending = 1
+        try:
+            future = done.get(timeout=self._remaining(deadline, delay))
+        except Queue.Empty:
+            self._check_deadline(deadline)
+            with self._lock:
+                self.hedges += 1
+            self._submit(func, args, done)
+            pending = 2
+            future = self._wait(done, deadline)
+        pending -= 1
+        if future.exception() is not None and pending:
+            # the other request may still succeed
+            future = self._wait(done, deadline)
+        if future is not primary and future.exception() is None:
+            with self._lock:
+                self.hedge_wins += 1
+        return future.result()
+
+    @staticmethod
+    def _remaining(deadline, limit=None):
+        '''Seconds left until deadline, at most limit'''
+
+        if deadline is None:
+            return limit
+        remaining = max(0, deadline - time.time())
+        if limit is None:
+            return remaining
+        return min(limit, remaining)
+
+    def _check_deadline(self, deadline):
+        '''Raise DeadlineExceeded once deadline has passed'''
+
+        if deadline is not None and time.time() >= deadline:
+            raise DeadlineExceeded('No answer within %ss' % self.deadline)
+
+    def _wait(self, done, deadline):
+        '''The next future to complete, before the deadline'''
+
+        try:
+            return done.get(timeout=self._remaining(deadline))
+        except Queue.Empty:
+            raise DeadlineExceeded('No answer within %ss' % self.deadline)
+
+    def close(self):
+        '''Stop the hedging workers'''
+
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
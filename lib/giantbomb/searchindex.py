@@ -0,0 +1,258 @@
+'''
+An in-memory full-text index answering ``search`` calls locally.
+
+:class:`SearchIndex` tokenizes the ``name`` and ``aliases`` of the objects
+it is given and keeps an inverted index from tokens to objects, so that a
+query costs a few dict lookups instead of a round-trip to the servers,
+which is what typeahead needs.  The tokens of a query match the tokens of
+the objects that start with them (``'port'`` finds Portal), and results are
+ranked by how well they match: whole name first, then name prefix, then
+name tokens, then aliases.
+
+Objects are added with ``add``/``upsert`` (an index can be the ``store`` of a
+:class:`giantbomb.sync.Sync`), from a crawl::
+
+    index = SearchIndex()
+    index.add_many('games', gb.crawl('games', field_list='id,name,aliases'))
+
+or from a :class:`giantbomb.mirror.Mirror` with ``SearchIndex.from_mirror``.
+'''
+
+import re
+import heapq
+import bisect
+import threading
+import unicodedata
+from collections import defaultdict, OrderedDict
+from giantbomb import PAGE_SIZE, SINGULARS, SearchResult
+from giantbomb.models import Model, raw
+
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+# Fields kept for the SearchResult objects; descriptions are left out
+STORED_FIELDS = ('aliases', 'api_detail_url', 'deck', 'id', 'image', 'name',
+                 'site_detail_url')
+
+# Token weights by field, and the discount of a prefix over a whole token
+NAME_WEIGHT = 3.0
+ALIAS_WEIGHT = 2.0
+PREFIX_FACTOR = 0.5
+
+# Bonuses of a name equal to, or starting with, the whole query
+EXACT_BONUS = 10.0
+PREFIX_BONUS = 5.0
+
+# Number of ranked queries remembered (typeahead repeats the same prefixes)
+QUERY_CACHE_SIZE = 256
+
+
+def normalize(text):
+    '''Lowercase text and strip its accents'''
+
+    if not isinstance(text, unicode):
+        text = text.decode('utf-8')
+    text = unicodedata.normalize('NFKD', text.lower())
+    return u''.join(x for x in text if not unicodedata.combining(x))
+
+
+def tokenize(text):
+    '''The normalized tokens of text'''
+
+    if not text:
+        return []
+    return TOKEN.findall(normalize(text))
+
+
+class SearchIndex(object):
+    '''
+    A thread safe inverted index over the names and aliases of objects of
+    any item resource.  The ranking of the last ``cache_size`` queries is
+    remembered until the index changes.
+    '''
+
+    def __init__(self, cache_size=QUERY_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._docs = {}
+        self._postings = defaultdict(dict)
+        self._tokens = []
+        self._sorted = True
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    @classmethod
+    def from_mirror(cls, mirror, resources=None):
+        '''Index the objects of a Mirror, of all resources by default'''
+
+        index = cls()
+        for resource, data in mirror.iter_objects(resources):
+            index.add(resource, data)
+        return index
+
+    def add(self, resource, obj):
+        '''
+        Index (or re-index) one object of resource, a model or a json dict.
+        resource may be the item or the list resource name.
+        '''
+
+        resource = SINGULARS.get(resource, resource)
+        if isinstance(obj, Model):
+            obj = raw(obj)
+        doc = dict((key, obj[key]) for key in STORED_FIELDS if key in obj)
+        doc['resource_type'] = resource
+        key = (resource, doc['id'])
+
+        weights = {}
+        for token in tokenize(doc.get('aliases')):
+            weights[token] = ALIAS_WEIGHT
+        for token in tokenize(doc.get('name')):
+            weights[token] = NAME_WEIGHT
+
+        name = normalize(doc.get('name') or '')
+        with self._lock:
+            self._remove(key)
+            # (stored fields, normalized name, tokens, tie breaker)
+            self._docs[key] = (doc, name, tuple(weights),
+                               (len(name), name, key))
+            self._queries.clear()
+            for token, weight in weights.iteritems():
+                postings = self._postings[token]
+                if not postings:
+                    self._sorted = False
+                postings[key] = weight
+
+    upsert = add
+
+    def add_many(self, resource, objs):
+        '''Index several objects of resource'''
+
+        for obj in objs:
+            self.add(resource, obj)
+
+    def remove(self, resource, gbid):
+        '''Drop an object from the index'''
+
+        with self._lock:
+            self._remove((SINGULARS.get(resource, resource), gbid))
+
+    def _remove(self, key):
+        '''Drop the postings of a document, the lock being held'''
+
+        entry = self._docs.pop(key, None)
+        if entry is None:
+            return
+        self._queries.clear()
+        for token in entry[2]:
+            postings = self._postings[token]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                self._sorted = False
+
+    def _expand(self, token):
+        '''The indexed tokens starting with token, the lock being held'''
+
+        if not self._sorted:
+            self._tokens = sorted(self._postings)
+            self._sorted = True
+        tokens = self._tokens
+        start = bisect.bisect_left(tokens, token)
+        end = start
+        while end < len(tokens) and tokens[end].startswith(token):
+            end += 1
+        return tokens[start:end]
+
+    def search(self, query, offset=0, resources=None, gbfilter=None,
+               limit=None):
+        '''
+        Search the index, with the arguments of Api.search: ``resources``
+        is a comma separated list of item resources, ``offset`` and
+        ``limit`` page through the ranked results.  ``gbfilter`` is
+        accepted for compatibility and ignored.  Every token of the query
+        has to match the start of a token of the name or aliases.
+        '''
+
+        if limit is None:
+            limit = PAGE_SIZE
+        if resources:
+            resources = frozenset(resources.split(','))
+        else:
+            resources = None
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        phrase = normalize(query).strip()
+        end = offset + limit
+
+        with self._lock:
+            cache_key = (phrase, resources)
+            ranked = self._queries.pop(cache_key, None)
+            if ranked is None or len(ranked[0]) < min(end, ranked[1]):
+                ranked = self._rank(tokens, phrase, resources, end)
+            self._queries[cache_key] = ranked
+            if len(self._queries) > self.cache_size:
+                self._queries.popitem(last=False)
+            docs = [self._docs[key][0] for key in ranked[0][offset:end]]
+        return [SearchResult(dict(doc)) for doc in docs]
+
+    def _rank(self, tokens, phrase, resources, count):
+        '''
+        The keys of the best count documents matching every token, and the
+        total number of matches, the lock being held
+        '''
+
+        # intersect the matches of every token first (set operations run
+        # in C), so that only the documents matching the whole query are
+        # scored
+        expansions = []
+        candidates = None
+        for token in set(tokens):
+            expanded = self._expand(token)
+            matches = set()
+            for indexed in expanded:
+                matches.update(self._postings[indexed])
+            if candidates is None:
+                candidates = matches
+            else:
+                candidates &= matches
+            if not candidates:
+                return [], 0
+            expansions.append((token, expanded))
+        if resources is not None:
+            candidates = set(key for key in candidates
+                             if key[0] in resources)
+
+        # a single token matches every candidate, no need to intersect
+        whole = len(expansions) == 1 and resources is None
+        scores = dict.fromkeys(candidates, 0.0)
+        for token, expanded in expansions:
+            best = {}
+            for indexed in expanded:
+                factor = 1.0 if indexed == token else PREFIX_FACTOR
+                postings = self._postings[indexed]
+                if whole:
+                    keys = postings
+                else:
+                    keys = candidates.intersection(postings)
+                for key in keys:
+                    score = postings[key] * factor
+                    if score > best.get(key, 0):
+                        best[key] = score
+            for key, score in best.iteritems():
+                scores[key] += score
+
+        docs = self._docs
+        ranked = []
+        for key, score in scores.iteritems():
+            entry = docs[key]
+            name = entry[1]
+            if name == phrase:
+                score += EXACT_BONUS
+            elif name.startswith(phrase):
+                score += PREFIX_BONUS
+            ranked.append((-score, entry[3]))
+        best = heapq.nsmallest(count, ranked)
+        return [item[1][2] for item in best], len(ranked)
@@ -0,0 +1,354 @@
+'''
+A response cache shared by the processes of one host.
+
+:class:`SharedCache` keeps its entries in a memory-mapped file, so that the
+pre-forked workers of a web server (or any processes opening the same
+``path``) share one warm cache instead of each building a cold copy of
+their own.  It has the interface of the caches of :mod:`giantbomb.cache`.
+
+The file is divided into buckets of ``ways`` fixed size slots; a key lives
+in one of the slots of the bucket its hash points to, and storing a key in
+a full bucket reuses its least recently used slot.  Writers lock the bucket
+(a thread lock and an ``fcntl`` lock on one byte) while readers take no
+lock at all: every slot carries a sequence number, odd while the slot is
+being written, and a read that raced with a write is tried again.
+
+POSIX only, as it relies on :mod:`fcntl`.
+'''
+
+import os
+import mmap
+import fcntl
+import struct
+import hashlib
+import threading
+from contextlib import contextmanager
+from giantbomb.cache import BaseCache, CacheEntry, DEFAULT_TTL, split_key
+
+
+MAGIC = 'GBSC'
+VERSION = 1
+
+# magic, version, slots, ways, slot size and the lru clock
+FILE_HEADER = struct.Struct('<4sIIIIQ')
+HEADER_SIZE = 64
+CLOCK = struct.Struct('<Q')
+CLOCK_OFFSET = FILE_HEADER.size - CLOCK.size
+
+# sequence, key fingerprint (0 for a free slot), last use, expiry, then the
+# lengths of the key, body, etag, last_modified and updated that follow
+SLOT_HEADER = struct.Struct('<QQQdHIHHH')
+SEQUENCE = struct.Struct('<Q')
+USED = struct.Struct('<Q')
+USED_OFFSET = 16
+
+# How many times a read racing with writes is tried before it is a miss
+READ_ATTEMPTS = 8
+
+
+def key_hash(key):
+    '''The bucket selector and the non zero fingerprint of a key'''
+
+    high, low = struct.unpack('<QQ', hashlib.md5(key).digest())
+    return high, low or 1
+
+
+def encode(value):
+    '''A validator as stored in a slot, None being empty'''
+
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        value = value.encode('utf-8')
+    return value
+
+
+class MappedFile(object):
+    '''
+    The descriptor, memory map and bucket locks of a cache file.  fcntl
+    locks belong to the process, not to a descriptor, and closing any
+    descriptor of a file drops all of them, so the :class:`SharedCache`
+    instances of one process opening the same file share one MappedFile
+    (see :func:`attach`).
+    '''
+
+    def __init__(self, path, slots, slot_size, ways):
+        self.path = path
+        self.key = os.path.realpath(path)
+        self.users = 0
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                self.map = self._setup(slots, slot_size, ways)
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        except Exception:
+            os.close(self.fd)
+            raise
+        self.locks = [threading.Lock() for _ in range(self.buckets)]
+
+    def _setup(self, slots, slot_size, ways):
+        '''Map the file, laying it out first if it is new'''
+
+        if os.fstat(self.fd).st_size == 0:
+            if slot_size <= SLOT_HEADER.size:
+                raise ValueError('slot_size must exceed %s bytes'
+                                 % SLOT_HEADER.size)
+            ways = max(1, min(ways, slots))
+            slots = -(-slots // ways) * ways
+            os.ftruncate(self.fd, HEADER_SIZE + slots * slot_size)
+            os.write(self.fd, FILE_HEADER.pack(MAGIC, VERSION, slots, ways,
+                                               slot_size, 0))
+        mapped = mmap.mmap(self.fd, 0)
+        magic, version, slots, ways, slot_size, _ = \
+            FILE_HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != VERSION or \
+                len(mapped) < HEADER_SIZE + slots * slot_size:
+            mapped.close()
+            raise ValueError('%s is not a shared cache file' % self.path)
+        self.slots = slots
+        self.ways = ways
+        self.slot_size = slot_size
+        self.buckets = slots // ways
+        return mapped
+
+    def close(self):
+        '''Unmap and close the file'''
+
+        self.map.close()
+        os.close(self.fd)
+
+
+# The files mapped by this process, by real path
+_files = {}
+_files_lock = threading.Lock()
+
+
+def attach(path, slots, slot_size, ways):
+    '''
+    The MappedFile of path, opened (and laid out with the given geometry if
+    new) unless this process already has it
+    '''
+
+    key = os.path.realpath(path)
+    with _files_lock:
+        mapped = _files.get(key)
+        if mapped is None:
+            mapped = _files[key] = MappedFile(path, slots, slot_size, ways)
+        mapped.users += 1
+    return mapped
+
+
+def detach(mapped):
+    '''Release a MappedFile, closing it once its last user is gone'''
+
+    with _files_lock:
+        mapped.users -= 1
+        if mapped.users:
+            return
+        del _files[mapped.key]
+    mapped.close()
+
+
+class SharedCache(BaseCache):
+    '''
+    A cache in the memory-mapped file at ``path``, created when missing,
+    with room for ``slots`` responses of up to ``slot_size`` bytes each
+    (including the key and validators).  Bigger responses are not cached;
+    ``oversized`` counts them: a full 100 item page of a list resource can
+    outgrow even the default 256KB, in which case narrow its ``field_list``
+    or create the file with a bigger ``slot_size``.  A process opening an
+    existing file uses the geometry the file was created with.
+
+    Instances of one process opening the same file share its descriptor
+    and locks, and the file stays open until the last of them is closed.
+    The ``stats`` are those of the instance.
+    '''
+
+    def __init__(self, path, slots=1024, slot_size=256 * 1024, ways=8,
+                 ttls=None, default_ttl=DEFAULT_TTL):
+        super(SharedCache, self).__init__(ttls, default_ttl)
+        self.path = path
+        self.oversized = 0
+        self._file = attach(path, slots, slot_size, ways)
+        self._fd = self._file.fd
+        self._map = self._file.map
+        self._locks = self._file.locks
+        self.slots = self._file.slots
+        self.ways = self._file.ways
+        self.slot_size = self._file.slot_size
+        self.buckets = self._file.buckets
+
+    def __len__(self):
+        return sum(1 for offset in self._all_offsets()
+                   if SLOT_HEADER.unpack_from(self._map, offset)[1])
+
+    def _locate(self, key):
+        '''The bucket and fingerprint of key'''
+
+        selector, fingerprint = key_hash(key)
+        return selector % self.buckets, fingerprint
+
+    def _offsets(self, bucket):
+        '''The offsets of the slots of a bucket'''
+
+        start = HEADER_SIZE + bucket * self.ways * self.slot_size
+        return range(start, start + self.ways * self.slot_size,
+                     self.slot_size)
+
+    def _all_offsets(self):
+        return range(HEADER_SIZE, HEADER_SIZE + self.slots * self.slot_size,
+                     self.slot_size)
+
+    @contextmanager
+    def _locked(self, bucket):
+        '''Hold the write lock of a bucket, across threads and processes'''
+
+        with self._locks[bucket]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, bucket)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, bucket)
+
+    def _tick(self):
+        '''Advance the shared lru clock (a tick lost in a race is harmless)'''
+
+        tick = CLOCK.unpack_from(self._map, CLOCK_OFFSET)[0] + 1
+        CLOCK.pack_into(self._map, CLOCK_OFFSET, tick)
+        return tick
+
+    def _read(self, offset, fingerprint, key):
+        '''The entry for key in the slot at offset, or None'''
+
+        mapped = self._map
+        capacity = self.slot_size - SLOT_HEADER.size
+        for _ in range(READ_ATTEMPTS):
+            header = SLOT_HEADER.unpack_from(mapped, offset)
+            sequence = header[0]
+            if sequence & 1:
+                continue
+            lengths = header[4:]
+            if header[1] != fingerprint or sum(lengths) > capacity:
+                data = None
+            else:
+                start = offset + SLOT_HEADER.size
+                data = mapped[start:start + sum(lengths)]
+            if SEQUENCE.unpack_from(mapped, offset)[0] != sequence:
+                continue
+            if data is None:
+                return None
+            fields = []
+            for length in lengths:
+                fields.append(data[:length])
+                data = data[length:]
+            if fields[0] != key:
+                return None
+            resource, gbid = split_key(key)
+            etag, last_modified, updated = [x or None for x in fields[2:]]
+            if updated is not None:
+                updated = updated.decode('utf-8')
+            return CacheEntry(fields[1], header[3], resource, gbid, etag,
+                              last_modified, updated)
+        return None
+
+    def _key_at(self, offset):
+        '''The key in the slot at offset, the bucket being locked'''
+
+        start = offset + SLOT_HEADER.size
+        return self._map[start:start + SLOT_HEADER.unpack_from(
+            self._map, offset)[4]]
+
+    def _write(self, offset, fingerprint=0, expires=0, fields=()):
+        '''Fill (or with no fields, free) a slot, its bucket being locked'''
+
+        mapped = self._map
+        sequence = SEQUENCE.unpack_from(mapped, offset)[0] | 1
+        SEQUENCE.pack_into(mapped, offset, sequence)
+        lengths = [len(x) for x in fields] or [0] * 5
+        start = offset + SLOT_HEADER.size
+        payload = ''.join(fields)
+        mapped[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(mapped, offset, sequence, fingerprint,
+                              self._tick() if fingerprint else 0, expires,
+                              *lengths)
+        SEQUENCE.pack_into(mapped, offset, sequence + 1)
+
+    def get_entry(self, key, stale=False):
+        bucket, fingerprint = self._locate(key)
+        for offset in self._offsets(bucket):
+            entry = self._read(offset, fingerprint, key)
+            if entry is not None:
+                break
+        else:
+            self.stats.misses += 1
+            return None
+        USED.pack_into(self._map, offset + USED_OFFSET, self._tick())
+        if not entry.is_fresh():
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            if not stale:
+                return None
+        else:
+            self.stats.hits += 1
+        return entry
+
+    def set_entry(self, key, entry):
+        fields = [key, entry.body, encode(entry.etag),
+                  encode(entry.last_modified), encode(entry.updated)]
+        oversized = SLOT_HEADER.size + sum(len(x) for x in fields) > \
+            self.slot_size
+        bucket, fingerprint = self._locate(key)
+        with self._locked(bucket):
+            target = free = oldest = None
+            for offset in self._offsets(bucket):
+                header = SLOT_HEADER.unpack_from(self._map, offset)
+                if header[1] == fingerprint and self._key_at(offset) == key:
+                    target = offset
+                    break
+                if not header[1]:
+                    if free is None:
+                        free = offset
+                elif oldest is None or header[2] < oldest[1]:
+                    oldest = offset, header[2]
+            if oversized:
+                # the previous response must not outlive this one
+                if target is not None:
+                    self._write(target)
+                self.oversized += 1
+                return
+            if target is None:
+                target = free
+            if target is None:
+                target = oldest[0]
+                self.stats.evictions += 1
+            self._write(target, fingerprint, entry.expires, fields)
+
+    def invalidate(self, resource, gbid=None):
+        if gbid is not None:
+            gbid = str(gbid)
+        for bucket in range(self.buckets):
+            with self._locked(bucket):
+                for offset in self._offsets(bucket):
+                    if not SLOT_HEADER.unpack_from(self._map, offset)[1]:
+                        continue
+                    found = split_key(self._key_at(offset))
+                    if found[0] == resource and \
+                            (gbid is None or found[1] == gbid):
+                        self._write(offset)
+                        self.stats.invalidations += 1
+
+    def clear(self):
+        for bucket in range(self.buckets):
+            with self._locked(bucket):
+                for offset in self._offsets(bucket):
+                    if SLOT_HEADER.unpack_from(self._map, offset)[1]:
+                        self._write(offset)
+
+    def close(self):
+        '''Release the file, unmapped once no instance uses it'''
+
+        mapped, self._file = self._file, None
+        if mapped is not None:
+            detach(mapped)
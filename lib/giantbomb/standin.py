@@ -0,0 +1,322 @@
+'''
+A small local stand-in for the giantbomb api, used by the offline tests and
+the benchmarks.
+
+Detail urls (``/api/<resource>/<id>/``) answer with a single generated
+object, list urls (``/api/<resource>/``) with a page of ``total`` generated
+objects honouring ``offset``/``limit``, ``field_list`` and
+``filter=id:1|2|3``, ``filter=date_last_updated:start|end`` and
+``sort=date_last_updated:asc``.  Ids listed
+in ``missing`` do not exist.  Responses carry an ``ETag`` (unless ``etags``
+is False) and conditional requests matching it get a 304.  ``updated`` maps
+ids to their ``date_last_updated``.  ``/api/search/`` answers with the
+generated objects of ``resources`` (games by default), those whose name
+contains the ``query`` first.
+
+Urls recorded in the :class:`giantbomb.replay.Cassette` given as
+``cassette`` are answered with their recording instead.  Every response
+waits ``latency`` seconds, and ``tail_rate`` of them ``tail_latency``
+more; ``error_rate`` of them fail with ``error_status`` (both drawn from a
+seeded random), and past ``throttle`` requests within ``window`` seconds
+the server answers 420 with a ``Retry-After`` header like the real one
+does::
+
+    server = Server(latency=0.05, error_rate=0.01, throttle=200).start()
+    gb = giantbomb.Api('key')
+    gb.base_url = server.url
+'''
+
+# Imports #####################################################################
+import time
+import json
+import random
+import hashlib
+import socket
+import threading
+import urlparse
+import BaseHTTPServer
+import SocketServer
+
+
+###############################################################################
+DEFAULT_UPDATED = '2014-09-01 12:00:00'
+
+# Item resources searched when a search names none
+SEARCH_RESOURCES = ('game', )
+
+
+def make_item(resource, gbid, field_list=None, updated=DEFAULT_UPDATED):
+    '''Build the generated payload for one object'''
+
+    platform = 94 + gbid % 2
+    item = {'id': gbid,
+            'date_last_updated': updated,
+            'name': '%s %s' % (resource, gbid),
+            'deck': 'All about %s %s' % (resource, gbid),
+            'description': '<p>%s</p>' % ('Lorem ipsum ' * 20),
+            'api_detail_url': 'http://localhost/api/%s/%s/' % (resource,
+                                                               gbid),
+            'platforms': [{'id': platform, 'name': 'Platform %s' % platform,
+                           'api_detail_url': 'http://localhost/api/'
+                                             'platform/%s/' % platform}]}
+    if field_list:
+        fields = field_list.split(',')
+        for key in item.keys():
+            if key not in fields:
+                del item[key]
+    return item
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    '''Request handler serving generated giantbomb-like responses'''
+
+    protocol_version = 'HTTP/1.1'
+    # buffered writes, without Nagle: the tail of a response must not wait
+    # for the delayed ack of the client
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlparse.urlsplit(self.path)
+        params = dict(urlparse.parse_qsl(parts.query))
+        with self.server.lock:
+            self.server.paths.append(self.path)
+            self.server.request_headers.append(self.headers)
+        latency = self.server.latency_for()
+        if latency:
+            time.sleep(latency)
+
+        retry = self.server.throttled()
+        if retry is not None:
+            self.send_body(420, json.dumps({
+                'status_code': 107, 'error': 'Rate limit exceeded',
+                'number_of_total_results': 0, 'results': []}),
+                [('Retry-After', '%d' % retry)])
+            return
+        if self.server.failing():
+            self.send_body(self.server.error_status, '')
+            return
+        if self.server.cassette is not None:
+            episode = self.server.cassette.play(self.path)
+            if episode is not None:
+                status, headers, body = episode
+                self.send_body(status, body, [x for x in headers
+                                              if x[0].lower() !=
+                                              'content-length'])
+                return
+
+        segments = [x for x in parts.path.split('/') if x]
+        if segments[:1] != ['api'] or len(segments) not in (2, 3):
+            self.send_body(404, '')
+            return
+
+        segments = segments[1:]
+        status_code, error = self.server.status_code, self.server.error
+        if segments[0] == 'search':
+            results = self.search(params)
+            total = len(results)
+            offset = int(params.get('offset', 0))
+            limit = min(int(params.get('limit', 100)), 100)
+            results = results[offset:offset + limit]
+        elif len(segments) == 2:
+            gbid = int(segments[1])
+            if gbid in self.server.missing:
+                status_code, error = 101, 'Object Not Found'
+                results, total = [], 0
+            else:
+                results = make_item(segments[0], gbid,
+                                    params.get('field_list'),
+                                    self.server.updated_for(gbid))
+                total = 1
+        else:
+            gbids = range(1, self.server.total + 1)
+            filters = dict(x.split(':', 1)
+                           for x in params.get('filter', '').split(',')
+                           if ':' in x)
+            if 'id' in filters:
+                gbids = [int(x) for x in filters['id'].split('|')
+                         if int(x) in gbids]
+            if 'date_last_updated' in filters:
+                start, end = filters['date_last_updated'].split('|')
+                gbids = [x for x in gbids
+                         if start <= self.server.updated_for(x) <= end]
+            gbids = [x for x in gbids if x not in self.server.missing]
+            if params.get('sort', '').startswith('date_last_updated:'):
+                gbids.sort(key=lambda x: (self.server.updated_for(x), x),
+                           reverse=params['sort'].endswith(':desc'))
+            offset = int(params.get('offset', 0))
+            limit = min(int(params.get('limit', 100)), 100)
+            total = len(gbids)
+            results = [make_item(segments[0], x, params.get('field_list'),
+                                 self.server.updated_for(x))
+                       for x in gbids[offset:offset + limit]]
+
+        body = json.dumps({'status_code': status_code, 'error': error,
+                           'number_of_total_results': total,
+                           'results': results})
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.server.etags and \
+                self.headers.getheader('If-None-Match') == etag:
+            with self.server.lock:
+                self.server.not_modified += 1
+            self.send_body(304, '', [('ETag', etag)])
+            return
+        headers = [('Content-Type', 'application/json')]
+        if self.server.etags:
+            headers.append(('ETag', etag))
+        self.send_body(self.server.http_status, body, headers)
+
+    def search(self, params):
+        '''The generated objects of a search query, best matches first'''
+
+        resources = params.get('resources')
+        resources = resources.split(',') if resources else SEARCH_RESOURCES
+        query = params.get('query', '').lower()
+        matches, others = [], []
+        for resource in resources:
+            for gbid in range(1, self.server.total + 1):
+                if gbid in self.server.missing:
+                    continue
+                item = make_item(resource, gbid, params.get('field_list'),
+                                 self.server.updated_for(gbid))
+                item['resource_type'] = resource
+                if query in ('%s %s' % (resource, gbid)).lower():
+                    matches.append(item)
+                else:
+                    others.append(item)
+        return matches + others
+
+    def send_body(self, status, body, headers=()):
+        '''Send a whole response'''
+
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    '''Threaded http server keeping some request statistics'''
+
+    daemon_threads = True
+
+    def __init__(self, latency=0, total=250, cassette=None, error_rate=0,
+                 error_status=502, throttle=None, window=1.0, seed=0,
+                 tail_rate=0, tail_latency=0):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), Handler)
+        self.latency = latency
+        self.total = total
+        self.cassette = cassette
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle = throttle
+        self.window = window
+        self.random = random.Random(seed)
+        self.errors = 0
+        self.throttled_requests = 0
+        self._recent = []
+        self.http_status = 200
+        self.status_code = 1
+        self.error = 'OK'
+        self.missing = set()
+        self.updated = {}
+        self.etags = True
+        self.not_modified = 0
+        self.connections = 0
+        self.paths = []
+        self.request_headers = []
+        self.lock = threading.Lock()
+        self.stopped = False
+        self.handlers = []
+        self.url = 'http://127.0.0.1:%s/api/' % self.server_address[1]
+
+    def updated_for(self, gbid):
+        '''The date_last_updated of an object'''
+
+        return self.updated.get(gbid, DEFAULT_UPDATED)
+
+    def latency_for(self):
+        '''The delay of the current request'''
+
+        if not self.tail_rate:
+            return self.latency
+        with self.lock:
+            if self.random.random() < self.tail_rate:
+                return self.latency + self.tail_latency
+        return self.latency
+
+    def failing(self):
+        '''Whether the current request should fail with error_status'''
+
+        if not self.error_rate:
+            return False
+        with self.lock:
+            if self.random.random() < self.error_rate:
+                self.errors += 1
+                return True
+        return False
+
+    def throttled(self):
+        '''
+        Seconds the current request should be told to wait, or None when
+        it is within the throttle
+        '''
+
+        if self.throttle is None:
+            return None
+        now = time.time()
+        with self.lock:
+            recent = [x for x in self._recent if x > now - self.window]
+            if len(recent) >= self.throttle:
+                self._recent = recent
+                self.throttled_requests += 1
+                return max(1, int(recent[0] + self.window - now + 0.999))
+            recent.append(now)
+            self._recent = recent
+        return None
+
+    def start(self):
+        '''Serve requests on a background thread'''
+
+        thread = threading.Thread(target=self.serve_forever, args=(0.05, ))
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def process_request(self, request, client_address):
+        thread = threading.Thread(target=self.process_request_thread,
+                                  args=(request, client_address))
+        thread.daemon = True
+        with self.lock:
+            self.handlers.append((thread, request))
+        thread.start()
+
+    def handle_error(self, request, client_address):
+        if not self.stopped:
+            BaseHTTPServer.HTTPServer.handle_error(self, request,
+                                                   client_address)
+
+    def stop(self):
+        '''Shut the server down'''
+
+        self.stopped = True
+        self.shutdown()
+        self.server_close()
+        for thread, request in self.handlers:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+            thread.join(1)
@@ -0,0 +1,193 @@
+'''
+Incremental parsing of giantbomb list responses.
+
+:class:`ResultStream` reads a response body from a file object a chunk at a
+time and yields each element of its ``results`` array as soon as that
+element has been received, instead of waiting for (and holding) the whole
+body.  The other keys of the envelope are collected in ``envelope``.
+'''
+
+import re
+import json
+from cStringIO import StringIO
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+CHUNK_SIZE = 16 * 1024
+
+
+class ResultStream(object):
+    '''
+    Iterate over the ``results`` of the json response read from ``fobj``.
+
+    ``check(envelope)`` is called as soon as the status is known and must
+    raise for error responses, so no result of a failed request is ever
+    yielded.  Results appearing before the status code are held back until
+    it has been seen.  ``on_done(envelope)`` is called once the whole body
+    has been parsed.  ``count`` is the number of results read so far.
+    '''
+
+    def __init__(self, fobj, check, on_done=None, chunk_size=CHUNK_SIZE):
+        self.fobj = fobj
+        self.check = check
+        self.on_done = on_done
+        self.chunk_size = chunk_size
+        self.envelope = {}
+        self.count = 0
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._checked = False
+
+    def _read_more(self):
+        '''Append the next chunk to the buffer, compacting it first'''
+
+        if self._eof:
+            raise ValueError('Truncated json response')
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        # grow the reads with the pending data so that a huge element is not
+        # re-parsed once per small chunk
+        data = self.fobj.read(max(self.chunk_size, len(self._buf)))
+        if not data:
+            self._eof = True
+        self._buf += data
+
+    def _skip(self):
+        '''Skip whitespace and return the next character ('' at the end)'''
+
+        while True:
+            self._pos = WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._eof:
+                return ''
+            self._read_more()
+
+    def _expect(self, chars):
+        '''Consume the next character, which must be one of chars'''
+
+        char = self._skip()
+        if not char or char not in chars:
+            raise ValueError('Expected %r at offset %s of the response' %
+                             (chars, self._pos))
+        self._pos += 1
+        return char
+
+    def _value(self):
+        '''Decode the next complete json value'''
+
+        self._skip()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if self._eof:
+                    raise
+            else:
+                # a number could continue in the next chunk
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            self._read_more()
+
+    def _validate(self):
+        '''Run the status check once the status code is known'''
+
+        if not self._checked and 'status_code' in self.envelope:
+            self._checked = True
+            envelope = dict(self.envelope)
+            envelope.setdefault('error', '')
+            envelope.setdefault('results', [])
+            if envelope['status_code'] != 1:
+                self._finish()
+                envelope.update(self.envelope)
+            self.check(envelope)
+
+    def _finish(self):
+        '''Parse whatever is left of the envelope'''
+
+        while self._expect(',}') == ',':
+            key = self._value()
+            self._expect(':')
+            self.envelope[key] = self._value()
+
+    def __iter__(self):
+        try:
+            for item in self._parse():
+                yield item
+        finally:
+            self.fobj.close()
+
+    def _parse(self):
+        '''Generator doing the actual parsing'''
+
+        held = []
+        self._expect('{')
+        if self._skip() == '}':
+            self._pos += 1
+        else:
+            separator = ','
+            while separator == ',':
+                key = self._value()
+                self._expect(':')
+                if key == 'results' and self._skip() == '[':
+                    self._pos += 1
+                    if self._skip() == ']':
+                        self._pos += 1
+                    else:
+                        while True:
+                            item = self._value()
+                            self.count += 1
+                            if self._checked:
+                                yield item
+                            else:
+                                held.append(item)
+                            if self._expect(',]') == ']':
+                                break
+                else:
+                    self.envelope[key] = self._value()
+                    self._validate()
+                    if self._checked and held:
+                        for item in held:
+                            yield item
+                        held = []
+                separator = self._expect(',}')
+
+        self._validate()
+        if not self._checked:
+            raise ValueError('Response without a status code')
+        for item in held:
+            yield item
+        if self.on_done is not None:
+            self.on_done(self.envelope)
+
+
+class TeeReader(object):
+    '''File-like wrapper keeping a copy of everything read through it'''
+
+    def __init__(self, fobj):
+        self.fobj = fobj
+        self._copy = StringIO()
+
+    def read(self, amt=None):
+        '''Read from the wrapped file, recording the data'''
+
+        if amt is None:
+            data = self.fobj.read()
+        else:
+            data = self.fobj.read(amt)
+        self._copy.write(data)
+        return data
+
+    def getvalue(self):
+        '''Everything read so far'''
+
+        return self._copy.getvalue()
+
+    def close(self):
+        '''Close the wrapped file'''
+
+        self.fobj.close()
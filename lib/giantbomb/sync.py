@@ -0,0 +1,198 @@
+'''
+Incremental synchronisation of list resources.
+
+:class:`Sync` keeps a local copy of list resources up to date without
+walking them in full every time: it remembers the latest
+``date_last_updated`` it has seen for each resource (the high-water mark)
+and afterwards only asks for the objects updated since, oldest first
+(``filter=date_last_updated:<mark>|<end>&sort=date_last_updated:asc``).
+Every object received is passed to ``on_upsert(resource, obj)`` and/or
+``store.upsert(resource, obj)``, so the cost of a sync follows the churn of
+the catalog rather than its size.
+
+The date filter is inclusive, so the objects sitting exactly on the mark
+come back on the next sync; the ids already seen at the mark are stored with
+it and skipped.  Deleted objects do not show up in the api and are not
+detected.
+'''
+
+import os
+import json
+import time
+import urllib
+import threading
+from giantbomb import PAGE_SIZE
+
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+SORT = 'date_last_updated:asc'
+
+# How far (seconds) past the local clock the requested date range ends, to
+# cover the server time zone and clock skew.  Anything updated later is
+# picked up by the next sync.
+HORIZON = 2 * 24 * 60 * 60
+
+
+def parse_filter(filter):
+    '''A filter given as a dict or as 'name:foo,id:1|2', as a dict'''
+
+    if isinstance(filter, basestring):
+        return dict(x.split(':', 1) for x in filter.split(',') if x)
+    return dict(filter or {})
+
+
+class SyncState(object):
+    '''
+    The high-water mark of each resource with the ids seen at that mark,
+    kept in memory or, given a ``path``, in a json file rewritten atomically
+    after every page so that an interrupted sync resumes where it stopped
+    '''
+
+    def __init__(self, path=None):
+        self.path = path
+        self.marks = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path) as fobj:
+                self.marks = json.load(fobj)
+
+    def get(self, resource):
+        '''The (mark, ids) of resource, (None, set()) if never synced'''
+
+        with self._lock:
+            mark, ids = self.marks.get(resource, (None, ()))
+        return mark, set(ids)
+
+    def set(self, resource, mark, ids):
+        '''Record the mark reached for resource'''
+
+        with self._lock:
+            self.marks[resource] = [mark, sorted(ids)]
+            self._save()
+
+    def reset(self, resource):
+        '''Forget the mark of resource, so that it is synced in full again'''
+
+        with self._lock:
+            self.marks.pop(resource, None)
+            self._save()
+
+    def _save(self):
+        '''Write the marks to the state file, if any'''
+
+        if self.path is not None:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as fobj:
+                json.dump(self.marks, fobj)
+            os.rename(tmp_path, self.path)
+
+
+class Sync(object):
+    '''
+    Bring list resources of ``api`` (LIST_ITEMS keys such as 'games') up to
+    date.  ``state`` is a :class:`SyncState`, in memory by default.
+    Objects are fetched ``limit`` at a time.
+    '''
+
+    def __init__(self, api, state=None, on_upsert=None, store=None,
+                 limit=PAGE_SIZE):
+        if state is None:
+            state = SyncState()
+        self.api = api
+        self.state = state
+        self.on_upsert = on_upsert
+        self.store = store
+        self.limit = limit
+
+    def _upsert(self, resource, obj):
+        '''Emit an object'''
+
+        if self.on_upsert is not None:
+            self.on_upsert(resource, obj)
+        if self.store is not None:
+            self.store.upsert(resource, obj)
+
+    def sync(self, resource, **kwargs):
+        '''
+        Fetch the objects of resource updated since the last sync (all of
+        them the first time) and return how many were upserted.  Other
+        keyword arguments are list parameters such as field_list, or a
+        filter (a dict or 'name:foo,platforms:94') the date range is added
+        to.  The objects are fetched in full, without the automatic
+        field_list of the api.
+        '''
+
+        uri, valid_args, cls = self.api.LIST_ITEMS[resource]
+        if 'filter' not in valid_args or 'sort' not in valid_args:
+            return self._sync_full(resource, uri, valid_args, cls, kwargs)
+        if 'field_list' in kwargs:
+            fields = set(kwargs['field_list'].split(','))
+            fields.update(('id', 'date_last_updated'))
+            kwargs['field_list'] = ','.join(sorted(fields))
+        filters = parse_filter(kwargs.pop('filter', None))
+        if 'date_last_updated' in filters:
+            raise ValueError('sync filters on date_last_updated itself')
+
+        mark, seen = self.state.get(resource)
+        end = time.strftime(DATE_FORMAT,
+                            time.localtime(time.time() + HORIZON))
+        count = 0
+        offset = 0
+        while True:
+            params = dict(kwargs, sort=SORT, limit=self.limit, offset=offset,
+                          project=False)
+            params_filter = dict(filters)
+            if mark is not None:
+                date_range = '%s|%s' % (mark, max(mark, end))
+                params_filter['date_last_updated'] = urllib.quote(date_range,
+                                                                  ':|')
+            if params_filter:
+                params['filter'] = ','.join(
+                    '%s:%s' % item for item in sorted(params_filter.items()))
+            page = self.api.get_items(uri, valid_args, cls, **params)
+
+            page_mark = mark
+            for obj in page:
+                updated = obj.get('date_last_updated')
+                if updated is not None and updated == mark and \
+                        obj.id in seen:
+                    continue
+                self._upsert(resource, obj)
+                count += 1
+                if updated is None:
+                    continue
+                if mark is None or updated > mark:
+                    mark, seen = updated, set()
+                seen.add(obj.id)
+            if mark is not None:
+                self.state.set(resource, mark, seen)
+            if len(page) < self.limit:
+                return count
+
+            # The next query starts at the new mark.  A full page that did
+            # not move the mark only held ties, page past them instead.
+            if mark == page_mark:
+                offset += len(page)
+            else:
+                offset = 0
+
+    def _sync_full(self, resource, uri, valid_args, cls, kwargs):
+        '''Upsert every object of a resource that cannot be filtered'''
+
+        count = 0
+        for obj in self.api.iter_items(uri, valid_args, cls, project=False,
+                                       **kwargs):
+            self._upsert(resource, obj)
+            count += 1
+        return count
+
+    def sync_all(self, resources=None, **kwargs):
+        '''
+        Sync several resources (every list resource by default), returning
+        the number of objects upserted per resource
+        '''
+
+        if resources is None:
+            resources = sorted(self.api.LIST_ITEMS)
+        return dict((resource, self.sync(resource, **kwargs))
+                    for resource in resources)
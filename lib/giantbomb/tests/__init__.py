@@ -1,23 +1,38 @@
 #!/usr/bin/env python
 
 # Imports #####################################################################
+import os
 import unittest
 import giantbomb
+from giantbomb.replay import CassetteTransport, ONCE, REPLAY
 try:
     from giantbomb.tests.key import GIANT_BOMB_KEY
 except ImportError:
-    import os
-    GIANT_BOMB_KEY = os.environ['GIANT_BOMB_KEY']
+    GIANT_BOMB_KEY = os.environ.get('GIANT_BOMB_KEY')
+
+# Cassette of recorded responses: replayed without a key, completed with one
+GIANT_BOMB_CASSETTE = os.environ.get('GIANT_BOMB_CASSETTE')
 
 
 ###############################################################################
+@unittest.skipIf(GIANT_BOMB_KEY is None and GIANT_BOMB_CASSETTE is None,
+                 'set GIANT_BOMB_KEY or GIANT_BOMB_CASSETTE')
 class SanityTest(unittest.TestCase):
     game_title = 'uscf'
     plat_id = 548  # atari
     plat_name = 'atari'
 
     def setUp(self):
-        self.gb = giantbomb.Api(GIANT_BOMB_KEY)
+        self.transport = None
+        if GIANT_BOMB_CASSETTE:
+            mode = ONCE if GIANT_BOMB_KEY else REPLAY
+            self.transport = CassetteTransport(GIANT_BOMB_CASSETTE, mode)
+        self.gb = giantbomb.Api(GIANT_BOMB_KEY or 'replay',
+                                transport=self.transport)
+
+    def tearDown(self):
+        if self.transport is not None:
+            self.transport.save()
 
     def test_get_items_type_check(self):
         for name, values in giantbomb.Api.ITEMS.iteritems():
@@ -55,25 +70,25 @@ class SanityTest(unittest.TestCase):
         self.assertEqual(game2.name, game3.name)
 
     def test_get_games(self):
-        results = self.gb.get_games(plat=self.plat_id)[0]
+        results = self.gb.get_games(platforms=self.plat_id)[0]
         self.assertTrue(isinstance(results, giantbomb.Games))
 
-        results = self.gb.get_games(plat=self.plat_id, offset=10)[0]
+        results = self.gb.get_games(platforms=self.plat_id, offset=10)[0]
         self.assertTrue(isinstance(results, giantbomb.Games))
 
         results = self.gb.get_games(offset=10)[0]
         self.assertTrue(isinstance(results, giantbomb.Games))
 
-        results = self.gb.get_games(plat=self.plat_id, offset=10,
-                                    gbfilter={'name': self.game_title})[0]
+        results = self.gb.get_games(platforms=self.plat_id, offset=10,
+                                    filter={'name': self.game_title})[0]
         self.assertTrue(isinstance(results, giantbomb.Games))
 
-        results = self.gb.get_games(plat=self.plat_id,
-                                    gbfilter={'name': self.game_title})[0]
+        results = self.gb.get_games(platforms=self.plat_id,
+                                    filter={'name': self.game_title})[0]
         self.assertTrue(isinstance(results, giantbomb.Games))
 
-        results = self.gb.get_games(plat=self.plat_id, limit=10,
-                                    gbfilter={'name': self.game_title})
+        results = self.gb.get_games(platforms=self.plat_id, limit=10,
+                                    filter={'name': self.game_title})
         self.assertTrue(isinstance(results[0], giantbomb.Games))
         self.assertEqual(len(results), 10)
 
@@ -82,7 +97,7 @@ class SanityTest(unittest.TestCase):
         self.assertTrue(isinstance(results, giantbomb.Platforms))
 
         results = self.gb.get_platforms(offset=1,
-                                        gbfilter={'name': self.plat_name})[0]
+                                        filter={'name': self.plat_name})[0]
         self.assertTrue(isinstance(results, giantbomb.Platforms))
 
         results = self.gb.get_platforms(offset=1, limit=10)
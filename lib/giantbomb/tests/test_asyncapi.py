@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import time
+import unittest
+import giantbomb
+from giantbomb.asyncapi import AsyncApi, gather
+from giantbomb.standin import Server
+
+
+###############################################################################
+class AsyncApiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server(latency=0.05).start()
+        self.gb = AsyncApi('key', concurrency=10)
+        self.gb.api.base_url = self.server.url
+
+    def tearDown(self):
+        self.gb.close()
+        self.server.stop()
+
+    def test_fan_out(self):
+        start = time.time()
+        futures = [self.gb.get_game(i) for i in range(30)]
+        games = gather(futures)
+        elapsed = time.time() - start
+        self.assertEqual([x.id for x in games], range(30))
+        self.assertTrue(isinstance(games[0], giantbomb.Game))
+        # 30 requests of 50ms each, 10 at a time
+        self.assertTrue(elapsed < 30 * 0.05)
+
+    def test_list_and_search(self):
+        games = self.gb.get_games(limit=3)
+        results = self.gb.search('uscf', limit=3)
+        self.assertEqual(len(games.result()), 3)
+        self.assertTrue(isinstance(results.result()[0],
+                                   giantbomb.SearchResult))
+
+    def test_errors(self):
+        future = self.gb.submit(giantbomb.check_response,
+                                {'status_code': 101, 'error': 'Not Found'})
+        self.assertRaises(giantbomb.GiantBombError, future.result)
+        self.assertTrue(isinstance(future.exception(),
+                                   giantbomb.GiantBombError))
+
+    def test_api_errors(self):
+        self.server.missing.add(7)
+        future = self.gb.get_game(7)
+        self.assertRaises(giantbomb.GiantBombError, future.result)
+        self.assertEqual(future.exception().status_code, 101)
+        self.assertEqual(self.gb.get_game(8).result().id, 8)
+
+    def test_unknown_resource(self):
+        self.assertRaises(AttributeError, getattr, self.gb, 'get_nothing')
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
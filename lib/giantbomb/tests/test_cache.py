@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import os
+import shutil
+import tempfile
+import unittest
+import giantbomb
+from giantbomb.cache import (normalize_url, split_key, MemoryCache, DiskCache,
+                             TieredCache)
+from giantbomb.standin import Server
+
+
+###############################################################################
+class NormalizeTest(unittest.TestCase):
+
+    def test_key_ignores_api_key_and_order(self):
+        first = normalize_url('http://www.giantbomb.com/api/games/'
+                              '?api_key=one&format=json&limit=10&offset=5')
+        second = normalize_url('http://www.giantbomb.com/api/games/'
+                               '?offset=5&api_key=two&limit=10&format=json')
+        self.assertEqual(first, second)
+        self.assertFalse('api_key' in first)
+
+    def test_split_key(self):
+        self.assertEqual(split_key(normalize_url(
+            'http://www.giantbomb.com/api/game/42/?format=json')),
+            ('game', '42'))
+        self.assertEqual(split_key(normalize_url(
+            'http://www.giantbomb.com/api/games/?format=json')),
+            ('games', None))
+
+
+class MemoryCacheTest(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = MemoryCache(maxsize=2)
+        cache.set('game/1/?', 'one')
+        cache.set('game/2/?', 'two')
+        self.assertEqual(cache.get('game/1/?'), 'one')
+        cache.set('game/3/?', 'three')
+        self.assertEqual(cache.get('game/2/?'), None)
+        self.assertEqual(cache.get('game/1/?'), 'one')
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertEqual(cache.stats.hits, 2)
+        self.assertEqual(cache.stats.misses, 1)
+
+    def test_resource_ttl(self):
+        cache = MemoryCache(ttls={'videos': 0})
+        cache.set('videos/?', 'body')
+        cache.set('platforms/?', 'body')
+        self.assertEqual(cache.get('videos/?'), None)
+        self.assertEqual(cache.get('platforms/?'), 'body')
+        self.assertEqual(cache.stats.expirations, 1)
+
+    def test_invalidate(self):
+        cache = MemoryCache()
+        cache.set('game/1/?', 'one')
+        cache.set('game/2/?', 'two')
+        cache.set('platform/1/?', 'one')
+        cache.invalidate('game', 1)
+        self.assertEqual(cache.get('game/1/?'), None)
+        self.assertEqual(cache.get('game/2/?'), 'two')
+        cache.invalidate('game')
+        self.assertEqual(cache.get('game/2/?'), None)
+        self.assertEqual(cache.get('platform/1/?'), 'one')
+
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_survives_restart(self):
+        cache = DiskCache(self.path)
+        cache.set('game/1/?', '{"\xc3\xa9": 1}')
+        cache.close()
+        cache = DiskCache(self.path)
+        self.assertEqual(cache.get('game/1/?'), '{"\xc3\xa9": 1}')
+        cache.invalidate('game', 1)
+        self.assertEqual(cache.get('game/1/?'), None)
+
+    def test_tiered_promotes(self):
+        disk = DiskCache(self.path)
+        disk.set('game/1/?', 'one')
+        cache = TieredCache(MemoryCache(), disk)
+        self.assertEqual(cache.get('game/1/?'), 'one')
+        self.assertEqual(len(cache.memory), 1)
+        self.assertEqual(cache.stats.hits, 1)
+
+    def test_validators_and_stale_entries(self):
+        cache = DiskCache(self.path, ttls={'game': 0})
+        cache.set('game/1/?', 'one', etag='"abc"', updated='2014-01-01')
+        cache.close()
+        cache = DiskCache(self.path, ttls={'game': 0})
+        self.assertEqual(cache.get('game/1/?'), None)
+        entry = cache.get_entry('game/1/?', stale=True)
+        self.assertEqual((entry.body, entry.etag, entry.updated),
+                         ('one', '"abc"', '2014-01-01'))
+        cache.refresh('game/1/?', entry, ttl=60)
+        self.assertEqual(cache.get('game/1/?'), 'one')
+        self.assertEqual(cache.stats.revalidations, 1)
+
+
+class ApiCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.gb = giantbomb.Api('key', cache=MemoryCache())
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_repeat_lookups_hit(self):
+        for _ in range(3):
+            self.assertEqual(self.gb.get_game(7).id, 7)
+            self.assertEqual(len(self.gb.get_games(limit=5)), 5)
+        self.assertEqual(len(self.server.paths), 2)
+
+        self.gb.invalidate('game', 7)
+        self.gb.get_game(7)
+        self.assertEqual(len(self.server.paths), 3)
+
+
+class RevalidationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.cache = MemoryCache(ttls={'game': 0})
+        self.gb = giantbomb.Api('key', cache=self.cache)
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_etag_not_modified(self):
+        self.gb.get_game(7)
+        self.assertEqual(self.gb.get_game(7).name, 'game 7')
+        self.assertEqual(self.server.not_modified, 1)
+        self.assertEqual(self.cache.stats.revalidations, 1)
+
+        self.server.updated[7] = '2015-01-01 00:00:00'
+        self.assertEqual(self.gb.get_game(7).date_last_updated,
+                         '2015-01-01 00:00:00')
+        self.assertEqual(self.server.not_modified, 1)
+
+    def test_probe_without_validators(self):
+        self.server.etags = False
+        self.gb.get_game(7)
+        self.assertEqual(self.gb.get_game(7).name, 'game 7')
+        self.assertEqual(len(self.server.paths), 2)
+        probe = self.server.paths[1]
+        self.assertTrue(probe.startswith('/api/games/?'))
+        self.assertTrue('field_list=id,date_last_updated' in probe)
+
+        self.server.updated[7] = '2015-01-01 00:00:00'
+        self.assertEqual(self.gb.get_game(7).date_last_updated,
+                         '2015-01-01 00:00:00')
+        self.assertEqual(len(self.server.paths), 4)
+        self.assertEqual(self.cache.stats.revalidations, 1)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
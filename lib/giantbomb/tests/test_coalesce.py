@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import time
+import threading
+import unittest
+import giantbomb
+from giantbomb.coalesce import SingleFlight
+from giantbomb.standin import Server
+
+
+###############################################################################
+class SingleFlightTest(unittest.TestCase):
+
+    def run_concurrently(self, func, count=10):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(func()))
+                   for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+
+        def slow():
+            time.sleep(0.2)
+            return object()
+
+        results = self.run_concurrently(lambda: flight.do('key', slow))
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(flight.calls, 1)
+        self.assertEqual(flight.coalesced, 9)
+
+        flight.do('key', slow)
+        self.assertEqual(flight.calls, 2)
+
+    def test_errors_are_shared(self):
+        flight = SingleFlight()
+
+        def fail():
+            time.sleep(0.2)
+            raise giantbomb.GiantBombError('boom')
+
+        def call():
+            try:
+                flight.do('key', fail)
+            except giantbomb.GiantBombError as exc:
+                return exc
+
+        results = self.run_concurrently(call, 5)
+        self.assertTrue(all(isinstance(x, giantbomb.GiantBombError)
+                            for x in results))
+        self.assertEqual(flight.calls, 1)
+
+    def test_api_cache_miss_storm(self):
+        server = Server(latency=0.2).start()
+        try:
+            gb = giantbomb.Api('key')
+            gb.base_url = server.url
+            games = self.run_concurrently(lambda: gb.get_game(1))
+            self.assertEqual([x.id for x in games], [1] * 10)
+            self.assertEqual(len(server.paths), 1)
+            self.assertEqual(gb.single_flight.coalesced, 9)
+        finally:
+            server.stop()
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import giantbomb
+from giantbomb.standin import Server
+
+
+###############################################################################
+class CrawlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server(latency=0.02, total=250).start()
+        self.gb = giantbomb.Api('key')
+        self.gb.base_url = self.server.url
+        self.tmpdir = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.tmpdir, 'games.json')
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_ordered_output(self):
+        games = list(self.gb.crawl('games', workers=4, limit=10))
+        self.assertEqual([x.id for x in games], range(1, 251))
+        self.assertTrue(isinstance(games[0], giantbomb.Games))
+        self.assertEqual(len(self.server.paths), 25)
+
+    def test_limit_above_page_size(self):
+        self.server.total = 450
+        games = list(self.gb.crawl('games', limit=200))
+        self.assertEqual([x.id for x in games], range(1, 451))
+
+    def test_short_page_fetched_again(self):
+        load = self.gb._load
+
+        def short(url, *args):
+            resp = load(url, *args)
+            if 'offset=100' in url.split('?')[1].split('&'):
+                resp = dict(resp, results=resp['results'][:30])
+            return resp
+        self.gb._load = short
+        games = list(self.gb.crawl('games'))
+        self.assertEqual([x.id for x in games], range(1, 251))
+        self.assertEqual(len(self.server.paths), 4)
+
+    def test_resume_from_checkpoint(self):
+        games = self.gb.crawl('games', limit=50, checkpoint=self.checkpoint)
+        for _ in range(160):
+            next(games)
+        games.close()
+        with open(self.checkpoint) as fobj:
+            self.assertEqual(json.load(fobj),
+                             {'resource': 'games', 'offset': 150})
+
+        games = self.gb.crawl('games', limit=50, checkpoint=self.checkpoint)
+        self.assertEqual([x.id for x in games], range(151, 251))
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_checkpoint_of_other_resource(self):
+        with open(self.checkpoint, 'w') as fobj:
+            json.dump({'resource': 'people', 'offset': 10}, fobj)
+        games = self.gb.crawl('games', checkpoint=self.checkpoint)
+        self.assertRaises(ValueError, next, games)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import json
+import unittest
+import giantbomb
+from giantbomb import decoders
+from giantbomb.standin import Server
+
+
+###############################################################################
+class DecoderTest(unittest.TestCase):
+
+    def test_default_is_fastest_available(self):
+        self.assertTrue('json' in decoders.available())
+        loads = decoders.get_decoder()
+        self.assertEqual(loads('{"id": 1}'), {'id': 1})
+
+    def test_by_name(self):
+        self.assertTrue(decoders.get_decoder('json') is json.loads)
+        self.assertRaises(ValueError, decoders.get_decoder, 'yaml')
+
+    def test_api_uses_decoder(self):
+        calls = []
+
+        def loads(body):
+            calls.append(body)
+            return json.loads(body)
+
+        server = Server().start()
+        try:
+            gb = giantbomb.Api('key', json_decoder=loads)
+            gb.base_url = server.url
+            self.assertEqual(gb.get_game(5).id, 5)
+            self.assertEqual(len(calls), 1)
+        finally:
+            server.stop()
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import unittest
+import giantbomb
+from giantbomb.standin import Server
+
+
+###############################################################################
+class GetManyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server(total=500).start()
+        self.gb = giantbomb.Api('key')
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_batches_of_a_hundred(self):
+        ids = range(1, 251)
+        games = self.gb.get_many('game', ids)
+        self.assertEqual(sorted(games), ids)
+        self.assertEqual(games[42].id, 42)
+        self.assertTrue(isinstance(games[42], giantbomb.Game))
+        self.assertEqual(len(self.server.paths), 3)
+        self.assertTrue('filter=id:1|2|3|' in self.server.paths[0])
+
+    def test_fallback_for_missing_ids(self):
+        self.server.missing = set([3])
+        # 600 is not in the list answers, 3 does not exist at all
+        games = self.gb.get_many('game', [1, 2, 3, 600, 2])
+        self.assertEqual(sorted(games), [1, 2, 600])
+        self.assertEqual(len(self.server.paths), 3)
+
+    def test_list_without_filter(self):
+        genres = self.gb.get_many('genre', [1, 2])
+        self.assertEqual(sorted(genres), [1, 2])
+        self.assertEqual(len(self.server.paths), 2)
+
+    def test_field_list_keeps_id(self):
+        self.gb.get_many('game', [1], field_list='name')
+        self.assertTrue('field_list=name,id' in self.server.paths[0])
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
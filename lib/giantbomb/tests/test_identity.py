@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import gc
+import pickle
+import unittest
+import giantbomb
+from giantbomb.identity import IdentityMap, resource_of
+from giantbomb.standin import Server
+
+
+###############################################################################
+PC = {'id': 94, 'name': 'PC',
+      'api_detail_url': 'https://www.giantbomb.com/api/platform/3045-94/'}
+
+
+class IdentityMapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.identity = IdentityMap(maxsize=2,
+                                    models={'platform': giantbomb.Platform})
+
+    def test_resource_of(self):
+        self.assertEqual(resource_of(PC['api_detail_url']), 'platform')
+        self.assertEqual(resource_of(None), None)
+
+    def test_resolve_interns_and_enriches(self):
+        first = self.identity.resolve(dict(PC))
+        self.assertTrue(isinstance(first, giantbomb.Platform))
+        second = self.identity.resolve(dict(PC, abbreviation='PC'))
+        self.assertTrue(first is second)
+        self.assertEqual(first.abbreviation, 'PC')
+        self.assertEqual((self.identity.hits, self.identity.misses), (1, 1))
+
+    def test_nested_objects_are_shared(self):
+        games = self.identity.bind(giantbomb.Games)
+        one = games({'id': 1, 'platforms': [dict(PC)]})
+        two = games({'id': 2, 'platforms': [dict(PC)]})
+        self.assertTrue(one.platforms[0] is two.platforms[0])
+
+    def test_bounded_and_weak(self):
+        for gbid in range(5):
+            self.identity.resolve({'id': gbid, 'api_detail_url':
+                                   '/api/platform/%s/' % gbid})
+        gc.collect()
+        self.assertEqual(len(self.identity), 2)
+        self.assertEqual(self.identity.get('platform', 4).id, 4)
+        self.assertEqual(self.identity.get('platform', 0), None)
+
+    def test_pickle_as_plain_model(self):
+        obj = self.identity.resolve(dict(PC))
+        copy = pickle.loads(pickle.dumps(obj, 2))
+        self.assertTrue(type(copy) is giantbomb.Platform)
+        self.assertEqual(copy.name, 'PC')
+
+
+class ApiIdentityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.gb = giantbomb.Api('key')
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_references_resolve_to_one_object(self):
+        games = self.gb.get_games(limit=10)
+        platforms = set(id(x.platforms[0]) for x in games)
+        self.assertEqual(len(platforms), 2)
+        self.assertTrue(isinstance(games[0].platforms[0],
+                                   giantbomb.Platform))
+
+        platform = self.gb.get_platform(95)
+        self.assertTrue(platform is games[0].platforms[0])
+        self.assertEqual(platform.deck, 'All about platform 95')
+
+    def test_with_auto_field_list(self):
+        gb = giantbomb.Api('key', auto_field_list=True)
+        gb.base_url = self.server.url
+        platform = gb.get_games(limit=1)[0].platforms[0]
+        self.assertTrue(gb.get_platform(platform.id) is platform)
+        game = gb.get_game(2)
+        self.assertTrue(gb.get_game(2) is game)
+
+    def test_items_are_enriched_in_place(self):
+        game = self.gb.get_game(3, field_list='id,name')
+        self.assertFalse('deck' in game)
+        self.assertTrue(self.gb.get_game(3) is game)
+        self.assertEqual(game.deck, 'All about game 3')
+
+    def test_disabled(self):
+        gb = giantbomb.Api('key', identity_map=False)
+        gb.base_url = self.server.url
+        games = gb.get_games(limit=4)
+        self.assertFalse(games[0].platforms[0] is games[2].platforms[0])
+        self.assertTrue(type(games[0].platforms[0]) is
+                        giantbomb.models.Reference)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
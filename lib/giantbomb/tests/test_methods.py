@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import inspect
+import unittest
+import giantbomb
+from giantbomb.standin import Server
+
+
+###############################################################################
+class MethodsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.gb = giantbomb.Api('key')
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.gb.close()
+        self.server.stop()
+
+    def test_every_resource_has_methods(self):
+        for name in giantbomb.Api.ITEMS:
+            self.assertTrue(inspect.ismethod(getattr(self.gb, 'get_' + name)))
+        for name in giantbomb.Api.LIST_ITEMS:
+            self.assertTrue(inspect.ismethod(getattr(self.gb, 'get_' + name)))
+            self.assertTrue(inspect.ismethod(getattr(self.gb,
+                                                     'iter_' + name)))
+
+    def test_signatures(self):
+        self.assertEqual(inspect.getargspec(giantbomb.Api.get_game).args,
+                         ['self', 'gbid', 'field_list'])
+        self.assertEqual(inspect.getargspec(giantbomb.Api.get_games).args,
+                         ['self', 'field_list', 'limit', 'offset',
+                          'platforms', 'sort', 'filter'])
+        self.assertEqual(inspect.getargspec(giantbomb.Api.iter_genres).args,
+                         ['self', 'field_list', 'limit', 'offset', 'prefetch',
+                          'stream'])
+        self.assertIn('games', giantbomb.Api.get_games.__doc__)
+
+    def test_calls(self):
+        self.assertEqual(self.gb.get_game(3).id, 3)
+        self.assertEqual(self.gb.get_game(self.gb.get_game(4)).id, 4)
+        self.assertEqual([x.id for x in self.gb.get_games(None, 2, 5)],
+                         [6, 7])
+        self.assertEqual(len(list(self.gb.iter_games(limit=50))), 250)
+        self.assertEqual(len(self.gb.get_games(filter={'id': '1|2'})), 2)
+        # nothing is sent for the arguments left out
+        path = [x for x in self.server.paths if '/games/' in x][0]
+        self.assertEqual(sorted(x.split('=')[0] for x in
+                                path.split('?')[1].split('&')),
+                         ['api_key', 'format', 'limit', 'offset'])
+
+    def test_invalid_arguments(self):
+        self.assertRaises(TypeError, self.gb.get_games, plat=94)
+        self.assertRaises(TypeError, self.gb.get_genres, sort='name:asc')
+        self.assertRaises(TypeError, self.gb.iter_games, plat=94)
+        self.assertRaises(TypeError, self.gb.get_items, 'games',
+                          ('limit', ), 'Games', offset=1)
+        self.assertEqual(self.server.paths, [])
+
+    def test_unknown_names(self):
+        self.assertRaises(AttributeError, getattr, self.gb, 'get_nothing')
+        self.assertRaises(AttributeError, getattr, self.gb, 'iter_game')
+        self.assertFalse(hasattr(self.gb, 'nothing'))
+
+    def test_bare_names(self):
+        self.assertEqual(self.gb.game(2).id, 2)
+        self.assertEqual(len(self.gb.games(limit=3)), 3)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
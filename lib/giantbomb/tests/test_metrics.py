@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import unittest
+import giantbomb
+from giantbomb.metrics import (Collector, Fanout, Histogram, Instrumentation,
+                               PHASES)
+from giantbomb.transport import UrllibTransport
+from giantbomb.standin import Server
+
+
+###############################################################################
+class Recorder(Instrumentation):
+
+    def __init__(self):
+        self.calls = []
+
+    def timing(self, resource, phase, seconds):
+        self.calls.append(('timing', resource, phase))
+
+    def transferred(self, resource, nbytes):
+        self.calls.append(('transferred', resource, nbytes))
+
+    def error(self, resource, status_code):
+        self.calls.append(('error', resource, status_code))
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_buckets(self):
+        histogram = Histogram((1, 2, 3))
+        for value in (0.5, 1, 1.5, 2.5, 10):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 15.5)
+        self.assertEqual(histogram.max, 10)
+
+    def test_quantile(self):
+        histogram = Histogram((1, 2, 3))
+        self.assertEqual(histogram.quantile(0.5), None)
+        for value in [0.5] * 50 + [2.5] * 50:
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 1)
+        self.assertEqual(histogram.quantile(0.75), 2.5)
+        self.assertEqual(histogram.quantile(1), 2.5)
+
+
+class ApiMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.collector = Collector()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def make_api(self, **kwargs):
+        gb = giantbomb.Api('key', instrumentation=self.collector, **kwargs)
+        gb.base_url = self.server.url
+        return gb
+
+    def test_phases(self):
+        gb = self.make_api()
+        gb.get_game(1)
+        gb.get_game(2)
+        gb.get_games(limit=10)
+        gb.search('game 1', limit=5)
+        for phase in PHASES:
+            self.assertEqual(self.collector.histogram('game', phase).count,
+                             1 if phase == 'connect' else 2)
+        self.assertEqual(self.collector.histogram('games', 'construct').count,
+                         1)
+        self.assertEqual(self.collector.histogram('search', 'decode').count,
+                         1)
+        self.assertTrue(self.collector.bytes['games'] >
+                        self.collector.bytes['game'] > 0)
+        self.assertIn('games', self.collector.report())
+        gb.close()
+
+    def test_unpooled_transport(self):
+        gb = self.make_api(transport=UrllibTransport())
+        gb.get_game(1)
+        self.assertEqual(self.collector.histogram('game', 'connect'), None)
+        self.assertEqual(self.collector.histogram('game', 'ttfb').count, 1)
+
+    def test_errors(self):
+        self.server.missing.add(3)
+        gb = self.make_api()
+        self.assertRaises(giantbomb.GiantBombError, gb.get_game, 3)
+        self.assertEqual(self.collector.errors, {('game', 101): 1})
+        self.assertEqual(self.collector.snapshot()['errors'],
+                         {'game': {'101': 1}})
+        gb.close()
+
+    def test_fanout(self):
+        first, second = Recorder(), Recorder()
+        gb = giantbomb.Api('key', instrumentation=[first, second])
+        gb.base_url = self.server.url
+        self.assertTrue(isinstance(gb.instrumentation, Fanout))
+        gb.get_game(1)
+        self.assertEqual(first.calls, second.calls)
+        self.assertEqual([x[2] for x in first.calls
+                          if x[0] == 'timing'], list(PHASES))
+        gb.close()
+
+    def test_disabled(self):
+        gb = giantbomb.Api('key')
+        gb.base_url = self.server.url
+        self.assertEqual(gb.instrumentation, None)
+        self.assertEqual(gb.get_game(1).id, 1)
+        gb.close()
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
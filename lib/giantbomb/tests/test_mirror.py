@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import os
+import inspect
+import shutil
+import tempfile
+import unittest
+import giantbomb
+from giantbomb.mirror import Mirror
+from giantbomb.sync import Sync
+from giantbomb.standin import Server
+
+
+###############################################################################
+GAMES = [{'id': 1, 'name': 'Portal', 'deck': 'Thinking with portals',
+          'platforms': [{'id': 94, 'name': 'PC'}, {'id': 35, 'name': 'PS3'}],
+          'franchises': [{'id': 7, 'name': 'Portal'}]},
+         {'id': 2, 'name': 'Portal 2', 'platforms': [{'id': 94,
+                                                      'name': 'PC'}]},
+         {'id': 3, 'name': 'Half-Life: Portal Edition',
+          'platforms': [{'id': 35, 'name': 'PS3'}]}]
+
+
+class MirrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'mirror.db')
+        self.mirror = Mirror(self.path)
+        self.mirror.upsert_many('games', GAMES)
+
+    def tearDown(self):
+        self.mirror.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_get_item(self):
+        game = self.mirror.get_game(1)
+        self.assertTrue(isinstance(game, giantbomb.Game))
+        self.assertEqual(game.name, 'Portal')
+        self.assertEqual([x.name for x in game.platforms], ['PC', 'PS3'])
+        self.assertEqual(self.mirror.get_game(1, field_list='id').keys(),
+                         ['id'])
+        try:
+            self.mirror.get_game(99)
+        except giantbomb.GiantBombError as exc:
+            self.assertEqual(exc.status_code, giantbomb.OBJECT_NOT_FOUND)
+        else:
+            self.fail('Expected a GiantBombError')
+
+    def test_list_filters(self):
+        games = self.mirror.get_games(platforms=94)
+        self.assertTrue(isinstance(games[0], giantbomb.Games))
+        self.assertEqual([x.id for x in games], [1, 2])
+        self.assertEqual([x.id for x in self.mirror.get_games(
+            filter='franchises:7')], [1])
+        self.assertEqual([x.id for x in self.mirror.get_games(
+            filter={'name': 'portal 2'})], [2])
+        self.assertEqual([x.id for x in self.mirror.get_games(
+            sort='name:asc', limit=2, offset=1)], [1, 2])
+        self.assertRaises(ValueError, self.mirror.get_games, sort='deck:asc')
+
+    def test_upsert_merges_and_relinks(self):
+        self.mirror.upsert('game', {'id': 1, 'name': 'Portal',
+                                    'platforms': [{'id': 35}]})
+        self.assertEqual(self.mirror.get_game(1).deck,
+                         'Thinking with portals')
+        self.assertEqual([x.id for x in self.mirror.get_games(
+            platforms=94)], [2])
+        self.assertEqual(self.mirror.count('games'), 3)
+
+    def test_search_ranking(self):
+        results = self.mirror.search('portal')
+        self.assertEqual([x.id for x in results], [1, 2, 3])
+        self.assertEqual(results[0].resource_type, 'game')
+        self.assertEqual(self.mirror.search('portal', resources='franchise'),
+                         [])
+
+    def test_search_filter_and_wildcards(self):
+        self.assertEqual([x.id for x in self.mirror.search(
+            'portal', gbfilter={'platforms': 35})], [1, 3])
+        self.assertEqual([x.id for x in self.mirror.search(
+            'portal', gbfilter='id:2|3')], [2, 3])
+        self.mirror.upsert('game', {'id': 4, 'name': '100% Orange_Juice'})
+        self.assertEqual([x.id for x in self.mirror.search('%')], [4])
+        self.assertEqual(self.mirror.search('Orang__'), [])
+        self.assertEqual([x.id for x in self.mirror.get_games(
+            filter={'name': '_'})], [4])
+
+    def test_generated_methods(self):
+        self.assertEqual(inspect.getargspec(Mirror.get_games).args,
+                         ['self', 'field_list', 'limit', 'offset',
+                          'platforms', 'sort', 'filter'])
+        self.assertEqual(self.mirror.get_game(2).name, 'Portal 2')
+        self.assertRaises(TypeError, self.mirror.get_games, plat=94)
+        self.assertRaises(AttributeError, getattr, self.mirror,
+                          'get_nothing')
+
+    def test_generated_arguments_are_filters(self):
+        self.mirror.upsert_many('user_reviews', [
+            {'id': 10, 'game': {'id': 1, 'name': 'Portal'}},
+            {'id': 11, 'game': {'id': 2, 'name': 'Portal 2'}}])
+        self.assertEqual([x.id for x in self.mirror.get_user_reviews(
+            game=2)], [11])
+        for resource, (_, valid_args, _) in giantbomb.Api.LIST_ITEMS.items():
+            method = getattr(self.mirror, 'get_' + resource)
+            for arg in valid_args:
+                if arg not in ('field_list', 'limit', 'offset', 'sort',
+                               'filter'):
+                    method(**{arg: 1})
+
+    def test_empty_id_filters(self):
+        self.assertEqual(self.mirror.get_games(filter={'id': ''}), [])
+        self.assertEqual(self.mirror.get_games(filter='platforms:|'), [])
+        self.assertEqual(self.mirror.search('portal', gbfilter='id:'), [])
+
+    def test_resources_without_items(self):
+        self.mirror.upsert_many('types', [{'id': 1, 'name': 'Game'}])
+        self.mirror.upsert('video_types', {'id': 2, 'name': 'Trailers'})
+        self.assertEqual([x.name for x in self.mirror.get_types()], ['Game'])
+        self.assertEqual([x.id for x in self.mirror.get_video_types()], [2])
+        self.assertEqual(self.mirror.count('types'), 1)
+
+    def test_persists(self):
+        self.mirror.close()
+        self.mirror = Mirror(self.path)
+        self.assertEqual(self.mirror.get_game(2).name, 'Portal 2')
+
+
+class MirrorLiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server(total=30).start()
+        self.gb = giantbomb.Api('key')
+        self.gb.base_url = self.server.url
+        self.mirror = Mirror(':memory:', api=self.gb)
+
+    def tearDown(self):
+        self.server.stop()
+        self.mirror.close()
+
+    def test_sync_store(self):
+        Sync(self.gb, store=self.mirror).sync('games')
+        self.assertEqual(self.mirror.count('game'), 30)
+        self.assertEqual(self.mirror.get_game(12).name, 'games 12')
+        self.assertEqual(len(self.server.paths), 1)
+
+    def test_live_fallback(self):
+        self.assertEqual(self.mirror.get_game(5).name, 'game 5')
+        self.assertEqual(self.mirror.get_game(5).name, 'game 5')
+        self.assertEqual(self.mirror.live_lookups, 1)
+        self.assertEqual(len(self.server.paths), 1)
+
+        self.mirror.fallback = False
+        self.assertRaises(giantbomb.GiantBombError, self.mirror.get_game, 6)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import pickle
+import unittest
+import giantbomb
+from giantbomb.models import Reference, ResourceList
+
+
+###############################################################################
+GAME = {'id': 26423,
+        'name': 'Call of Duty: Black Ops',
+        'image': {'small_url': 'http://example.com/small.png'},
+        'platforms': [{'id': 94, 'name': 'PC', 'abbreviation': 'PC'},
+                      {'id': 35, 'name': 'PlayStation 3'}],
+        'brand_new_field': [{'id': 1}]}
+
+
+class ModelTest(unittest.TestCase):
+
+    def test_known_fields_are_slots(self):
+        game = giantbomb.Game(GAME)
+        self.assertFalse(hasattr(game, '__dict__'))
+        self.assertTrue('platforms' in giantbomb.Game.FIELDS)
+        self.assertTrue('platforms' in giantbomb.Games.FIELDS)
+        self.assertEqual(game.id, 26423)
+        self.assertEqual(repr(game), '<26423: Call of Duty: Black Ops>')
+
+    def test_missing_field(self):
+        game = giantbomb.Game({'id': 1})
+        self.assertRaises(AttributeError, getattr, game, 'name')
+        self.assertRaises(AttributeError, getattr, game, 'nothing')
+
+    def test_lazy_nested_objects(self):
+        game = giantbomb.Game(GAME)
+        platforms = game.platforms
+        self.assertTrue(isinstance(platforms, ResourceList))
+        self.assertTrue(isinstance(platforms[0], Reference))
+        self.assertTrue(game.platforms is platforms)
+        self.assertEqual([x.name for x in platforms], ['PC', 'PlayStation 3'])
+        # dict style access still works
+        self.assertEqual(platforms[0]['abbreviation'], 'PC')
+        self.assertEqual(game.image.get('small_url'),
+                         'http://example.com/small.png')
+        self.assertRaises(KeyError, platforms[1].__getitem__, 'nothing')
+
+    def test_overflow(self):
+        game = giantbomb.Game(GAME)
+        self.assertEqual(game.brand_new_field[0].id, 1)
+        game.annotation = 'mine'
+        giantbomb.update(game, {'name': 'renamed'})
+        self.assertEqual(game.annotation, 'mine')
+        self.assertEqual(game.name, 'renamed')
+
+    def test_pickle(self):
+        game = giantbomb.Game(GAME)
+        game.platforms
+        for protocol in (0, 2):
+            copy = pickle.loads(pickle.dumps(game, protocol))
+            self.assertTrue(isinstance(copy, giantbomb.Game))
+            self.assertEqual(copy.platforms[1].name, 'PlayStation 3')
+            self.assertEqual(copy.brand_new_field[0].id, 1)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import time
+import unittest
+import giantbomb
+from giantbomb.standin import Server
+
+
+###############################################################################
+class PaginationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server(total=250).start()
+        self.gb = giantbomb.Api('key')
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_iter_walks_every_page(self):
+        games = list(self.gb.iter_games())
+        self.assertEqual([x.id for x in games], range(1, 251))
+        self.assertTrue(isinstance(games[0], giantbomb.Games))
+        self.assertEqual(len(self.server.paths), 3)
+
+    def test_iter_is_lazy(self):
+        games = self.gb.iter_games(limit=10)
+        self.assertEqual(len(self.server.paths), 0)
+        self.assertEqual(next(games).id, 1)
+        self.assertEqual(len(self.server.paths), 1)
+
+    def test_offset_and_page_size(self):
+        games = list(self.gb.iter_games(offset=200, limit=20))
+        self.assertEqual([x.id for x in games], range(201, 251))
+        self.assertEqual(len(self.server.paths), 3)
+
+    def test_prefetch(self):
+        games = self.gb.iter_platforms(limit=50, prefetch=True)
+        self.assertEqual(next(games).id, 1)
+        for _ in range(100):
+            if len(self.server.paths) == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(self.server.paths), 2)
+        self.assertEqual(len(list(games)), 249)
+
+    def test_iter_search(self):
+        results = list(self.gb.iter_search('uscf', limit=100))
+        self.assertEqual(len(results), 250)
+        self.assertTrue(isinstance(results[0], giantbomb.SearchResult))
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import unittest
+import threading
+import giantbomb
+from giantbomb.standin import Server
+
+
+###############################################################################
+class LazyReferenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.gb = giantbomb.Api('key')
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_loads_on_first_missing_field(self):
+        games = self.gb.get_games(limit=4)
+        platform = games[0].platforms[0]
+        self.assertEqual(platform.name, 'Platform 95')
+        self.assertEqual(len(self.server.paths), 1)
+        self.assertEqual(platform.deck, 'All about platform 95')
+        self.assertTrue(self.server.paths[1].startswith('/api/platform/95/'))
+        self.assertEqual(games[2].platforms[0].description,
+                         platform.description)
+        self.assertEqual(len(self.server.paths), 2)
+        self.assertEqual(self.gb.identity.loads, 1)
+        self.assertEqual(repr(games[1].platforms[0]), '<94: Platform 94>')
+        self.assertEqual(len(self.server.paths), 2)
+
+    def test_missing_field_after_load(self):
+        platform = self.gb.get_games(limit=1)[0].platforms[0]
+        self.assertRaises(AttributeError, getattr, platform, 'install_base')
+        self.assertRaises(AttributeError, getattr, platform, 'install_base')
+        self.assertEqual(len(self.server.paths), 2)
+
+    def test_presence_does_not_load(self):
+        platform = self.gb.get_games(limit=1)[0].platforms[0]
+        self.assertFalse('deck' in platform)
+        self.assertEqual(platform.get('deck'), None)
+        self.assertEqual(platform.get('name'), 'Platform 95')
+        self.assertEqual(len(self.server.paths), 1)
+        self.assertEqual(platform['deck'], 'All about platform 95')
+        self.assertTrue('deck' in platform)
+        self.assertEqual(len(self.server.paths), 2)
+
+    def test_concurrent_readers_wait(self):
+        platform = self.gb.get_games(limit=1)[0].platforms[0]
+        self.server.latency = 0.05
+        decks = []
+        threads = [threading.Thread(
+            target=lambda: decks.append(platform.deck)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(decks, ['All about platform 95'] * 3)
+        self.assertEqual(self.gb.identity.loads, 1)
+
+    def test_disabled(self):
+        gb = giantbomb.Api('key', lazy_references=False)
+        gb.base_url = self.server.url
+        platform = gb.get_games(limit=1)[0].platforms[0]
+        self.assertRaises(AttributeError, getattr, platform, 'deck')
+        self.assertEqual(len(self.server.paths), 1)
+
+
+class PrefetchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def check_prefetch(self, gb):
+        gb.base_url = self.server.url
+        games = gb.get_games(limit=20)
+        self.assertTrue(gb.prefetch(games, 'platforms', 'developers') is
+                        games)
+        self.assertEqual(len(self.server.paths), 2)
+        self.assertTrue('filter=id:' in self.server.paths[1])
+        self.assertEqual(sorted(x.platforms[0].deck for x in games[:2]),
+                         ['All about platforms 94', 'All about platforms 95'])
+        self.assertEqual(len(self.server.paths), 2)
+
+    def test_batched(self):
+        self.check_prefetch(giantbomb.Api('key'))
+
+    def test_without_identity_map(self):
+        self.check_prefetch(giantbomb.Api('key', identity_map=False))
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
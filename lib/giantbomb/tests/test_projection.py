@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import pickle
+import urlparse
+import threading
+import unittest
+import giantbomb
+from giantbomb.projection import FieldProfiler
+from giantbomb.standin import Server
+
+
+###############################################################################
+class ProjectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.profiler = FieldProfiler(warmup=1)
+        self.gb = giantbomb.Api('key', auto_field_list=self.profiler)
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def field_list(self):
+        '''field_list of the last request the server got'''
+
+        query = urlparse.urlsplit(self.server.paths[-1]).query
+        return dict(urlparse.parse_qsl(query)).get('field_list')
+
+    def test_field_list_learned(self):
+        games = self.gb.get_games(limit=5)
+        self.assertEqual(self.field_list(), None)
+        self.assertTrue(isinstance(games[0], giantbomb.Games))
+        [x.name for x in games]
+
+        games = self.gb.get_games(limit=5)
+        self.assertEqual(self.field_list(), 'id,name')
+        self.assertEqual(games[0].name, 'games 1')
+        # detail lookups have their own profile
+        self.gb.get_game(1)
+        self.gb.get_game(1)
+        self.assertEqual(self.field_list(), 'id')
+
+    def test_missing_field_fetched(self):
+        [x.name for x in self.gb.get_games(limit=5)]
+        games = self.gb.get_games(limit=5)
+        self.assertEqual(self.field_list(), 'id,name')
+        requests = len(self.server.paths)
+        self.assertEqual(games[0].deck, 'All about game 1')
+        self.assertTrue(self.server.paths[-1].startswith('/api/game/1/'))
+        self.assertEqual(len(self.server.paths), requests + 1)
+        # only once per object
+        games[0].description
+        self.assertEqual(len(self.server.paths), requests + 1)
+        self.assertEqual(self.profiler.lazy_fetches, 1)
+        self.assertTrue('deck' in self.profiler.fields['games'])
+        self.assertRaises(AttributeError, getattr, games[0], 'nothing')
+
+    def test_get_missing_field(self):
+        [x.name for x in self.gb.get_games(limit=5)]
+        games = self.gb.get_games(limit=5)
+        requests = len(self.server.paths)
+        # unknown keys are absent without a request
+        self.assertEqual(games[0].get('nothing'), None)
+        self.assertFalse('nothing' in games[0])
+        self.assertEqual(len(self.server.paths), requests)
+        self.assertEqual(games[0].get('deck'), 'All about game 1')
+        self.assertTrue('description' in games[1])
+        self.assertEqual(len(self.server.paths), requests + 2)
+        self.assertEqual(self.profiler.lazy_fetches, 2)
+        self.assertTrue(set(['deck', 'description']) <=
+                        self.profiler.fields['games'])
+        self.gb.get_games(limit=5)
+        self.assertEqual(self.field_list(), 'deck,description,id,name')
+
+    def test_concurrent_missing_field(self):
+        [x.name for x in self.gb.get_games(limit=1)]
+        game = self.gb.get_games(limit=1)[0]
+        self.server.latency = 0.05
+        decks = []
+        threads = [threading.Thread(target=lambda: decks.append(game.deck))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(decks, ['All about game 1'] * 3)
+        self.assertEqual(self.profiler.lazy_fetches, 1)
+
+    def test_shared_profiler(self):
+        other = Server().start()
+        try:
+            first, second = [giantbomb.Api('key', identity_map=False,
+                                           auto_field_list=self.profiler)
+                             for _ in range(2)]
+            first.base_url = self.server.url
+            second.base_url = other.url
+            [x.name for x in first.get_games(limit=1)]
+            first.get_games(limit=1)
+            game = second.get_games(limit=1)[0]
+            requests = len(self.server.paths)
+            game.deck
+            self.assertEqual(len(self.server.paths), requests)
+            self.assertEqual(len(other.paths), 2)
+        finally:
+            other.stop()
+
+    def test_repr_not_profiled(self):
+        game = self.gb.get_game(3)
+        self.assertEqual(repr(game), '<3: game 3>')
+        self.assertEqual(self.profiler.fields['game'], set())
+
+    def test_explicit_field_list_wins(self):
+        self.gb.get_games(limit=5)
+        games = self.gb.get_games(limit=5, field_list='id')
+        self.assertEqual(self.field_list(), 'id')
+        self.assertRaises(AttributeError, getattr, games[0], 'name')
+
+    def test_pickle_tracked(self):
+        game = self.gb.get_game(3)
+        copy = pickle.loads(pickle.dumps(game))
+        self.assertTrue(type(copy) is giantbomb.Game)
+        self.assertEqual(copy.name, 'game 3')
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
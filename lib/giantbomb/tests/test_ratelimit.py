@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import os
+import time
+import urllib2
+import shutil
+import tempfile
+import threading
+import unittest
+import giantbomb
+from giantbomb.ratelimit import RateLimiter, FileBackend
+from giantbomb.standin import Server
+
+
+###############################################################################
+class RateLimiterTest(unittest.TestCase):
+
+    def test_burst_then_steady_rate(self):
+        limiter = RateLimiter(rate=50, burst=5)
+        start = time.time()
+        for _ in range(10):
+            limiter.acquire('games')
+        elapsed = time.time() - start
+        # 5 free tokens, then 5 more at 50 per second
+        self.assertTrue(0.08 < elapsed < 0.5, elapsed)
+
+    def test_buckets_per_resource(self):
+        limiter = RateLimiter(rate=1, burst=1)
+        self.assertEqual(limiter.reserve('games'), 0)
+        self.assertEqual(limiter.reserve('platforms'), 0)
+        self.assertTrue(limiter.reserve('games') > 0)
+
+    def test_shared_between_threads(self):
+        limiter = RateLimiter(rate=100, burst=1)
+        waits = []
+
+        def worker():
+            waits.append(limiter.reserve('games'))
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # every caller got its own slot, 10ms apart
+        self.assertAlmostEqual(max(waits), 0.09, places=2)
+
+    def test_adaptive_rate(self):
+        limiter = RateLimiter(rate=10, burst=10, recovery=0.25)
+        limiter.throttled('games')
+        self.assertEqual(limiter.current_rate('games'), 5)
+        self.assertTrue(limiter.reserve('games') > 0)
+        limiter.succeeded('games')
+        limiter.succeeded('games')
+        self.assertEqual(limiter.current_rate('games'), 10)
+        limiter.succeeded('games')
+        self.assertEqual(limiter.current_rate('games'), 10)
+
+
+class FileBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'limits.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_shared_between_limiters(self):
+        first = RateLimiter(rate=1, burst=2, backend=FileBackend(self.path))
+        second = RateLimiter(rate=1, burst=2, backend=FileBackend(self.path))
+        self.assertEqual(first.reserve('games'), 0)
+        self.assertEqual(second.reserve('games'), 0)
+        self.assertTrue(first.reserve('games') > 0)
+        second.throttled('games')
+        self.assertEqual(first.current_rate('games'), 0.5)
+
+
+class ApiRateLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.limiter = RateLimiter(rate=1000, burst=10)
+        self.gb = giantbomb.Api('key', rate_limiter=self.limiter)
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_http_throttling(self):
+        self.server.http_status = 429
+        self.assertRaises(urllib2.HTTPError, self.gb.get_game, 1)
+        self.assertEqual(self.limiter.current_rate('game'), 500)
+        self.assertEqual(self.limiter.current_rate('games'), 1000)
+
+    def test_status_code_throttling(self):
+        self.server.status_code = 107
+        self.server.error = 'Rate limit exceeded'
+        try:
+            self.gb.get_games()
+        except giantbomb.GiantBombError as exc:
+            self.assertEqual(exc.status_code, 107)
+        else:
+            self.fail('no error raised')
+        self.assertEqual(self.limiter.throttle_count, 1)
+        self.assertEqual(self.limiter.current_rate('games'), 500)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
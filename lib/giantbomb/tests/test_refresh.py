@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import time
+import unittest
+import giantbomb
+from giantbomb.cache import MemoryCache, normalize_url
+from giantbomb.refresh import Refresher
+from giantbomb.standin import Server
+
+
+###############################################################################
+class RefreshTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.cache = MemoryCache()
+
+    def tearDown(self):
+        self.gb.close()
+        self.server.stop()
+
+    def make_api(self, **kwargs):
+        self.gb = giantbomb.Api('key', cache=self.cache, identity_map=False,
+                                stale_while_revalidate=Refresher(**kwargs))
+        self.gb.base_url = self.server.url
+        return self.gb
+
+    def expire(self, gbid, age=1):
+        '''Make the cached response of game gbid expired for age seconds'''
+
+        key = normalize_url(self.gb._build_url('game/%s' % gbid))
+        self.cache.get_entry(key, stale=True).expires = time.time() - age
+
+    def test_serves_stale_and_refreshes(self):
+        gb = self.make_api()
+        self.assertEqual(gb.get_game(1).date_last_updated,
+                         '2014-09-01 12:00:00')
+        self.expire(1)
+        self.server.updated[1] = '2015-01-01 00:00:00'
+        self.server.latency = 0.3
+        start = time.time()
+        self.assertEqual(gb.get_game(1).date_last_updated,
+                         '2014-09-01 12:00:00')
+        self.assertTrue(time.time() - start < 0.2)
+        self.assertTrue(gb.refresher.wait(2))
+        self.server.latency = 0
+        requests = len(self.server.paths)
+        self.assertEqual(gb.get_game(1).date_last_updated,
+                         '2015-01-01 00:00:00')
+        self.assertEqual(len(self.server.paths), requests)
+        self.assertEqual((gb.refresher.served, gb.refresher.scheduled),
+                         (1, 1))
+
+    def test_revalidates_unchanged(self):
+        gb = self.make_api()
+        gb.get_game(1)
+        self.expire(1)
+        gb.get_game(1)
+        self.assertTrue(gb.refresher.wait(2))
+        self.assertEqual(self.server.not_modified, 1)
+        self.assertEqual(self.cache.stats.revalidations, 1)
+
+    def test_deduplicated(self):
+        gb = self.make_api()
+        gb.get_game(1)
+        self.expire(1)
+        self.server.latency = 0.2
+        for _ in range(5):
+            gb.get_game(1)
+        self.assertTrue(gb.refresher.wait(2))
+        self.assertEqual(gb.refresher.scheduled, 1)
+        self.assertEqual(gb.refresher.deduplicated, 4)
+        self.assertEqual(len(self.server.paths), 2)
+
+    def test_rate_limited(self):
+        gb = self.make_api(rate=0.01, burst=1)
+        for gbid in (1, 2):
+            gb.get_game(gbid)
+            self.expire(gbid)
+        gb.get_game(1)
+        gb.get_game(2)
+        self.assertTrue(gb.refresher.wait(2))
+        self.assertEqual((gb.refresher.scheduled, gb.refresher.dropped),
+                         (1, 1))
+
+    def test_too_stale_blocks(self):
+        gb = self.make_api(max_stale=60)
+        gb.get_game(1)
+        self.expire(1, age=120)
+        self.server.updated[1] = '2015-01-01 00:00:00'
+        self.assertEqual(gb.get_game(1).date_last_updated,
+                         '2015-01-01 00:00:00')
+        self.assertEqual(gb.refresher.served, 0)
+
+    def test_failed_refresh_keeps_entry(self):
+        gb = self.make_api()
+        gb.get_game(1)
+        self.expire(1)
+        self.server.error_rate = 1
+        self.assertEqual(gb.get_game(1).id, 1)
+        self.assertTrue(gb.refresher.wait(2))
+        self.assertEqual(gb.refresher.failed, 1)
+        self.assertEqual(gb.get_game(1).id, 1)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
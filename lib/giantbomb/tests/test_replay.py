@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import os
+import json
+import shutil
+import urllib2
+import tempfile
+import unittest
+import giantbomb
+from giantbomb.replay import (Cassette, CassetteMiss, CassetteTransport,
+                              ONCE, RECORD, REPLAY)
+from giantbomb.standin import Server
+
+
+###############################################################################
+class ReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cassette.json')
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def make_api(self, transport, key='key'):
+        gb = giantbomb.Api(key, transport=transport)
+        gb.base_url = self.server.url
+        return gb
+
+    def record(self):
+        transport = CassetteTransport(self.path, RECORD)
+        gb = self.make_api(transport, 'secret-key')
+        gb.get_game(1)
+        gb.get_games(limit=10)
+        gb.search('game 2', limit=5)
+        transport.save()
+        return transport
+
+    def test_record_strips_api_key(self):
+        self.assertEqual(self.record().recorded, 3)
+        with open(self.path) as fobj:
+            text = fobj.read()
+        self.assertNotIn('secret-key', text)
+        self.assertEqual(len(json.loads(text)['responses']), 3)
+
+    def test_replay_offline(self):
+        self.record()
+        self.server.stop()
+        transport = CassetteTransport(self.path)
+        gb = self.make_api(transport, 'another-key')
+        self.assertEqual(gb.get_game(1).name, 'game 1')
+        self.assertEqual(len(gb.get_games(limit=10)), 10)
+        self.assertEqual(gb.search('game 2', limit=5)[0].name, 'game 2')
+        self.assertEqual(transport.played, 3)
+        self.assertRaises(CassetteMiss, gb.get_game, 2)
+        self.server = Server().start()
+
+    def test_once_records_misses(self):
+        self.record()
+        transport = CassetteTransport(self.path, ONCE)
+        gb = self.make_api(transport)
+        requests = len(self.server.paths)
+        gb.get_game(1)
+        gb.get_game(2)
+        self.assertEqual(len(self.server.paths), requests + 1)
+        self.assertEqual((transport.played, transport.recorded), (1, 1))
+        transport.save()
+        self.assertIn(gb._build_url('game/2'), Cassette(self.path))
+
+    def test_episodes_and_errors(self):
+        cassette = Cassette()
+        url = self.server.url + 'game/1/'
+        cassette.record(url, 502, [], '')
+        cassette.record(url, 200, [('Content-Type', 'application/json')],
+                        json.dumps({'status_code': 1, 'error': 'OK',
+                                    'results': {'id': 1}}))
+        transport = CassetteTransport(cassette, REPLAY)
+        with self.assertRaises(urllib2.HTTPError) as ctx:
+            transport.open(url)
+        self.assertEqual(ctx.exception.code, 502)
+        for i in range(2):
+            self.assertEqual(json.loads(transport.open(url).read())['results'],
+                             {'id': 1})
+
+    def test_standin_serves_cassette(self):
+        gb = self.make_api(None)
+        cassette = Cassette()
+        cassette.record(gb._build_url('game/7'), 200, [], json.dumps({
+            'status_code': 1, 'error': 'OK',
+            'results': {'id': 7, 'name': 'Recorded'}}))
+        self.server.cassette = cassette
+        self.assertEqual(gb.get_game(7).name, 'Recorded')
+        self.assertEqual(gb.get_game(8).name, 'game 8')
+
+    def test_standin_errors(self):
+        self.server.error_rate = 1
+        gb = self.make_api(None)
+        with self.assertRaises(urllib2.HTTPError) as ctx:
+            gb.get_game(1)
+        self.assertEqual(ctx.exception.code, 502)
+        self.assertEqual(self.server.errors, 1)
+
+    def test_standin_throttle(self):
+        self.server.throttle = 2
+        self.server.window = 60
+        gb = self.make_api(None)
+        gb.get_game(1)
+        gb.get_game(2)
+        with self.assertRaises(urllib2.HTTPError) as ctx:
+            gb.get_game(3)
+        self.assertEqual(ctx.exception.code, 420)
+        self.assertEqual(giantbomb.retry_after(ctx.exception), 60)
+        self.assertEqual(self.server.throttled_requests, 1)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import time
+import socket
+import urllib2
+import unittest
+import giantbomb
+from cStringIO import StringIO
+from giantbomb.replay import CassetteMiss
+from giantbomb.retry import RetryPolicy, is_transient
+from giantbomb.transport import Transport, UrllibTransport
+from giantbomb.standin import Server
+
+
+###############################################################################
+class FlakyTransport(Transport):
+    '''Fails the first calls with errors, delays them by delays'''
+
+    def __init__(self, errors=(), delays=()):
+        self.transport = UrllibTransport()
+        self.errors = list(errors)
+        self.delays = list(delays)
+        self.calls = 0
+
+    def open(self, url, headers=None):
+        self.calls += 1
+        if self.delays:
+            time.sleep(self.delays.pop(0))
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.transport.open(url, headers)
+
+
+def http_error(code, retry_after=None):
+    headers = {}
+    if retry_after is not None:
+        headers['Retry-After'] = str(retry_after)
+    return urllib2.HTTPError('http://localhost/', code, 'Error', headers,
+                             StringIO(''))
+
+
+class PolicyTest(unittest.TestCase):
+
+    def test_is_transient(self):
+        self.assertTrue(is_transient(http_error(503)))
+        self.assertTrue(is_transient(http_error(429)))
+        self.assertFalse(is_transient(http_error(404)))
+        self.assertTrue(is_transient(urllib2.URLError(socket.timeout())))
+        self.assertTrue(is_transient(socket.error(104, 'reset')))
+        self.assertFalse(is_transient(CassetteMiss('not recorded')))
+        self.assertTrue(is_transient(giantbomb.GiantBombError('', 107)))
+        self.assertFalse(is_transient(giantbomb.GiantBombError('', 101)))
+        self.assertFalse(is_transient(ValueError()))
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=0.1, max_backoff=0.3, jitter=False)
+        self.assertEqual([policy.delay(x) for x in range(3)],
+                         [0.1, 0.2, 0.3])
+        self.assertEqual(policy.delay(0, http_error(503, 2)), 2)
+        policy = RetryPolicy(backoff=1)
+        policy.random = lambda: 0.5
+        self.assertEqual(policy.delay(2), 2)
+
+    def test_hedge_delay(self):
+        policy = RetryPolicy(hedge=True, min_samples=10)
+        self.assertEqual(policy.current_hedge_delay(), None)
+        policy._latencies.extend(x / 100.0 for x in range(100, 0, -1))
+        self.assertEqual(policy.current_hedge_delay(), 0.96)
+        policy.hedge_delay = 0.2
+        self.assertEqual(policy.current_hedge_delay(), 0.2)
+
+
+class ApiRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+        self.sleeps = []
+
+    def tearDown(self):
+        self.server.stop()
+
+    def make_api(self, transport, **kwargs):
+        policy = RetryPolicy(**kwargs)
+        policy.sleep = self.sleeps.append
+        gb = giantbomb.Api('key', transport=transport, retry=policy)
+        gb.base_url = self.server.url
+        return gb
+
+    def test_retries_transient_errors(self):
+        transport = FlakyTransport([http_error(502),
+                                    urllib2.URLError(socket.timeout())])
+        gb = self.make_api(transport, jitter=False)
+        self.assertEqual(gb.get_game(1).id, 1)
+        self.assertEqual(transport.calls, 3)
+        self.assertEqual(gb.retry.retries, 2)
+        self.assertEqual(self.sleeps, [0.1, 0.2])
+
+    def test_gives_up(self):
+        transport = FlakyTransport([http_error(503)] * 5)
+        gb = self.make_api(transport, attempts=3)
+        self.assertRaises(urllib2.HTTPError, gb.get_game, 1)
+        self.assertEqual(transport.calls, 3)
+        self.assertEqual(gb.retry.giveups, 1)
+
+    def test_permanent_errors(self):
+        self.server.missing.add(1)
+        transport = FlakyTransport([http_error(404)])
+        gb = self.make_api(transport)
+        self.assertRaises(urllib2.HTTPError, gb.get_game, 1)
+        self.assertRaises(giantbomb.GiantBombError, gb.get_game, 1)
+        self.assertEqual(transport.calls, 2)
+        self.assertEqual(self.sleeps, [])
+
+    def test_deadline(self):
+        transport = FlakyTransport([http_error(429, retry_after=60)])
+        gb = self.make_api(transport, deadline=10)
+        self.assertRaises(urllib2.HTTPError, gb.get_game, 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_throttle_status_code(self):
+        self.server.status_code = 107
+
+        def sleep(delay):
+            self.sleeps.append(delay)
+            self.server.status_code = 1
+        gb = self.make_api(UrllibTransport())
+        gb.retry.sleep = sleep
+        self.assertEqual(gb.get_game(1).id, 1)
+        self.assertEqual(len(self.sleeps), 1)
+
+    def test_hedged_request(self):
+        transport = FlakyTransport(delays=[1])
+        gb = self.make_api(transport, hedge=True, hedge_delay=0.05)
+        start = time.time()
+        self.assertEqual(gb.get_game(1).id, 1)
+        self.assertTrue(time.time() - start < 0.5)
+        self.assertEqual((gb.retry.hedges, gb.retry.hedge_wins), (1, 1))
+        self.assertEqual(gb.get_game(2).id, 2)
+        self.assertEqual(gb.retry.hedges, 1)
+        gb.close()
+
+    def test_failed_hedge_waits_for_primary(self):
+        # the slow primary gets the delay, the duplicate the error
+        transport = FlakyTransport([http_error(404)], delays=[0.2])
+        gb = self.make_api(transport, hedge=True, hedge_delay=0.05)
+        self.assertEqual(gb.get_game(1).id, 1)
+        self.assertEqual((gb.retry.hedges, gb.retry.hedge_wins), (1, 0))
+        gb.close()
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Imports #####################################################################
+import unittest
+import giantbomb
+from giantbomb.mirror import Mirror
+from giantbomb.searchindex import SearchIndex, tokenize
+
+
+###############################################################################
+class SearchIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add_many('games', [
+            {'id': 1, 'name': 'Portal', 'description': '<p>long</p>'},
+            {'id': 2, 'name': 'Portal 2'},
+            {'id': 3, 'name': 'Half-Life: Portal Edition'},
+            {'id': 4, 'name': 'Pokémon Red', 'aliases': 'Pocket Monsters'},
+            {'id': 5, 'name': 'Team Fortress 2', 'aliases': 'TF2'}])
+        self.index.add('franchise', {'id': 1, 'name': 'Portal'})
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Pokémon: Red-Version'),
+                         [u'pokemon', u'red', u'version'])
+
+    def test_ranking(self):
+        results = self.index.search('portal')
+        self.assertTrue(isinstance(results[0], giantbomb.SearchResult))
+        self.assertEqual([(x.resource_type, x.id) for x in results],
+                         [('franchise', 1), ('game', 1), ('game', 2),
+                          ('game', 3)])
+        self.assertFalse(hasattr(results[1], 'description'))
+
+    def test_prefix_and_all_tokens(self):
+        self.assertEqual([x.id for x in self.index.search('port')],
+                         [1, 1, 2, 3])
+        self.assertEqual([x.id for x in self.index.search('por edit')], [3])
+        self.assertEqual([x.id for x in self.index.search('pokemon')], [4])
+        self.assertEqual(self.index.search('portal 3'), [])
+
+    def test_aliases_rank_below_names(self):
+        self.index.add('game', {'id': 6, 'name': 'Pocket Racing'})
+        self.assertEqual([x.id for x in self.index.search('pocket')], [6, 4])
+        self.assertEqual([x.id for x in self.index.search('tf2')], [5])
+
+    def test_resources_offset_limit(self):
+        self.assertEqual([x.id for x in self.index.search(
+            'portal', resources='game', offset=1, limit=2)], [2, 3])
+        self.assertEqual(len(self.index.search('portal',
+                                               resources='franchise')), 1)
+
+    def test_reindex_and_remove(self):
+        self.index.add('game', {'id': 2, 'name': 'Portal Two'})
+        self.assertEqual(self.index.search('portal 2'), [])
+        self.index.remove('games', 2)
+        self.assertEqual([x.id for x in self.index.search('two')], [])
+        self.assertEqual(len(self.index), 5)
+
+    def test_from_mirror(self):
+        mirror = Mirror(':memory:')
+        mirror.upsert('game', {'id': 9, 'name': 'Portal Stories'})
+        mirror.upsert('platform', {'id': 94, 'name': 'PC'})
+        index = SearchIndex.from_mirror(mirror, ['game'])
+        self.assertEqual([x.name for x in index.search('stor')],
+                         ['Portal Stories'])
+        self.assertEqual(index.search('pc'), [])
+        mirror.close()
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import os
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+import giantbomb
+from giantbomb.sharedcache import SharedCache
+from giantbomb.standin import Server
+
+
+###############################################################################
+def fill(path, keys):
+    '''Store a body for each key from another process'''
+
+    cache = SharedCache(path)
+    for key in keys:
+        cache.set(key, 'body of ' + key)
+    cache.close()
+
+
+class SharedCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.shm')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_shared_between_processes(self):
+        keys = ['game/%s/?format=json' % x for x in range(50)]
+        workers = [multiprocessing.Process(target=fill,
+                                           args=(self.path, keys[x::2]))
+                   for x in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        cache = SharedCache(self.path)
+        self.assertEqual([cache.get(x) for x in keys],
+                         ['body of ' + x for x in keys])
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(cache.stats.hits, 50)
+        cache.close()
+
+    def test_lru_eviction(self):
+        cache = SharedCache(self.path, slots=2, ways=2)
+        cache.set('game/1/?', 'one')
+        cache.set('game/2/?', 'two')
+        self.assertEqual(cache.get('game/1/?'), 'one')
+        cache.set('game/3/?', 'three')
+        self.assertEqual(cache.get('game/2/?'), None)
+        self.assertEqual(cache.get('game/1/?'), 'one')
+        self.assertEqual(cache.get('game/3/?'), 'three')
+        self.assertEqual(cache.stats.evictions, 1)
+        cache.close()
+
+    def test_existing_geometry(self):
+        SharedCache(self.path, slots=16, slot_size=1024, ways=4).close()
+        cache = SharedCache(self.path)
+        self.assertEqual((cache.slots, cache.slot_size, cache.ways),
+                         (16, 1024, 4))
+        cache.close()
+        with open(self.path, 'wb') as f:
+            f.write('not a cache' * 10)
+        self.assertRaises(ValueError, SharedCache, self.path)
+
+    def test_oversized(self):
+        cache = SharedCache(self.path, slot_size=256)
+        cache.set('game/1/?', 'small')
+        cache.set('game/1/?', 'x' * 256)
+        self.assertEqual(cache.get('game/1/?'), None)
+        self.assertEqual(cache.oversized, 1)
+        cache.close()
+
+    def test_validators_and_stale_entries(self):
+        cache = SharedCache(self.path, ttls={'game': 0})
+        cache.set('game/1/?', 'one', etag='"abc"',
+                  last_modified='Mon, 01 Sep 2014 12:00:00 GMT',
+                  updated=u'2014-09-01 12:00:00')
+        self.assertEqual(cache.get('game/1/?'), None)
+        entry = cache.get_entry('game/1/?', stale=True)
+        self.assertEqual((entry.body, entry.etag, entry.updated),
+                         ('one', '"abc"', u'2014-09-01 12:00:00'))
+        self.assertEqual((entry.resource, entry.gbid), ('game', '1'))
+        cache.refresh('game/1/?', entry, ttl=60)
+        self.assertEqual(cache.get('game/1/?'), 'one')
+        self.assertEqual(len(cache), 1)
+        cache.close()
+
+    def test_invalidate_and_clear(self):
+        cache = SharedCache(self.path)
+        cache.set('game/1/?', 'one')
+        cache.set('game/2/?', 'two')
+        cache.set('platform/1/?', 'one')
+        cache.invalidate('game', 1)
+        self.assertEqual(cache.get('game/1/?'), None)
+        self.assertEqual(cache.get('game/2/?'), 'two')
+        cache.invalidate('game')
+        self.assertEqual(cache.get('game/2/?'), None)
+        self.assertEqual(cache.stats.invalidations, 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+    def test_same_file_in_one_process(self):
+        first = SharedCache(self.path, slots=16, ways=4)
+        second = SharedCache(os.path.join(self.tmpdir, '.', 'cache.shm'))
+        self.assertIs(first._locks, second._locks)
+        self.assertEqual(first._fd, second._fd)
+        first.set('game/1/?', 'one')
+        first.close()
+        first.close()
+        self.assertEqual(second.get('game/1/?'), 'one')
+        second.set('game/2/?', 'two')
+        fd = second._fd
+        second.close()
+        self.assertRaises(OSError, os.fstat, fd)
+        third = SharedCache(self.path)
+        self.assertEqual(third.get('game/2/?'), 'two')
+        third.close()
+
+    def test_api(self):
+        server = Server().start()
+        try:
+            caches = [SharedCache(self.path) for _ in range(2)]
+            apis = [giantbomb.Api('key', cache=x, identity_map=False)
+                    for x in caches]
+            for gb in apis:
+                gb.base_url = server.url
+                self.assertEqual(gb.get_game(1).id, 1)
+            self.assertEqual(len(server.paths), 1)
+            self.assertEqual(caches[1].stats.hits, 1)
+            for gb in apis:
+                gb.close()
+            for cache in caches:
+                cache.close()
+        finally:
+            server.stop()
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
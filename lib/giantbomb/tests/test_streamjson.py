@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import json
+import unittest
+from StringIO import StringIO
+import giantbomb
+from giantbomb.cache import MemoryCache
+from giantbomb.streamjson import ResultStream
+from giantbomb.standin import Server
+
+
+###############################################################################
+def envelope(results, status_code=1, error='OK', first=False):
+    '''Serialize a response with the results first or last'''
+
+    head = '"status_code": %s, "error": %s, "number_of_total_results": 1234'
+    head %= (status_code, json.dumps(error))
+    results = '"results": %s' % json.dumps(results, indent=1)
+    if first:
+        return '{%s, %s}' % (results, head)
+    return '{%s, %s}' % (head, results)
+
+
+class ResultStreamTest(unittest.TestCase):
+
+    items = [{'id': x, 'name': u'caf\xe9 %s' % x, 'deck': 'x' * 50}
+             for x in range(1000, 1100)]
+
+    def stream(self, body, chunk_size=7):
+        return ResultStream(StringIO(body), giantbomb.check_response,
+                            chunk_size=chunk_size)
+
+    def test_results_in_order(self):
+        stream = self.stream(envelope(self.items))
+        self.assertEqual(list(stream), self.items)
+        self.assertEqual(stream.count, 100)
+        self.assertEqual(stream.envelope['number_of_total_results'], 1234)
+
+    def test_first_result_before_end_of_body(self):
+        body = envelope(self.items)
+        fobj = StringIO(body)
+        stream = iter(ResultStream(fobj, giantbomb.check_response,
+                                   chunk_size=512))
+        self.assertEqual(next(stream), self.items[0])
+        self.assertTrue(fobj.tell() < len(body) / 2)
+
+    def test_status_after_results(self):
+        stream = self.stream(envelope(self.items, first=True))
+        self.assertEqual(list(stream), self.items)
+
+    def test_error_status(self):
+        for first in (True, False):
+            body = envelope([], 101, 'Object Not Found', first)
+            try:
+                list(self.stream(body))
+            except giantbomb.GiantBombError as exc:
+                self.assertEqual(exc.status_code, 101)
+                self.assertTrue('Object Not Found' in str(exc))
+            else:
+                self.fail('no error raised')
+
+    def test_numbers_across_chunks(self):
+        for chunk_size in range(1, 12):
+            stream = self.stream('{"status_code": 1, "results": [12345, 6]}',
+                                 chunk_size)
+            self.assertEqual(list(stream), [12345, 6])
+
+    def test_truncated(self):
+        body = envelope(self.items)[:-200]
+        self.assertRaises(ValueError, list, self.stream(body))
+
+
+class ApiStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server(total=250).start()
+        self.gb = giantbomb.Api('key', cache=MemoryCache())
+        self.gb.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_iter_stream(self):
+        games = list(self.gb.iter_games(stream=True))
+        self.assertEqual([x.id for x in games], range(1, 251))
+        self.assertTrue(isinstance(games[0], giantbomb.Games))
+        # streamed pages were cached on the way
+        self.assertEqual(len(list(self.gb.iter_games(stream=True))), 250)
+        self.assertEqual(len(self.server.paths), 3)
+
+    def test_search_stream(self):
+        results = list(self.gb.iter_search('uscf', stream=True))
+        self.assertEqual(len(results), 250)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import os
+import shutil
+import tempfile
+import unittest
+import giantbomb
+from giantbomb.sync import Sync, SyncState
+from giantbomb.projection import FieldProfiler
+from giantbomb.standin import Server
+
+
+###############################################################################
+def date(minute):
+    '''A date_last_updated some minutes into 2014'''
+
+    return '2014-01-01 %02d:%02d:00' % (minute // 60, minute % 60)
+
+
+class SyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server(total=250).start()
+        # pairs of objects share their date, to exercise the ties
+        self.server.updated = dict((x, date(x // 2)) for x in range(1, 251))
+        self.gb = giantbomb.Api('key')
+        self.gb.base_url = self.server.url
+        self.tmpdir = tempfile.mkdtemp()
+        self.upserts = []
+        self.sync = Sync(self.gb, SyncState(os.path.join(self.tmpdir,
+                                                          'state.json')),
+                         on_upsert=self.on_upsert)
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def on_upsert(self, resource, obj):
+        self.upserts.append((resource, obj.id))
+
+    def test_initial_sync_gets_everything_once(self):
+        self.assertEqual(self.sync.sync('games'), 250)
+        self.assertEqual(sorted(x[1] for x in self.upserts), range(1, 251))
+        self.assertEqual(self.sync.state.get('games'),
+                         (date(125), set([250])))
+
+    def test_only_changes_are_fetched(self):
+        self.sync.sync('games')
+        self.upserts = []
+        del self.server.paths[:]
+        self.assertEqual(self.sync.sync('games'), 0)
+        self.assertEqual(len(self.server.paths), 1)
+        self.assertTrue('sort=date_last_updated:asc' in self.server.paths[0])
+
+        self.server.updated[7] = self.server.updated[42] = date(300)
+        self.assertEqual(self.sync.sync('games'), 2)
+        self.assertEqual(self.upserts, [('games', 7), ('games', 42)])
+
+    def test_tie_at_the_mark(self):
+        self.server.total = 10
+        self.sync.sync('games')
+        self.assertEqual(self.sync.state.get('games'),
+                         (date(5), set([10])))
+        self.upserts = []
+        # updated within the same second as the mark, after the last sync
+        self.server.updated[3] = date(5)
+        self.assertEqual(self.sync.sync('games'), 1)
+        self.assertEqual(self.upserts, [('games', 3)])
+        self.assertEqual(self.sync.state.get('games'),
+                         (date(5), set([3, 10])))
+
+    def test_many_ties_are_paged(self):
+        self.server.updated = {}
+        self.assertEqual(self.sync.sync('games'), 250)
+        self.upserts = []
+        self.assertEqual(self.sync.sync('games'), 0)
+
+    def test_state_survives_restart(self):
+        self.sync.sync('games')
+        self.server.updated[7] = date(300)
+        state = SyncState(self.sync.state.path)
+        sync = Sync(self.gb, state, on_upsert=self.on_upsert)
+        self.upserts = []
+        self.assertEqual(sync.sync('games'), 1)
+        self.assertEqual(self.upserts, [('games', 7)])
+
+    def test_auto_field_list(self):
+        gb = giantbomb.Api('key', auto_field_list=FieldProfiler(warmup=1))
+        gb.base_url = self.server.url
+        [x.name for x in gb.get_games(limit=5)]
+        del self.server.paths[:]
+        sync = Sync(gb, on_upsert=self.on_upsert)
+        self.assertEqual(sync.sync('games'), 250)
+        self.assertEqual(sync.state.get('games'), (date(125), set([250])))
+        self.assertFalse([x for x in self.server.paths
+                          if 'field_list' in x])
+        self.assertEqual(sync.sync('games'), 0)
+
+    def test_caller_filter(self):
+        self.assertEqual(self.sync.sync('games', filter='id:3|4|200'), 3)
+        self.server.updated[4] = self.server.updated[7] = date(300)
+        self.upserts = []
+        self.assertEqual(self.sync.sync('games', filter={'id': '3|4|200'}),
+                         1)
+        self.assertEqual(self.upserts, [('games', 4)])
+        self.assertRaises(ValueError, self.sync.sync, 'games',
+                          filter={'date_last_updated': date(1)})
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+# Imports #####################################################################
+import time
+import urllib2
+import unittest
+import giantbomb
+from giantbomb.transport import PooledTransport, UrllibTransport, USER_AGENT
+from giantbomb.standin import Server
+
+
+###############################################################################
+class TransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def make_api(self, transport):
+        gb = giantbomb.Api('key', transport=transport)
+        gb.base_url = self.server.url
+        return gb
+
+    def test_pooled_reuses_connection(self):
+        gb = self.make_api(PooledTransport())
+        for i in range(5):
+            self.assertEqual(gb.get_game(i).id, i)
+        gb.get_games(limit=10)
+        gb.search('uscf')
+        self.assertEqual(len(self.server.paths), 7)
+        self.assertEqual(self.server.connections, 1)
+        gb.close()
+
+    def test_urllib_connects_every_time(self):
+        gb = self.make_api(UrllibTransport())
+        for i in range(5):
+            gb.get_game(i)
+        self.assertEqual(self.server.connections, 5)
+
+    def test_idle_timeout(self):
+        transport = PooledTransport(idle_timeout=0.05)
+        gb = self.make_api(transport)
+        gb.get_game(1)
+        time.sleep(0.1)
+        gb.get_game(2)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_max_age(self):
+        transport = PooledTransport(max_age=0)
+        gb = self.make_api(transport)
+        gb.get_game(1)
+        gb.get_game(2)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_http_error(self):
+        transport = PooledTransport()
+        self.assertRaises(urllib2.HTTPError, transport.open,
+                          self.server.url.replace('/api/', '/nope/'))
+
+    def test_user_agent(self):
+        gb = self.make_api(PooledTransport(proxies={}))
+        gb.get_game(1)
+        transport = PooledTransport(proxies={})
+        transport.open(self.server.url + 'game/2/?format=json',
+                       {'User-Agent': 'mine'}).read()
+        agents = [x.getheader('User-Agent')
+                  for x in self.server.request_headers]
+        self.assertEqual(agents, [USER_AGENT, 'mine'])
+
+    def test_http_proxy(self):
+        proxy = self.server.url.replace('/api/', '').replace(
+            'http://', 'http://user:secret@')
+        gb = giantbomb.Api('key', transport=PooledTransport(
+            proxies={'http': proxy}))
+        gb.base_url = 'http://api.example.invalid/api/'
+        self.assertEqual(gb.get_game(1).id, 1)
+        self.assertEqual(gb.get_game(2).id, 2)
+        self.assertTrue(self.server.paths[0].startswith(
+            'http://api.example.invalid/api/game/1/?'))
+        headers = self.server.request_headers[0]
+        self.assertEqual(headers.getheader('Host'), 'api.example.invalid')
+        self.assertEqual(headers.getheader('Proxy-Authorization'),
+                         'Basic dXNlcjpzZWNyZXQ=')
+        self.assertEqual(self.server.connections, 1)
+
+    def test_https_tunnel(self):
+        transport = PooledTransport(proxies={'https': 'proxy:3128'})
+        pool = transport._pool_for('https', 'api.example.invalid', None)
+        self.assertFalse(pool.forward)
+        conn = pool.acquire()
+        self.assertEqual((conn.host, conn.port), ('proxy', 3128))
+        self.assertEqual(conn._tunnel_host, 'api.example.invalid')
+        self.assertEqual(transport._proxy_for('http', 'localhost'), None)
+
+
+###############################################################################
+if __name__ == "__main__":
+    unittest.main()
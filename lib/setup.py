@@ -39,7 +39,6 @@ if __name__ == '__main__':
             'License :: OSI Approved :: GNU General Public License v2 or later (GPLv2+)',
             'Programming Language :: Python',
             'Programming Language :: Python :: 2',
-            'Programming Language :: Python :: 2.6',
             'Programming Language :: Python :: 2.7',
             'Programming Language :: Python :: 3',
             'Programming Language :: Python :: 3.2',